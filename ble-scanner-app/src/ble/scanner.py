@@ -1,23 +1,39 @@
 from bleak import BleakScanner
 import asyncio
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# "bleak" for real adapters; replay/synthetic sources come from the cycleroom
+# backend (see backend/packet_sources.py), which must be on PYTHONPATH
+PACKET_SOURCE = os.getenv("PACKET_SOURCE", "bleak")
+
+
+def default_source_factory(callback):
+    if PACKET_SOURCE == "bleak":
+        return BleakScanner(callback)
+    from backend.packet_sources import create_packet_source
+
+    return create_packet_source(PACKET_SOURCE, callback)
+
+
 class BLEScanner:
-    def __init__(self):
-        self.scanner = BleakScanner()
+    def __init__(self, source_factory=default_source_factory):
+        self.source_factory = source_factory
+        self.scanner = None
         self.found_devices = set()
 
     async def detection_callback(self, device, advertisement_data):
-        logger.info(f"Device detected: {device.name} ({device.address})")
+        logger.debug(f"Device detected: {device.name} ({device.address})")
         if device.address not in self.found_devices:
             self.found_devices.add(device.address)
             logger.info(f"Found new device: {device.name} ({device.address})")
 
     async def start_scanning(self, scan_duration=10):
         logger.info("Starting BLE scan...")
-        await self.scanner.start(self.detection_callback)
+        self.scanner = self.source_factory(self.detection_callback)
+        await self.scanner.start()
         await asyncio.sleep(scan_duration)
         await self.scanner.stop()
         logger.info("BLE scan stopped.")
@@ -27,4 +43,4 @@ class BLEScanner:
 
     def clear_found_devices(self):
         self.found_devices.clear()
-        logger.info("Cleared found devices.")
\ No newline at end of file
+        logger.info("Cleared found devices.")
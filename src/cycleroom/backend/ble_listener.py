@@ -1,16 +1,34 @@
 import asyncio
+import functools
 import logging
+import socket
 import subprocess
 import sys
+import time
 from bleak import BleakScanner
+from bleak.exc import BleakError
 import httpx
 import os
 from fastapi import FastAPI
+from backend.ble_merge import AdvertisementMerger
+from backend.packet_sources import (
+    KEISER_COMPANY_ID,
+    PACKET_SOURCE,
+    create_packet_source,
+)
+from backend.utils.advertisement import Advertisement
 
 app = FastAPI()
 
-# FastAPI Endpoint to Send Parsed Data
-FASTAPI_URL = os.getenv("FASTAPI_URL", "http://192.168.1.211/api/bikes")
+# FastAPI Endpoint that ingests batches of raw advertisements
+INGEST_URL = os.getenv("INGEST_URL", "http://127.0.0.1:8000/parse_raw_data/batch")
+SCANNER_SOURCE = os.getenv("SCANNER_SOURCE", socket.gethostname())
+
+# Advertisements waiting for the uplink; the callback drops packets when full
+PACKET_QUEUE_SIZE = int(os.getenv("PACKET_QUEUE_SIZE", 10000))
+UPLINK_BATCH_SIZE = int(os.getenv("UPLINK_BATCH_SIZE", 500))
+# Seconds the uplink waits for a batch to fill after the first packet arrives
+UPLINK_MAX_DELAY = float(os.getenv("UPLINK_MAX_DELAY", 0.1))
 
 # Logger Configuration
 logging.basicConfig(
@@ -23,30 +41,128 @@ logger = logging.getLogger(__name__)
 # Target Device Prefix
 TARGET_PREFIX = os.getenv("TARGET_PREFIX", "M3")
 
+# No advertisements at all for this many seconds means the adapter has failed;
+# replayed and synthetic sources have no adapter, so silence is expected there
+SCAN_STALL_TIMEOUT = float(
+    os.getenv("SCAN_STALL_TIMEOUT", 300 if PACKET_SOURCE == "bleak" else 0)
+)
+SCAN_HEALTH_INTERVAL = float(os.getenv("SCAN_HEALTH_INTERVAL", 5))
+SCAN_RESTART_DELAY = float(os.getenv("SCAN_RESTART_DELAY", 2))
+
+# HCI adapters to scan with at once, e.g. "hci0,hci1"; empty uses the default
+BLE_ADAPTERS = [
+    a.strip() for a in os.getenv("BLE_ADAPTERS", "").split(",") if a.strip()
+]
+# Seconds to wait for other adapters' copies of a packet before forwarding it
+MERGE_WINDOW = float(os.getenv("MERGE_WINDOW", 0.05))
+
+
+class ScanStats:
+    """Capture counters for the running scanner, served on /stats."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.packets = 0
+        self.keiser_packets = 0
+        self.restarts = 0
+        self.queue_dropped = 0
+        self.uplinked = 0
+        self.uplink_errors = 0
+        self.last_packet_at = None
+        self.last_error = None
+        self._window_start = self.started_at
+        self._window_packets = 0
+        self._window_rate = 0.0
+
+    def record(self, is_keiser: bool):
+        self.packets += 1
+        if is_keiser:
+            self.keiser_packets += 1
+        self.last_packet_at = time.monotonic()
+
+    def seconds_since_last_packet(self, now=None):
+        now = now or time.monotonic()
+        return now - (self.last_packet_at or self.started_at)
+
+    def packet_rate(self):
+        """Packets per second since the previous call (the health check interval)."""
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self._window_rate = (self.packets - self._window_packets) / elapsed
+            self._window_start = now
+            self._window_packets = self.packets
+        return self._window_rate
+
+    def to_dict(self):
+        uptime = time.monotonic() - self.started_at
+        return {
+            "uptime_seconds": round(uptime, 1),
+            "packets": self.packets,
+            "keiser_packets": self.keiser_packets,
+            "packets_per_second": round(self.packets / uptime, 2) if uptime else 0.0,
+            "recent_packets_per_second": round(self._window_rate, 2),
+            "restarts": self.restarts,
+            "queue_dropped": self.queue_dropped,
+            "uplinked": self.uplinked,
+            "uplink_errors": self.uplink_errors,
+            "seconds_since_last_packet": round(self.seconds_since_last_packet(), 1),
+            "last_error": self.last_error,
+        }
+
+
+scan_stats = ScanStats()
+
+# Per-adapter capture counters; a single default adapter reports into scan_stats
+adapter_stats = {}
+
+
 # Optimization 1: Use a set to store unique device addresses
 found_bikes = set()
+packet_queue: asyncio.Queue = asyncio.Queue(maxsize=PACKET_QUEUE_SIZE)
 
-# Optimization 2: Use a coroutine for the detection callback
-async def detection_callback(device, advertisement_data):
-    logger.debug(f"Device detected: {device.name} ({device.address})")
-    logger.debug(f"Advertisement data: {advertisement_data}")
-    if device.name and device.name.startswith(TARGET_PREFIX):
-        try:
-            manufacturer_data = advertisement_data.manufacturer_data.get(0x0645)
-            logger.debug(f"Manufacturer data: {manufacturer_data}")
-            if manufacturer_data:
-                parsed_data = {
-                    "device_name": device.name,
-                    "device_address": device.address,
-                }
-                if device.address not in found_bikes:
-                    found_bikes.add(device.address)
-                    logger.info(
-                        f"✅ Found Keiser Bike {device.name} ({device.address}) → {parsed_data}"
-                    )
-                    await send_data_to_fastapi(parsed_data)
-        except KeyError as e:
-            logger.warning(f"⚠️ Error parsing BLE data from {device.name}: {e}")
+
+def enqueue_packet(address, rssi, ts, payload, source):
+    try:
+        packet_queue.put_nowait(Advertisement(address, rssi, ts, payload, source))
+    except asyncio.QueueFull:
+        scan_stats.queue_dropped += 1
+        return
+    if address not in found_bikes:
+        found_bikes.add(address)
+        logger.info(f"✅ Found Keiser Bike {address} via {source}")
+
+
+# Every adapter feeds the merger, which de-duplicates and fills the queue
+merger = AdvertisementMerger(
+    enqueue_packet, window=MERGE_WINDOW if len(BLE_ADAPTERS) > 1 else 0.0
+)
+
+
+# Optimization 2: Keep the radio callback cheap; the uplink does the rest
+def make_detection_callback(source="default", stats=None):
+    stats = stats or scan_stats
+    # The aggregate counters also see every packet when several adapters run
+    totals = scan_stats if stats is not scan_stats else None
+
+    def callback(device, advertisement_data):
+        payload = advertisement_data.manufacturer_data.get(KEISER_COMPANY_ID)
+        stats.record(payload is not None)
+        if totals:
+            totals.record(payload is not None)
+        if payload is None:
+            return
+        # Passive scans may not carry the name; the manufacturer ID is enough then
+        if device.name and not device.name.startswith(TARGET_PREFIX):
+            return
+        merger.offer(
+            source, device.address, advertisement_data.rssi, time.time(), payload
+        )
+
+    return callback
+
+
+detection_callback = make_detection_callback()
 
 # Optimization 3: Use a coroutine for the scanning loop
 async def scan_keiser_bikes(scan_duration=10):
@@ -61,41 +177,149 @@ async def scan_keiser_bikes(scan_duration=10):
     logger.info(f"🔍 Scan complete. Found {len(found_bikes)} bikes.")
     logger.debug(f"Found bikes: {found_bikes}")
 
-# Optimization 4: Use a coroutine for sending data to FastAPI
-async def send_data_to_fastapi(data):
-    logger.debug(f"Sending data to FastAPI: {data}")
-    async with httpx.AsyncClient() as client:
+def create_scanner(callback, adapter=None):
+    """Build the packet source selected by PACKET_SOURCE for one adapter."""
+    return create_packet_source(PACKET_SOURCE, callback, adapter=adapter)
+
+
+class ScannerStalled(Exception):
+    pass
+
+
+async def scan_continuously(
+    scanner_factory=create_scanner, stats=None, stall_timeout=None, callback=None
+):
+    """
+    Keep one scanner running indefinitely.
+
+    The scanner is only stopped and rebuilt when starting it fails, when the
+    backend raises, or when no advertisement at all has arrived for
+    ``stall_timeout`` seconds (a silent adapter). Set SCAN_STALL_TIMEOUT to 0
+    to disable the stall check.
+    """
+    stats = stats or scan_stats
+    callback = callback or detection_callback
+    if stall_timeout is None:
+        stall_timeout = SCAN_STALL_TIMEOUT
+    while True:
+        scanner = scanner_factory(callback)
         try:
-            response = await client.post(FASTAPI_URL, json=data)
-            if response.status_code == 200:
-                logger.info("✅ Successfully sent BLE data to FastAPI.")
-            else:
-                logger.error(
-                    f"❌ Failed to send BLE data. Status Code: {response.status_code}"
-                )
-        except httpx.RequestError as e:
-            logger.error(f"❌ Error sending data to FastAPI: {e}")
-
-# Optimization 5: Use a coroutine for the main loop
-async def main():
+            await scanner.start()
+            logger.info("🔍 Continuous BLE scan running")
+            while True:
+                await asyncio.sleep(SCAN_HEALTH_INTERVAL)
+                stats.packet_rate()
+                silent = stats.seconds_since_last_packet()
+                if stall_timeout and silent > stall_timeout:
+                    raise ScannerStalled(f"no advertisements for {silent:.0f}s")
+        except (BleakError, OSError, ScannerStalled) as e:
+            stats.restarts += 1
+            stats.last_error = str(e)
+            logger.error(f"❌ BLE scanner failed, restarting: {e}")
+        finally:
+            try:
+                await scanner.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping BLE scanner: {e}")
+        # Do not count the restart gap as silence
+        stats.last_packet_at = time.monotonic()
+        await asyncio.sleep(SCAN_RESTART_DELAY)
+
+# Optimization 4: Batch queued packets and send them over one connection
+async def uplink(queue=None, url=None, stats=None):
+    """Forward every queued advertisement to the ingest endpoint in batches."""
+    queue = queue or packet_queue
+    url = url or INGEST_URL
+    stats = stats or scan_stats
+    async with httpx.AsyncClient(timeout=10) as client:
+        while True:
+            batch = [await queue.get()]
+            await asyncio.sleep(UPLINK_MAX_DELAY)
+            while len(batch) < UPLINK_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            await send_batch(client, url, batch, stats)
+
+
+async def send_batch(client, url, batch, stats):
+    body = {
+        "source": SCANNER_SOURCE,
+        "packets": [
+            {
+                "address": packet.address,
+                "rssi": packet.rssi,
+                "ts": packet.ts,
+                "data": packet.payload.hex(),
+                "source": packet.source,
+            }
+            for packet in batch
+        ],
+    }
+    try:
+        response = await client.post(url, json=body)
+        if response.status_code == 200:
+            stats.uplinked += len(batch)
+            logger.debug("Sent %d packets to FastAPI", len(batch))
+        else:
+            stats.uplink_errors += 1
+            logger.error(
+                f"❌ Failed to send BLE batch. Status Code: {response.status_code}"
+            )
+    except httpx.RequestError as e:
+        stats.uplink_errors += 1
+        logger.error(f"❌ Error sending BLE batch to FastAPI: {e}")
+
+async def flush_merger(interval=None):
+    """Release merged packets once their merge window has closed."""
+    interval = interval or max(merger.window / 2, 0.01)
     while True:
-        logger.debug("Starting main loop iteration")
-        await scan_keiser_bikes(scan_duration=20)  # Increase scan duration to 20 seconds
-        await asyncio.sleep(5)  # Scan every 5 seconds
-        logger.debug("Main loop iteration complete")
+        await asyncio.sleep(interval)
+        merger.flush()
+
+
+def scan_adapter(adapter):
+    """Scan continuously on one HCI adapter with its own capture counters."""
+    stats = adapter_stats[adapter] = ScanStats()
+    return scan_continuously(
+        functools.partial(create_scanner, adapter=adapter),
+        stats=stats,
+        callback=make_detection_callback(adapter, stats),
+    )
+
+
+# Optimization 5: One scanner per adapter that runs for the life of the process
+async def main():
+    if len(BLE_ADAPTERS) <= 1:
+        adapter = BLE_ADAPTERS[0] if BLE_ADAPTERS else None
+        await scan_continuously(functools.partial(create_scanner, adapter=adapter))
+        return
+    logger.info(f"🔍 Scanning with adapters: {', '.join(BLE_ADAPTERS)}")
+    await asyncio.gather(
+        flush_merger(), *[scan_adapter(adapter) for adapter in BLE_ADAPTERS]
+    )
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.debug("Starting lifespan context manager")
-    asyncio.create_task(main())
+    tasks = [asyncio.create_task(main()), asyncio.create_task(uplink())]
     yield
+    for task in tasks:
+        task.cancel()
     logger.debug("Lifespan context manager complete")
     # Add any cleanup code here if needed
 
 app = FastAPI(lifespan=lifespan)
 
+
+@app.get("/stats")
+async def get_scan_stats():
+    """Packet capture rate and scanner restart counts, overall and per adapter."""
+    stats = scan_stats.to_dict()
+    stats["adapters"] = {name: s.to_dict() for name, s in adapter_stats.items()}
+    stats["merge"] = merger.to_dict()
+    return stats
+
 # Check for BLE permissions
 
 def check_ble_permissions():
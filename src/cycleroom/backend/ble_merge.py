@@ -0,0 +1,117 @@
+"""
+Merge advertisements heard by several adapters or scanner hosts.
+
+Every source offers what it hears; the merger emits one sequence per bike with
+repeated payloads removed. When a merge window is set, a new payload is held
+for that long so copies from the other sources can arrive, and the copy with
+the strongest RSSI decides which source the emitted packet is tagged with.
+With a window of 0 packets are emitted immediately, first source wins.
+"""
+
+import time
+from typing import Callable, Dict, Tuple
+
+
+class SourceCounters:
+    def __init__(self):
+        self.received = 0
+        self.best = 0  # Packets this source delivered with the strongest signal
+
+    def to_dict(self):
+        return {"received": self.received, "best_rssi": self.best}
+
+
+class _Pending:
+    __slots__ = ("deadline", "ts", "rssi", "source")
+
+    def __init__(self, deadline, ts, rssi, source):
+        self.deadline = deadline
+        self.ts = ts
+        self.rssi = rssi
+        self.source = source
+
+
+class AdvertisementMerger:
+    def __init__(self, emit: Callable, window: float = 0.0):
+        """
+        Args:
+            emit:   Called as emit(address, rssi, ts, payload, source) for every
+                    packet that survives de-duplication.
+            window: Seconds to wait for copies of a new payload from other sources.
+        """
+        self.emit = emit
+        self.window = window
+        self.pending: Dict[Tuple[str, bytes], _Pending] = {}
+        self.last_payload: Dict[str, bytes] = {}
+        self.sources: Dict[str, SourceCounters] = {}
+        self.emitted = 0
+        self.duplicates = 0
+        self.merge_seconds = 0.0
+
+    def offer(
+        self, source: str, address: str, rssi: int, ts: float, payload: bytes
+    ) -> bool:
+        """Take one packet from ``source``; returns False if it is a duplicate."""
+        started = time.perf_counter()
+        counters = self.sources.get(source)
+        if counters is None:
+            counters = self.sources[source] = SourceCounters()
+        counters.received += 1
+
+        key = (address, payload)
+        pending = self.pending.get(key)
+        is_new = False
+        if pending is not None:
+            self.duplicates += 1
+            if rssi > pending.rssi:
+                pending.rssi = rssi
+                pending.source = source
+        elif self.last_payload.get(address) == payload:
+            # Already emitted; a late copy or a bike repeating itself
+            self.duplicates += 1
+        elif self.window > 0:
+            self.pending[key] = _Pending(
+                time.monotonic() + self.window, ts, rssi, source
+            )
+            is_new = True
+        else:
+            self._emit(address, payload, rssi, ts, source)
+            is_new = True
+        self.merge_seconds += time.perf_counter() - started
+        return is_new
+
+    def flush(self, now: float = None, force: bool = False):
+        """Emit the held payloads whose window has closed, oldest first."""
+        if not self.pending:
+            return
+        started = time.perf_counter()
+        now = time.monotonic() if now is None else now
+        ready = [
+            key
+            for key, pending in self.pending.items()
+            if force or pending.deadline <= now
+        ]
+        for key in ready:
+            pending = self.pending.pop(key)
+            address, payload = key
+            self._emit(address, payload, pending.rssi, pending.ts, pending.source)
+        self.merge_seconds += time.perf_counter() - started
+
+    def _emit(self, address, payload, rssi, ts, source):
+        self.last_payload[address] = payload
+        self.sources[source].best += 1
+        self.emitted += 1
+        self.emit(address, rssi, ts, payload, source)
+
+    def to_dict(self):
+        handled = self.emitted + self.duplicates
+        return {
+            "window_seconds": self.window,
+            "emitted": self.emitted,
+            "duplicates": self.duplicates,
+            "pending": len(self.pending),
+            "merge_microseconds_per_packet": (
+                round(self.merge_seconds / handled * 1e6, 2) if handled else 0.0
+            ),
+            "sources": {name: c.to_dict() for name, c in self.sources.items()},
+        }
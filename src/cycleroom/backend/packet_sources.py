@@ -0,0 +1,324 @@
+"""
+Sources of Keiser advertisements for the ingest pipeline.
+
+Every source has the shape of a BleakScanner: it is built with a detection
+callback, started and stopped, and calls ``callback(device, advertisement_data)``
+for every packet. The listener therefore runs unchanged against real radios,
+recorded captures or a synthetic room, which lets the whole pipeline be
+load-tested without hardware.
+
+``PACKET_SOURCE`` selects one:
+
+    bleak                                   real adapters (default)
+    replay:captures/ride.json?speed=1       recorded capture in real time
+    replay:captures/ride.csv?speed=10       ten times faster
+    replay:captures/ride.json?speed=0       as fast as possible
+    synthetic:?bikes=40&rate=4              40 virtual bikes at 4 Hz each
+
+Add ``loop=1`` to a replay to restart it from the beginning when it ends.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import parse_qs, urlparse
+from backend.utils.advertisement import Advertisement
+from backend.utils.recordings import read_recording
+from utils.simbledata import generate_m3_data
+
+logger = logging.getLogger(__name__)
+
+KEISER_COMPANY_ID = 0x0645
+PACKET_SOURCE = os.getenv("PACKET_SOURCE", "bleak")
+# Continuous scanning: "passive" where the platform supports it, else "active"
+SCAN_MODE = os.getenv("SCAN_MODE", "passive")
+
+# Replays running flat out yield to the event loop this often
+YIELD_EVERY = 256
+
+
+class SourceDevice(NamedTuple):
+    address: str
+    name: Optional[str]
+
+
+class SourceAdvertisementData(NamedTuple):
+    manufacturer_data: Dict[int, bytes]
+    rssi: int
+
+
+# Set once passive scanning has failed to start; later scanners are active
+_passive_unavailable = False
+
+
+def create_bleak_scanner(callback, adapter=None):
+    """
+    Build a BleakScanner, passive where the platform allows it.
+
+    BlueZ only scans passively through an advertisement monitor, so the
+    monitor is set to match Keiser manufacturer data. Platforms without
+    passive scanning (macOS) fall back to active scanning. BlueZ older than
+    5.56, or without --experimental, only refuses when the scan starts, so
+    passive scanners are wrapped in a ``PassiveFallbackScanner``.
+    """
+    from bleak import BleakScanner
+    from bleak.exc import BleakError
+
+    kwargs = {"adapter": adapter} if adapter else {}
+    if SCAN_MODE == "passive" and not _passive_unavailable:
+        passive_kwargs = dict(kwargs)
+        if sys.platform.startswith("linux"):
+            from bleak.assigned_numbers import AdvertisementDataType
+            from bleak.backends.bluezdbus.advertisement_monitor import OrPattern
+            from bleak.backends.bluezdbus.scanner import BlueZScannerArgs
+
+            passive_kwargs["bluez"] = BlueZScannerArgs(
+                or_patterns=[
+                    OrPattern(
+                        0,
+                        AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA,
+                        KEISER_COMPANY_ID.to_bytes(2, "little"),
+                    )
+                ]
+            )
+        try:
+            scanner = BleakScanner(callback, scanning_mode="passive", **passive_kwargs)
+        except (BleakError, ValueError) as e:
+            _use_active(e)
+        else:
+            return PassiveFallbackScanner(
+                scanner, lambda: BleakScanner(callback, **kwargs)
+            )
+    return BleakScanner(callback, **kwargs)
+
+
+def _use_active(error):
+    global _passive_unavailable
+    if not _passive_unavailable:
+        logger.warning(f"⚠️ Passive scanning unavailable, using active: {error}")
+    _passive_unavailable = True
+
+
+class PassiveFallbackScanner:
+    """
+    A passive scanner that switches to an active one if it fails to start.
+    Once an active scan has started in its place, every later scanner in the
+    process is built active.
+    """
+
+    def __init__(self, passive, make_active):
+        self.scanner = passive
+        self._make_active = make_active
+
+    async def start(self):
+        from bleak.exc import BleakError
+
+        try:
+            await self.scanner.start()
+            return
+        except BleakError as e:
+            error = e
+        try:
+            await self.scanner.stop()
+        except Exception as e:
+            logger.debug(f"Error stopping passive BLE scanner: {e}")
+        self.scanner = self._make_active()
+        # An adapter that cannot scan at all fails here too, and is retried
+        # passively on the next restart
+        await self.scanner.start()
+        _use_active(error)
+
+    async def stop(self):
+        await self.scanner.stop()
+
+
+class PacketSource:
+    """Base class for sources that generate packets from a background task."""
+
+    def __init__(self, callback, name="source"):
+        self.callback = callback
+        self.name = name
+        self.sent = 0
+        self.finished = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.finished.clear()
+        self._task = asyncio.create_task(self._run_and_finish())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_and_finish(self):
+        try:
+            await self._run()
+        finally:
+            self.finished.set()
+
+    async def _run(self):
+        raise NotImplementedError
+
+    async def _deliver(self, packet: Advertisement, name: Optional[str] = None):
+        result = self.callback(
+            SourceDevice(packet.address, name),
+            SourceAdvertisementData({KEISER_COMPANY_ID: packet.payload}, packet.rssi),
+        )
+        if inspect.isawaitable(result):
+            await result
+        self.sent += 1
+
+
+class ReplaySource(PacketSource):
+    """
+    Replays recorded packets, keeping their original spacing.
+
+    ``speed`` scales time: 1 is real time, 10 is ten times faster and 0 sends
+    as fast as the pipeline accepts them.
+    """
+
+    def __init__(self, callback, packets: List[Advertisement], speed=1.0, loop=False):
+        super().__init__(callback, name="replay")
+        self.packets = packets
+        self.speed = speed
+        self.loop = loop
+
+    async def _run(self):
+        if not self.packets:
+            logger.warning("⚠️ Nothing to replay")
+            return
+        first_ts = self.packets[0].ts
+        span = self.packets[-1].ts - first_ts
+        offset = 0.0
+        started = time.monotonic()
+        while True:
+            for index, packet in enumerate(self.packets):
+                if self.speed > 0:
+                    due = (packet.ts - first_ts + offset) / self.speed
+                    delay = due - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif index % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+                await self._deliver(packet)
+            if not self.loop:
+                logger.info(f"✅ Replay finished: {self.sent} packets")
+                return
+            offset += span
+
+
+class VirtualBike:
+    """A rider on one bike whose effort drifts between easy, steady and hard."""
+
+    EFFORTS = {"easy": (65, 90), "steady": (80, 160), "hard": (100, 280)}
+
+    def __init__(self, equipment_id: int, rng: random.Random):
+        self.equipment_id = equipment_id
+        self.address = f"5E:00:00:00:{equipment_id >> 8:02X}:{equipment_id & 255:02X}"
+        self.rng = rng
+        self.cadence = rng.uniform(60, 80)
+        self.power = rng.uniform(80, 120)
+        self.heart_rate = rng.uniform(95, 110)
+        self.gear = rng.randint(8, 14)
+        self.distance = 0.0  # Miles
+        self.calories = 0.0
+        self.elapsed = 0.0  # Seconds
+        self._effort = "easy"
+        self._effort_left = rng.uniform(30, 120)
+
+    def step(self, dt: float):
+        """Advance the ride by ``dt`` seconds."""
+        self.elapsed += dt
+        self._effort_left -= dt
+        if self._effort_left <= 0:
+            self._effort = self.rng.choice(list(self.EFFORTS))
+            self._effort_left = self.rng.uniform(20, 180)
+            self.gear = min(24, max(1, self.gear + self.rng.randint(-3, 3)))
+        target_cadence, target_power = self.EFFORTS[self._effort]
+        # Ease towards the target effort with a little noise
+        ease = min(1.0, dt / 5)
+        self.cadence += (target_cadence - self.cadence) * ease + self.rng.gauss(0, 1)
+        self.power += (target_power - self.power) * ease + self.rng.gauss(0, 3)
+        target_hr = 90 + self.power * 0.35
+        self.heart_rate += (target_hr - self.heart_rate) * min(1.0, dt / 20)
+        self.cadence = max(0.0, self.cadence)
+        self.power = max(0.0, self.power)
+        speed_mph = self.cadence * self.gear * 0.0125
+        self.distance += speed_mph * dt / 3600
+        self.calories += self.power * dt / 1000
+
+    def payload(self) -> bytes:
+        minutes, seconds = divmod(int(self.elapsed), 60)
+        return bytes(
+            generate_m3_data(
+                equipment_id=self.equipment_id,
+                cadence=min(65535, int(self.cadence * 10)),
+                heart_rate=min(65535, int(self.heart_rate * 10)),
+                power=min(65535, int(self.power)),
+                caloric_burn=min(65535, int(self.calories)),
+                duration_minutes=min(255, minutes),
+                duration_seconds=seconds,
+                distance=min(999, int(self.distance * 10)),
+                gear=self.gear,
+            )
+        )
+
+
+class SyntheticSource(PacketSource):
+    """Simulates ``bikes`` riders, each advertising ``rate`` times a second."""
+
+    def __init__(self, callback, bikes=10, rate=4.0, seed=None, duration=None):
+        super().__init__(callback, name="synthetic")
+        rng = random.Random(seed)
+        self.bikes = [VirtualBike(i, rng) for i in range(1, min(bikes, 200) + 1)]
+        self.rate = rate
+        self.duration = duration
+
+    async def _run(self):
+        interval = 1 / self.rate
+        started = time.monotonic()
+        tick = 0
+        while self.duration is None or tick * interval < self.duration:
+            for bike in self.bikes:
+                bike.step(interval)
+                packet = Advertisement(
+                    bike.address, -60, time.time(), bike.payload(), self.name
+                )
+                await self._deliver(packet, name="M3")
+            tick += 1
+            delay = started + tick * interval - time.monotonic()
+            await asyncio.sleep(max(0.0, delay))
+
+
+def create_packet_source(spec: str, callback, adapter=None):
+    """Build the source described by ``spec`` (see the module docstring)."""
+    if spec in ("", "bleak"):
+        return create_bleak_scanner(callback, adapter)
+    parsed = urlparse(spec)
+    options = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+    if parsed.scheme == "replay":
+        return ReplaySource(
+            callback,
+            read_recording(parsed.path),
+            speed=float(options.get("speed", 1)),
+            loop=options.get("loop") == "1",
+        )
+    if parsed.scheme == "synthetic":
+        seed = options.get("seed")
+        return SyntheticSource(
+            callback,
+            bikes=int(options.get("bikes", 10)),
+            rate=float(options.get("rate", 4)),
+            seed=int(seed) if seed is not None else None,
+        )
+    raise ValueError(f"Unknown packet source: {spec}")
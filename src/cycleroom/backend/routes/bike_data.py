@@ -1,13 +1,24 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from backend.utils.db_utils import get_latest_bike_data
+from backend.utils.bike_state import bike_store
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import asyncio
 import logging
-
+import os
+import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between InfluxDB queries; polls in between use the cache
+QUERY_INTERVAL = float(os.getenv("QUERY_INTERVAL", 2))
+
+_last_refresh = 0.0
+_refresh_lock = asyncio.Lock()
+
 
 # Response Model for Real-Time Bike Data
 class BikeDataResponse(BaseModel):
@@ -15,15 +26,78 @@ class BikeDataResponse(BaseModel):
     distance: float
 
 
+async def refresh_bike_state():
+    """Reload the latest bike data from InfluxDB at most once per QUERY_INTERVAL."""
+    global _last_refresh
+    async with _refresh_lock:
+        if time.monotonic() - _last_refresh < QUERY_INTERVAL:
+            return
+        if bike_store.is_live():
+            return  # The ingest path is feeding fresher data than InfluxDB has
+        latest = await run_in_threadpool(get_latest_bike_data)
+        _last_refresh = time.monotonic()
+        # An empty result is also what a failed query returns; keep the last data
+        if latest:
+            bike_store.apply_snapshot(latest)
+
+
 @router.get("/bikes", tags=["Bike Data"], response_model=Dict[str, Any])
-async def get_bike_data():
+async def get_bike_data(
+    request: Request,
+    since: Optional[int] = Query(
+        None, description="Only return bikes that changed after this version"
+    ),
+):
     """
     Retrieve real-time bike data from InfluxDB.
 
+    The current version is returned in the `X-Bikes-Version` header together
+    with an `ETag`; polls sending a matching `If-None-Match` get
+    `304 Not Modified`. With `since`, only the bikes changed after that
+    version are returned, as `{"version", "bikes", "removed"}`. Versions of
+    live updates are the same on every worker; those of InfluxDB snapshots
+    are per worker, so behind several workers without live ingest poll with
+    `If-None-Match` instead of `since`.
+
     Returns:
         A JSON object containing the latest distance data for each bike.
     """
-    data = get_latest_bike_data()
-    if not data:
+    await refresh_bike_state()
+    headers = {"X-Bikes-Version": str(bike_store.version)}
+
+    if since is not None:
+        if since >= bike_store.version:
+            return Response(status_code=304, headers=headers)
+        bikes, removed = bike_store.changed_since(since)
+        return JSONResponse(
+            {"version": bike_store.version, "bikes": bikes, "removed": removed},
+            headers=headers,
+        )
+
+    if not bike_store.bikes:
         raise HTTPException(status_code=404, detail="No bike data found")
-    return data
+
+    headers["ETag"] = bike_store.etag()
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=bike_store.body(), media_type="application/json", headers=headers
+    )
+
+
+@router.get("/leaderboard", tags=["Bike Data"], response_model=Dict[str, Any])
+async def get_leaderboard(
+    offset: int = Query(0, ge=0, description="Places to skip"),
+    limit: int = Query(10, ge=1, le=200, description="Places to return"),
+):
+    """
+    The bikes ranked by trip distance, furthest first, one page at a time.
+
+    The order is kept up to date as bikes report, so a page is a slice of it
+    rather than a sort of every bike.
+    """
+    await refresh_bike_state()
+    return JSONResponse(
+        bike_store.leaderboard(offset, limit),
+        headers={"X-Bikes-Version": str(bike_store.version)},
+    )
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+from backend.routes.bike_websocket import hub
+import asyncio
+import json
+import logging
+import os
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Comment lines keep idle connections open through proxies
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", 15))
+# Reconnect delay suggested to the browser, in milliseconds
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", 2000))
+
+
+def format_event(event_id: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"id: {event_id}\ndata: {payload}\n\n"
+
+
+@router.get("/events/{room}", tags=["Live Data"])
+async def stream_events(
+    room: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Stream live updates for a room (an equipment_id) as Server-Sent Events.
+
+    Browsers reconnect automatically and send the `Last-Event-ID` header; the
+    events buffered since that ID are replayed before the live stream resumes.
+    """
+    subscription, backlog = hub.subscribe(room, last_event_id)
+    logger.info(f"SSE connection established for room: {room}")
+
+    async def event_stream():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            for event_id, data in backlog:
+                yield format_event(event_id, data)
+            while not await request.is_disconnected():
+                try:
+                    event_id, data = await asyncio.wait_for(
+                        subscription.get(), timeout=SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event_id, data)
+        finally:
+            hub.unsubscribe(subscription)
+            logger.info(f"SSE connection closed for room: {room}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
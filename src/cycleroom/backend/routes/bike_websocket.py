@@ -1,63 +1,100 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import Dict, Any
+from backend.utils.backplane import create_backplane
+from backend.utils.fanout import FanoutHub, Subscription, event_time_ms
+from backend.utils.bike_state import bike_store
 import logging
 import asyncio
-import weakref
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-active_connections: Dict[str, weakref.WeakSet] = {}
+# Viewers connected to this worker only; other workers are reached through
+# the backplane, which hands every message back to deliver_local().
+hub = FanoutHub()
+backplane = create_backplane()
 
-async def connect(websocket: WebSocket, equipment_id: str):
+# Room carrying live metric updates for every bike, keyed like /bikes
+BIKES_ROOM = "bikes"
+
+
+async def connect(websocket: WebSocket, equipment_id: str) -> Subscription:
     await websocket.accept()
-    if equipment_id not in active_connections:
-        active_connections[equipment_id] = weakref.WeakSet()
-    active_connections[equipment_id].add(websocket)
+    subscription, _ = hub.subscribe(equipment_id)
     logger.info(f"WebSocket connection established for equipment_id: {equipment_id}")
+    return subscription
+
+
+async def disconnect(subscription: Subscription):
+    hub.unsubscribe(subscription)
+    logger.info(f"WebSocket connection closed for equipment_id: {subscription.room}")
 
-async def disconnect(websocket: WebSocket, equipment_id: str):
-    if equipment_id in active_connections:
-        active_connections[equipment_id].remove(websocket)
-        if not active_connections[equipment_id]:
-            del active_connections[equipment_id]
-        logger.info(f"WebSocket connection closed for equipment_id: {equipment_id}")
 
 async def broadcast_ws(data: Dict[str, Any]):
     """
-    Broadcasts data to all active WebSocket clients for a given equipment_id.
+    Publishes data to the WebSocket clients of a given equipment_id on every worker.
 
     Args:
-        data (Dict[str, Any]): A dictionary containing the data to be broadcasted. 
-                               Expected keys are "equipment_id", "power", "gear", 
-                               "distance", "cadence", "heart_rate", "caloric_burn", 
+        data (Dict[str, Any]): A dictionary containing the data to be broadcasted.
+                               Expected keys are "equipment_id", "power", "gear",
+                               "distance", "cadence", "heart_rate", "caloric_burn",
                                and "timestamp".
     """
     equipment_id = str(data.get("equipment_id"))
-    if equipment_id in active_connections:
-        logger.info(f"Sending data to WebSocket clients for equipment_id: {equipment_id}")
-        try:
-            await asyncio.gather(
-                *[
-                    websocket.send_json(data)
-                    for websocket in active_connections[equipment_id]
-                ]
-            )
-            logger.info(f"Data sent to WebSocket clients for equipment_id: {equipment_id}")
-            return {"status": "success"}
-        except Exception as e:
-            logger.error(f"Error sending data to WebSocket clients for equipment_id: {equipment_id}: {e}")
-            return {"status": "error", "message": str(e)}
-    else:
-        logger.warning(f"No active WebSocket connections for equipment_id: {equipment_id}")
-        return {"status": "no active connections"}
+    try:
+        await backplane.publish(equipment_id, data)
+        return {"status": "success"}
+    except Exception as e:
+        logger.error(f"Error publishing data for equipment_id: {equipment_id}: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+async def publish_bike_updates(bikes: Dict[str, Dict[str, Any]]):
+    """Publishes live metrics for several bikes to the bikes room on every worker."""
+    await backplane.publish(BIKES_ROOM, {"bikes": bikes})
+
+
+async def deliver_local(equipment_id: str, event_id: str, data: Dict[str, Any]):
+    """
+    Queues a backplane message for the WebSocket and SSE viewers on this worker.
+    """
+    if equipment_id == BIKES_ROOM:
+        # Keep /bikes current on every worker and only forward real changes.
+        # Versions follow the event ID so every worker hands out the same ones.
+        changed = bike_store.apply_live(data.get("bikes", {}), event_time_ms(event_id))
+        if not changed:
+            return
+        data = {"version": bike_store.version, "bikes": changed}
+    viewers = hub.publish(equipment_id, event_id, data)
+    logger.debug(
+        f"Queued event {event_id} for {viewers} viewers of equipment_id: {equipment_id}"
+    )
+
+
+backplane.set_handler(deliver_local)
+
+
+async def send_events(websocket: WebSocket, subscription: Subscription):
+    """Drain a viewer's queue so a slow socket never blocks the broadcaster."""
+    try:
+        while True:
+            _, data = await subscription.get()
+            await websocket.send_json(data)
+    except Exception as e:
+        logger.debug(
+            f"Stopped sending to WebSocket for equipment_id: {subscription.room}: {e}"
+        )
+
 
 @router.websocket("/ws/{equipment_id}")
 async def websocket_endpoint(websocket: WebSocket, equipment_id: str):
-    await connect(websocket, equipment_id)
+    subscription = await connect(websocket, equipment_id)
+    sender = asyncio.create_task(send_events(websocket, subscription))
     try:
         while True:
             await websocket.receive_text()  # Keep the connection alive
     except WebSocketDisconnect:
-        await disconnect(websocket, equipment_id)
-
+        pass
+    finally:
+        sender.cancel()
+        await disconnect(subscription)
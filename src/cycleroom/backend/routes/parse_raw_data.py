@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Dict
-from backend.utils.influx_writer import write_broadcast_data
+from typing import Dict, List, Optional
+from backend.utils.influx_writer import write_broadcast_data, write_broadcast_batch
+from backend.routes.bike_websocket import publish_bike_updates
+from backend.ble_merge import AdvertisementMerger
 import binascii
 import logging
 
@@ -49,9 +52,10 @@ class Parser:
         broadcast.uuid = address
         broadcast.rssi = rssi
 
-        logger.info(f"Parsing BLE data for address: {address}")
-        logger.info(f"Advertising data: {advertising_data.hex()}")
-        logger.info(f"RSSI: {rssi}")
+        # Lazy formatting: this runs for every packet of every batch
+        logger.debug("Parsing BLE data for address: %s", address)
+        logger.debug("Advertising data: %s", advertising_data)
+        logger.debug("RSSI: %s", rssi)
 
         if len(advertising_data) < 4 or len(advertising_data) > 19:
             logger.warning("Invalid advertising data length")
@@ -66,7 +70,11 @@ class Parser:
         broadcast.build_minor = Parser.build_value_convert(advertising_data[index])
         index += 1
 
-        logger.info(f"Build major: {broadcast.build_major}, Build minor: {broadcast.build_minor}")
+        logger.debug(
+            "Build major: %s, Build minor: %s",
+            broadcast.build_major,
+            broadcast.build_minor,
+        )
 
         if broadcast.build_major == 6 and len(advertising_data) > index + 13:
             broadcast.interval = advertising_data[index]
@@ -99,7 +107,7 @@ class Parser:
 
             broadcast.is_valid = True
 
-        logger.info(f"Parsed broadcast: {broadcast.__dict__}")
+        logger.debug("Parsed broadcast: %s", broadcast.__dict__)
         return broadcast
 
     @staticmethod
@@ -142,3 +150,82 @@ def receive_ble_data(payload: BLEPayload):
         raise HTTPException(status_code=500, detail=f"InfluxDB write failed: {error}")
 
     return {"status": "success"}
+
+
+class RawPacket(BaseModel):
+    address: str
+    rssi: int = 0
+    ts: float  # Receive time, seconds since the epoch
+    data: str  # Manufacturer data as hex
+    source: Optional[str] = None  # Adapter that heard the packet
+
+class RawPacketBatch(BaseModel):
+    source: Optional[str] = None
+    packets: List[RawPacket]
+
+
+def live_metrics(parsed: Broadcast) -> Dict:
+    """The per-bike fields served by /bikes."""
+    return {
+        "cadence_rpm": parsed.cadence,
+        "gear": parsed.gear,
+        "power_watts": parsed.power,
+        "time_seconds": parsed.time,
+        "trip_miles": parsed.trip,
+    }
+
+
+# Several scanner hosts can hear the same bike; keep one copy of each payload
+host_merger = AdvertisementMerger(emit=lambda *packet: None)
+
+
+@router.post("/parse_raw_data/batch")
+async def receive_ble_batch(batch: RawPacketBatch):
+    """
+    Parse a batch of raw advertisements from a scanner, store them with one
+    InfluxDB write and push the latest metrics of each bike to live viewers.
+
+    Payloads another scanner host already delivered are dropped.
+    """
+    records = []
+    latest = {}
+    rejected = 0
+    duplicates = 0
+    for packet in batch.packets:
+        source = f"{batch.source}/{packet.source}" if packet.source else batch.source
+        if not host_merger.offer(
+            source or "unknown", packet.address, packet.rssi, packet.ts, packet.data
+        ):
+            duplicates += 1
+            continue
+        try:
+            raw_bytes = binascii.unhexlify(packet.data)
+        except binascii.Error:
+            rejected += 1
+            continue
+        parsed = Parser.parse(packet.address, raw_bytes, rssi=packet.rssi)
+        if not parsed.is_valid:
+            rejected += 1
+            continue
+        records.append((parsed, int(packet.ts * 1000)))
+        latest[str(parsed.id)] = live_metrics(parsed)
+
+    if records:
+        success, error = await run_in_threadpool(write_broadcast_batch, records)
+        if not success:
+            raise HTTPException(
+                status_code=500, detail=f"InfluxDB write failed: {error}"
+            )
+        await publish_bike_updates(latest)
+
+    if rejected:
+        logger.warning(
+            f"⚠️ Rejected {rejected} of {len(batch.packets)} packets "
+            f"from {batch.source}"
+        )
+    return {
+        "status": "success",
+        "accepted": len(records),
+        "rejected": rejected,
+        "duplicates": duplicates,
+    }
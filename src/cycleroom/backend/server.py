@@ -24,19 +24,29 @@ logger = logging.getLogger(__name__)
 # Set environment variables before importing other modules
 set_env_variables()
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from backend.routes.bike_data import router as bike_data_router
 from backend.routes.historical_data import router as historical_data_router
-from backend.routes.bike_websocket import router as bike_websocket_router
+from backend.routes.bike_websocket import router as bike_websocket_router, backplane
+from backend.routes.bike_events import router as bike_events_router
 from backend.routes.session_data import router as session_router
 from backend.routes.parse_raw_data import router as parse_raw_data_router
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Join the broadcast backplane so every worker sees every live update
+    await backplane.start()
+    yield
+    await backplane.stop()
+
 # FastAPI App Initialization
 app = FastAPI(
     title="CycleRoom API",
     description="API for real-time and historical bike race data",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Register Modular Routers
@@ -44,6 +54,7 @@ app.include_router(bike_data_router)
 app.include_router(historical_data_router)
 app.include_router(session_router)
 app.include_router(bike_websocket_router)
+app.include_router(bike_events_router)
 app.include_router(parse_raw_data_router)
 
 @app.get("/", tags=["Root"])
@@ -0,0 +1,11 @@
+from typing import NamedTuple
+
+
+class Advertisement(NamedTuple):
+    """One Keiser advertisement as received: who, how loud, when, what."""
+
+    address: str
+    rssi: int
+    ts: float  # Receive time, seconds since the epoch
+    payload: bytes  # Manufacturer data
+    source: str = ""  # Adapter or capture the packet came from
@@ -0,0 +1,304 @@
+"""
+Broadcast backplane shared by every server worker.
+
+Live updates are published to the backplane instead of being written straight
+to the sockets of the current process. Each worker subscribes to the backplane
+and hands every message it receives to its own local viewers, so a POST
+handled by one worker reaches clients connected to any other worker or host.
+
+The implementation is picked with ``BACKPLANE_URL``:
+
+    memory://                                  single process (default)
+    unix:///tmp/cycleroom-backplane.sock       all workers on one host
+    tcp://broker-host:9100                     several hosts
+
+With ``unix://`` the first worker to start becomes the broker and the others
+connect to it; when the broker exits another worker takes over. ``tcp://``
+needs a standalone broker:
+
+    python -m backend.utils.backplane tcp://0.0.0.0:9100
+"""
+
+import abc
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from urllib.parse import urlparse
+from backend.utils.fanout import new_event_id
+
+logger = logging.getLogger(__name__)
+
+BACKPLANE_URL = os.getenv("BACKPLANE_URL", "memory://")
+
+# Drop a broker peer once this many bytes are queued for it
+MAX_PEER_BUFFER = 4 * 1024 * 1024
+# Largest single frame a client will accept
+MAX_FRAME_SIZE = 1024 * 1024
+RECONNECT_DELAY = 1.0
+
+Handler = Callable[[str, str, Dict[str, Any]], Awaitable[None]]
+
+
+def encode_frame(room: str, event_id: str, data: Dict[str, Any]) -> bytes:
+    """Encode one backplane message as a newline-terminated JSON frame."""
+    return (
+        json.dumps(
+            {"room": room, "id": event_id, "data": data},
+            separators=(",", ":"),
+            default=str,
+        )
+        + "\n"
+    ).encode()
+
+
+def decode_frame(line: bytes):
+    """Decode a frame produced by ``encode_frame`` into ``(room, id, data)``."""
+    message = json.loads(line)
+    return message["room"], message["id"], message["data"]
+
+
+class Backplane(abc.ABC):
+    """Base class: publish room messages and deliver them to a local handler."""
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+
+    def set_handler(self, handler: Handler):
+        """Register the coroutine that delivers messages to local clients."""
+        self._handler = handler
+
+    async def start(self):
+        """Connect; backplanes with nothing to connect keep this no-op."""
+
+    async def stop(self):
+        """Disconnect; backplanes with nothing to connect keep this no-op."""
+
+    @abc.abstractmethod
+    async def publish(
+        self, room: str, data: Dict[str, Any], event_id: Optional[str] = None
+    ):
+        """Send ``data`` to ``room`` on every worker, stamped with an event ID."""
+
+    async def _deliver(self, room: str, event_id: str, data: Dict[str, Any]):
+        if self._handler is None:
+            return
+        try:
+            await self._handler(room, event_id, data)
+        except Exception as e:
+            logger.error(f"❌ Error delivering backplane message for room {room}: {e}")
+
+
+class InProcessBackplane(Backplane):
+    """Delivers every message straight back to the publishing process."""
+
+    async def publish(
+        self, room: str, data: Dict[str, Any], event_id: Optional[str] = None
+    ):
+        await self._deliver(room, event_id or new_event_id(), data)
+
+
+class SocketBackplane(Backplane):
+    """
+    Relays messages through a small broker over a Unix domain or TCP socket.
+
+    Every worker, including the one hosting the broker, is a client of the
+    broker and receives its own messages back, so all workers see the same
+    message order. While the broker is unreachable messages are delivered
+    locally so the publishing worker's own viewers keep receiving updates.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        parsed = urlparse(url)
+        if parsed.scheme not in ("unix", "tcp"):
+            raise ValueError(f"Unsupported backplane URL: {url}")
+        self.scheme = parsed.scheme
+        self.path = parsed.path
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._broker: Optional["BackplaneBroker"] = None
+        self._lock_fd: Optional[int] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        if self._broker:
+            await self._broker.stop()
+            self._broker = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def publish(
+        self, room: str, data: Dict[str, Any], event_id: Optional[str] = None
+    ):
+        event_id = event_id or new_event_id()
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            await self._deliver(room, event_id, data)
+            return
+        try:
+            writer.write(encode_frame(room, event_id, data))
+            await writer.drain()
+        except (ConnectionError, RuntimeError) as e:
+            logger.warning(f"⚠️ Backplane publish failed, delivering locally: {e}")
+            await self._deliver(room, event_id, data)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._maybe_become_broker()
+                reader, writer = await self._connect()
+            except (ConnectionError, FileNotFoundError, OSError) as e:
+                logger.debug(f"Backplane broker not reachable: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            self._writer = writer
+            logger.info(f"✅ Connected to backplane broker ({self.scheme})")
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    try:
+                        room, event_id, data = decode_frame(line)
+                    except (ValueError, KeyError) as e:
+                        logger.warning(f"⚠️ Dropping malformed backplane frame: {e}")
+                        continue
+                    await self._deliver(room, event_id, data)
+            except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+                logger.warning(f"⚠️ Backplane connection lost: {e}")
+            finally:
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _connect(self):
+        if self.scheme == "unix":
+            return await asyncio.open_unix_connection(self.path, limit=MAX_FRAME_SIZE)
+        return await asyncio.open_connection(self.host, self.port, limit=MAX_FRAME_SIZE)
+
+    async def _maybe_become_broker(self):
+        """Host the broker if no other worker on this machine does."""
+        if self.scheme != "unix" or self._broker is not None:
+            return
+        if self._lock_fd is None:
+            fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return
+            self._lock_fd = fd
+        # Holding the lock means any existing socket file is stale
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._broker = BackplaneBroker()
+        await self._broker.start_unix(self.path)
+        logger.info(f"📡 Hosting backplane broker at {self.path}")
+
+
+class BackplaneBroker:
+    """Fans every frame received from one peer out to all connected peers."""
+
+    def __init__(self):
+        self.peers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start_unix(self, path: str):
+        self._server = await asyncio.start_unix_server(
+            self._serve_peer, path, limit=MAX_FRAME_SIZE
+        )
+
+    async def start_tcp(self, host: str, port: int):
+        self._server = await asyncio.start_server(
+            self._serve_peer, host, port, limit=MAX_FRAME_SIZE
+        )
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for peer in list(self.peers):
+            peer.close()
+        self.peers.clear()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def _serve_peer(self, reader, writer):
+        self.peers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._relay(line)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.warning(f"⚠️ Backplane peer dropped: {e}")
+        finally:
+            self.peers.discard(writer)
+            writer.close()
+
+    def _relay(self, frame: bytes):
+        for peer in list(self.peers):
+            if peer.is_closing():
+                self.peers.discard(peer)
+                continue
+            # A stalled peer must not hold up everyone else
+            if peer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+                logger.warning("⚠️ Disconnecting slow backplane peer")
+                self.peers.discard(peer)
+                peer.close()
+                continue
+            peer.write(frame)
+
+
+def create_backplane(url: str = BACKPLANE_URL) -> Backplane:
+    """Build the backplane selected by ``url``."""
+    if url.startswith("memory://"):
+        return InProcessBackplane()
+    return SocketBackplane(url)
+
+
+async def run_broker(url: str):
+    """Run a standalone broker until cancelled."""
+    parsed = urlparse(url)
+    broker = BackplaneBroker()
+    if parsed.scheme == "unix":
+        if os.path.exists(parsed.path):
+            os.unlink(parsed.path)
+        await broker.start_unix(parsed.path)
+    elif parsed.scheme == "tcp":
+        await broker.start_tcp(parsed.hostname, parsed.port)
+    else:
+        raise ValueError(f"Unsupported backplane URL: {url}")
+    logger.info(f"📡 Backplane broker listening on {url}")
+    await broker.serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(run_broker(sys.argv[1] if len(sys.argv) > 1 else BACKPLANE_URL))
@@ -0,0 +1,159 @@
+"""
+Versioned, in-memory copy of the latest metrics for every bike.
+
+Every change bumps the store version and records it against the bike, so
+pollers can ask for only the bikes that changed after a version they already
+hold. Versions are millisecond timestamps that only move forward, which keeps
+them meaningful across restarts.
+
+Live updates reach every worker through the backplane in the same order and
+take their version from the message's event ID, the publisher's clock, so all
+workers agree on them and a client may send ``since`` to any worker. Versions
+of InfluxDB snapshots, used only while no live updates arrive, come from the
+local clock and are not shared: with several workers and no live ingest a
+client should poll with ``If-None-Match``, whose content-hash ETag every
+worker agrees on.
+
+The full JSON body and its ETag are built once per version and reused for
+every poll until the data changes again, and the leaderboard order is kept
+up to date bike by bike in a ``Ranking``.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from backend.utils.ranking import Ranking, score_of
+
+Metrics = Dict[str, Any]
+
+# Seconds after the last live update during which InfluxDB snapshots are ignored
+LIVE_DATA_TIMEOUT = float(os.getenv("LIVE_DATA_TIMEOUT", 10))
+
+
+class BikeStateStore:
+    def __init__(self):
+        self.version = 0
+        self.bikes: Dict[str, Metrics] = {}
+        self.bike_versions: Dict[str, int] = {}
+        # Removed bikes and the version they disappeared at
+        self.removed: Dict[str, int] = {}
+        self.ranking = Ranking()  # Bikes by trip distance, furthest first
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._live_until = 0.0
+
+    def _next_version(self, clock_ms: Optional[int] = None) -> int:
+        if clock_ms is None:
+            clock_ms = int(time.time() * 1000)
+        self.version = max(self.version + 1, clock_ms)
+        self._body = None
+        self._etag = None
+        return self.version
+
+    def update(
+        self, bike_id: str, metrics: Metrics, clock_ms: Optional[int] = None
+    ) -> bool:
+        """Merge new metrics for one bike; returns True if anything changed."""
+        current = self.bikes.get(bike_id)
+        merged = {**current, **metrics} if current else dict(metrics)
+        if merged == current:
+            return False
+        version = self._next_version(clock_ms)
+        self.bikes[bike_id] = merged
+        self.bike_versions[bike_id] = version
+        self.removed.pop(bike_id, None)
+        self.ranking.update(bike_id, score_of(merged))
+        return True
+
+    def apply_live(
+        self, bikes: Dict[str, Metrics], clock_ms: Optional[int] = None
+    ) -> Dict[str, Metrics]:
+        """
+        Merge metrics pushed by the ingest path; returns the bikes that changed.
+
+        ``clock_ms`` is the message's publish time, so every worker applying
+        the same messages in the same order ends up with the same versions.
+        While live updates keep arriving they are fresher than anything the
+        InfluxDB query returns, so ``is_live`` tells callers to skip it.
+        """
+        self._live_until = time.monotonic() + LIVE_DATA_TIMEOUT
+        return {
+            bike_id: self.bikes[bike_id]
+            for bike_id, metrics in bikes.items()
+            if self.update(bike_id, metrics, clock_ms)
+        }
+
+    def is_live(self) -> bool:
+        return time.monotonic() < self._live_until
+
+    def apply_snapshot(self, latest: Dict[str, Metrics]) -> List[str]:
+        """
+        Replace the store contents with a full snapshot.
+
+        Returns the IDs of the bikes that changed, appeared or disappeared.
+        """
+        changed = [
+            bike_id
+            for bike_id, metrics in latest.items()
+            if self.bikes.get(bike_id) != metrics
+        ]
+        gone = [bike_id for bike_id in self.bikes if bike_id not in latest]
+        if not changed and not gone:
+            return []
+
+        version = self._next_version()
+        for bike_id in changed:
+            self.bikes[bike_id] = dict(latest[bike_id])
+            self.bike_versions[bike_id] = version
+            self.removed.pop(bike_id, None)
+            self.ranking.update(bike_id, score_of(self.bikes[bike_id]))
+        for bike_id in gone:
+            del self.bikes[bike_id]
+            del self.bike_versions[bike_id]
+            self.removed[bike_id] = version
+            self.ranking.remove(bike_id)
+        return changed + gone
+
+    def changed_since(self, since: int) -> Tuple[Dict[str, Metrics], List[str]]:
+        """Bikes updated and bike IDs removed after version ``since``."""
+        bikes = {
+            bike_id: self.bikes[bike_id]
+            for bike_id, version in self.bike_versions.items()
+            if version > since
+        }
+        removed = [
+            bike_id for bike_id, version in self.removed.items() if version > since
+        ]
+        return bikes, removed
+
+    def leaderboard(self, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
+        """One page of the standings, with each bike's place and metrics."""
+        return {
+            "version": self.version,
+            "total": len(self.ranking),
+            "bikes": [
+                {"rank": offset + i + 1, "bike_id": bike_id, **self.bikes[bike_id]}
+                for i, (bike_id, _) in enumerate(self.ranking.page(offset, limit))
+            ],
+        }
+
+    def body(self) -> bytes:
+        """The full snapshot as JSON, serialized once per version."""
+        if self._body is None:
+            self._body = json.dumps(
+                self.bikes, separators=(",", ":"), default=str
+            ).encode()
+        return self._body
+
+    def etag(self) -> str:
+        """A content hash, so workers holding the same data agree on it."""
+        if self._etag is None:
+            digest = hashlib.blake2b(self.body(), digest_size=12).hexdigest()
+            self._etag = f'"{digest}"'
+        return self._etag
+
+
+# Shared by the /bikes route and the ingest endpoints of this worker
+bike_store = BikeStateStore()
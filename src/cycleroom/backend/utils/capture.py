@@ -0,0 +1,451 @@
+"""
+Binary capture files of raw BLE advertisements.
+
+A capture holds fixed-size records sorted by receive time, plus the indexes
+needed to find a time range or one bike without reading the rest:
+
+    header          64 bytes: magic, format version, counts and section offsets
+    records         RECORD_DTYPE, 32 bytes each, sorted by ts
+    time index      float64 ts of every ``stride``-th record
+    address index   uint64 offsets (address count + 1) into the positions that
+                    follow: uint32 record numbers grouped by address
+    addresses       UTF-8 address strings, one per line; ``record["address"]``
+                    is the line number
+
+``Capture`` maps the file with mmap, so opening is instant whatever its size
+and records are NumPy views of the mapping: a time slice copies nothing and
+only the pages it touches are ever read.
+
+    python -m backend.utils.capture convert ride.json ride2.csv ride.cap
+    python -m backend.utils.capture info ride.cap
+
+Payloads longer than PAYLOAD_SIZE bytes are not Keiser packets and are never
+stored.
+"""
+
+import argparse
+import logging
+import mmap
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from backend.utils.advertisement import Advertisement
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CYCAPTUR"
+FORMAT_VERSION = 2
+PAYLOAD_SIZE = 20
+TIME_INDEX_STRIDE = 1024
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("ts", "<f8"),  # Receive time, seconds
+        ("address", "<u2"),  # Index into the address table
+        ("rssi", "i1"),
+        ("length", "u1"),  # Bytes of payload in use
+        ("payload", "u1", (PAYLOAD_SIZE,)),
+    ]
+)
+
+# magic, version, record size, address count, record count, the offsets of the
+# records, time index, address index and address sections, time index stride
+HEADER = struct.Struct("<8sHHIQQQQQI")
+HEADER_SIZE = 64
+# Version 1 captures had no indexes: magic, version, record size, address
+# count, record count, records offset, addresses offset
+HEADER_V1 = struct.Struct("<8sHHIQQQ")
+
+
+class CaptureError(ValueError):
+    pass
+
+
+def empty_records(count: int) -> np.ndarray:
+    return np.zeros(count, dtype=RECORD_DTYPE)
+
+
+def record_payload(record) -> bytes:
+    return record["payload"][: record["length"]].tobytes()
+
+
+def records_from_advertisements(
+    packets: Iterable[Advertisement],
+) -> Tuple[np.ndarray, List[str]]:
+    """Pack advertisements into records and an address table, sorted by ts."""
+    packets = [p for p in packets if len(p.payload) <= PAYLOAD_SIZE]
+    address_ids: Dict[str, int] = {}
+    records = empty_records(len(packets))
+    for record, packet in zip(records, packets):
+        record["ts"] = packet.ts
+        record["address"] = address_ids.setdefault(packet.address, len(address_ids))
+        record["rssi"] = max(-128, min(127, packet.rssi))
+        record["length"] = len(packet.payload)
+        record["payload"][: len(packet.payload)] = np.frombuffer(
+            packet.payload, dtype=np.uint8
+        )
+    records = records[np.argsort(records["ts"], kind="stable")]
+    return records, list(address_ids)
+
+
+def _index_sections(
+    records: np.ndarray, address_count: int, stride: int
+) -> List[np.ndarray]:
+    """The time index and address index of records sorted by ts."""
+    time_index = records["ts"][::stride].astype("<f8")  # A copy, never a view
+    counts = np.bincount(records["address"], minlength=address_count)
+    address_offsets = np.concatenate(([0], np.cumsum(counts))).astype("<u8")
+    positions = np.argsort(records["address"], kind="stable").astype("<u4")
+    return [time_index, address_offsets, positions]
+
+
+def _pack_header(
+    record_count: int, address_count: int, stride: int, sections: List[np.ndarray]
+) -> bytes:
+    records_offset = HEADER_SIZE
+    time_index_offset = records_offset + record_count * RECORD_DTYPE.itemsize
+    address_index_offset = time_index_offset + sections[0].nbytes
+    addresses_offset = address_index_offset + sections[1].nbytes + sections[2].nbytes
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        RECORD_DTYPE.itemsize,
+        address_count,
+        record_count,
+        records_offset,
+        time_index_offset,
+        address_index_offset,
+        addresses_offset,
+        stride,
+    )
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def write_capture(
+    path: str,
+    records: np.ndarray,
+    addresses: List[str],
+    stride: int = TIME_INDEX_STRIDE,
+):
+    """Write ``records`` (RECORD_DTYPE), their address table and the indexes."""
+    if records.dtype != RECORD_DTYPE:
+        raise CaptureError("Records must use RECORD_DTYPE")
+    if len(addresses) > 0xFFFF:
+        raise CaptureError("A capture holds at most 65535 addresses")
+    if len(records) and np.any(np.diff(records["ts"]) < 0):
+        records = records[np.argsort(records["ts"], kind="stable")]
+
+    sections = _index_sections(records, len(addresses), stride)
+    with open(path, "wb") as file:
+        file.write(_pack_header(len(records), len(addresses), stride, sections))
+        for section in [records] + sections:
+            file.write(section.tobytes())
+        file.write("\n".join(addresses).encode())
+
+
+class CaptureWriter:
+    """
+    Writes a capture one advertisement at a time, for inputs too big to hold.
+
+    Records go to the file in blocks as they arrive; on close they are sorted
+    by time if needed and indexed through a memory map of the file.
+    """
+
+    def __init__(
+        self, path: str, stride: int = TIME_INDEX_STRIDE, block_size: int = 4096
+    ):
+        self.path = path
+        self.stride = stride
+        self.file = open(path, "w+b")
+        self.file.write(b"\0" * HEADER_SIZE)
+        self.address_ids: Dict[str, int] = {}
+        self.count = 0
+        self.skipped = 0
+        self._block = empty_records(block_size)
+        self._used = 0
+
+    def write(self, packet: Advertisement) -> bool:
+        """Append one packet; returns False if it cannot be stored."""
+        length = len(packet.payload)
+        if length > PAYLOAD_SIZE:
+            self.skipped += 1
+            return False
+        address_id = self.address_ids.get(packet.address)
+        if address_id is None:
+            if len(self.address_ids) > 0xFFFF:
+                raise CaptureError("A capture holds at most 65535 addresses")
+            address_id = self.address_ids[packet.address] = len(self.address_ids)
+        record = self._block[self._used]
+        record["ts"] = packet.ts
+        record["address"] = address_id
+        record["rssi"] = max(-128, min(127, packet.rssi))
+        record["length"] = length
+        record["payload"][:length] = np.frombuffer(packet.payload, dtype=np.uint8)
+        record["payload"][length:] = 0
+        self._used += 1
+        self.count += 1
+        if self._used == len(self._block):
+            self._flush()
+        return True
+
+    def _flush(self):
+        self.file.write(self._block[: self._used].tobytes())
+        self._used = 0
+
+    def close(self):
+        self._flush()
+        self.file.flush()
+        addresses = list(self.address_ids)
+        if self.count:
+            with mmap.mmap(self.file.fileno(), 0) as mapped:
+                records = np.frombuffer(
+                    mapped, RECORD_DTYPE, count=self.count, offset=HEADER_SIZE
+                )
+                if np.any(np.diff(records["ts"]) < 0):
+                    records[:] = records[np.argsort(records["ts"], kind="stable")]
+                sections = _index_sections(records, len(addresses), self.stride)
+                del records
+        else:
+            sections = _index_sections(empty_records(0), 0, self.stride)
+        self.file.seek(0, 2)
+        for section in sections:
+            self.file.write(section.tobytes())
+        self.file.write("\n".join(addresses).encode())
+        self.file.seek(0)
+        self.file.write(_pack_header(self.count, len(addresses), self.stride, sections))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Capture:
+    """
+    A memory-mapped capture file.
+
+    ``records`` is a zero-copy view of every record. ``between`` slices it by
+    time through the time index, touching a few pages however long the
+    capture is; ``for_address`` gathers one bike's records.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            try:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise CaptureError(f"Not a capture file: {path}")
+        try:
+            self._load()
+        except Exception:
+            self._map.close()
+            raise
+
+    def _load(self):
+        if len(self._map) < HEADER_SIZE:
+            raise CaptureError(f"Not a capture file: {self.path}")
+        magic, version, record_size = HEADER_V1.unpack_from(self._map)[:3]
+        if magic != MAGIC:
+            raise CaptureError(f"Not a capture file: {self.path}")
+        if version not in (1, FORMAT_VERSION) or record_size != RECORD_DTYPE.itemsize:
+            raise CaptureError(f"Unsupported capture format version {version}")
+        if version == 1:
+            self._load_v1()
+            return
+        (
+            *_,
+            address_count,
+            record_count,
+            records_offset,
+            time_index_offset,
+            address_index_offset,
+            addresses_offset,
+            self.stride,
+        ) = HEADER.unpack_from(self._map)
+
+        self.records = np.frombuffer(
+            self._map, RECORD_DTYPE, count=record_count, offset=records_offset
+        )
+        self._time_index = np.frombuffer(
+            self._map,
+            "<f8",
+            count=-(-record_count // self.stride),
+            offset=time_index_offset,
+        )
+        self._address_offsets = np.frombuffer(
+            self._map, "<u8", count=address_count + 1, offset=address_index_offset
+        )
+        self._positions = np.frombuffer(
+            self._map,
+            "<u4",
+            count=record_count,
+            offset=address_index_offset + self._address_offsets.nbytes,
+        )
+        self._load_addresses(address_count, addresses_offset)
+
+    def _load_v1(self):
+        """
+        Open a version 1 capture, written before the file carried indexes.
+        The records are still mapped; the indexes are built in memory, which
+        reads the whole file. ``convert old.cap new.cap`` upgrades it.
+        """
+        logger.warning(
+            f"⚠️ {self.path} is a version 1 capture without indexes; "
+            "convert it to open it without reading every record"
+        )
+        (
+            *_,
+            address_count,
+            record_count,
+            records_offset,
+            addresses_offset,
+        ) = HEADER_V1.unpack_from(self._map)
+        self.records = np.frombuffer(
+            self._map, RECORD_DTYPE, count=record_count, offset=records_offset
+        )
+        self.stride = TIME_INDEX_STRIDE
+        (
+            self._time_index,
+            self._address_offsets,
+            self._positions,
+        ) = _index_sections(self.records, address_count, self.stride)
+        self._load_addresses(address_count, addresses_offset)
+
+    def _load_addresses(self, address_count: int, addresses_offset: int):
+        table = self._map[addresses_offset:].decode()
+        self.addresses: List[str] = table.split("\n") if address_count else []
+        self._address_ids = {address: i for i, address in enumerate(self.addresses)}
+
+    def close(self):
+        self.records = self._time_index = None
+        self._address_offsets = self._positions = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Slices handed out are still alive; the mapping goes with them
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def time_range(self) -> Tuple[float, float]:
+        if not len(self.records):
+            return 0.0, 0.0
+        return float(self.records[0]["ts"]), float(self.records[-1]["ts"])
+
+    def position(self, ts: float) -> int:
+        """Number of the first record received at or after ``ts``."""
+        block = int(np.searchsorted(self._time_index, ts, side="left"))
+        low = max(0, (block - 1) * self.stride)
+        high = min(len(self.records), block * self.stride)
+        return low + int(np.searchsorted(self.records["ts"][low:high], ts))
+
+    def between(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> np.ndarray:
+        """Records received in [start, end), as a view of the mapping."""
+        low = 0 if start is None else self.position(start)
+        high = len(self.records) if end is None else self.position(end)
+        return self.records[low : max(low, high)]
+
+    def for_address(
+        self,
+        address: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> np.ndarray:
+        """One address's records, optionally limited to [start, end)."""
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            return empty_records(0)
+        first, last = self._address_offsets[address_id : address_id + 2]
+        positions = self._positions[first:last]
+        if start is not None:
+            positions = positions[positions >= self.position(start)]
+        if end is not None:
+            positions = positions[positions < self.position(end)]
+        return self.records[positions]
+
+    def advertisements(
+        self, records: Optional[np.ndarray] = None, source: str = ""
+    ) -> List[Advertisement]:
+        records = self.records if records is None else records
+        return to_advertisements(records, self.addresses, source)
+
+
+def read_capture(path: str) -> Tuple[np.ndarray, List[str]]:
+    """Load a copy of every record of a capture and its address table."""
+    with Capture(path) as capture:
+        return capture.records.copy(), list(capture.addresses)
+
+
+def to_advertisements(
+    records: np.ndarray, addresses: List[str], source: str = ""
+) -> List[Advertisement]:
+    return [
+        Advertisement(
+            addresses[record["address"]],
+            int(record["rssi"]),
+            float(record["ts"]),
+            record_payload(record),
+            source,
+        )
+        for record in records
+    ]
+
+
+def convert(paths: List[str], output: str) -> int:
+    """Convert JSON/CSV recordings into one capture; returns the record count."""
+    # Imported here because the recording readers open captures as well
+    from backend.utils.recordings import (
+        iter_csv_recording,
+        iter_json_recording,
+        read_recording,
+    )
+
+    with CaptureWriter(output) as writer:
+        for path in paths:
+            if path.lower().endswith(".cap"):
+                packets = read_recording(path)
+            elif path.lower().endswith(".csv"):
+                packets = iter_csv_recording(path)
+            else:
+                packets = iter_json_recording(path)
+            for packet in packets:
+                writer.write(packet)
+    return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Work with binary BLE captures.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="JSON/CSV to a capture")
+    convert_parser.add_argument("recordings", nargs="+")
+    convert_parser.add_argument("output")
+    info_parser = commands.add_parser("info", help="Summarise a capture")
+    info_parser.add_argument("capture")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = convert(args.recordings, args.output)
+        print(f"Wrote {count} records to {args.output}")
+    else:
+        with Capture(args.capture) as capture:
+            first, last = capture.time_range()
+            print(
+                f"{len(capture)} records from {len(capture.addresses)} addresses "
+                f"over {last - first:.1f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Per-room fanout of live updates to the viewers connected to this worker.
+
+The backplane hands every message to ``FanoutHub.publish``; WebSocket and
+Server-Sent Events endpoints each hold a ``Subscription`` and drain its queue.
+Each room keeps a short ring buffer of recent events so a reconnecting client
+can resume from the last event ID it saw instead of refetching everything.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPLAY_BUFFER_SIZE = int(os.getenv("REPLAY_BUFFER_SIZE", 256))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", 256))
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def new_event_id() -> str:
+    """
+    Event IDs only need to be unique; resume is by position in the ring.
+    They are the publisher's clock in nanoseconds, see ``event_time_ms``.
+    """
+    return str(time.time_ns())
+
+
+def event_time_ms(event_id: str) -> Optional[int]:
+    """When an ID from ``new_event_id`` was issued; None for other IDs."""
+    try:
+        return int(event_id) // 1_000_000
+    except ValueError:
+        return None
+
+
+class Subscription:
+    """A bounded queue of events for one connected viewer."""
+
+    def __init__(self, room: str, queue_size: int):
+        self.room = room
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def push(self, event: Event):
+        # A slow viewer loses its oldest events rather than stalling the room
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Event:
+        return await self.queue.get()
+
+
+class Room:
+    def __init__(self, replay_size: int):
+        self.subscribers: Set[Subscription] = set()
+        self.history: Deque[Event] = deque(maxlen=replay_size)
+
+    def events_after(self, last_event_id: Optional[str]) -> List[Event]:
+        """Events newer than ``last_event_id``; all buffered events if unknown."""
+        if last_event_id is None:
+            return []
+        events = list(self.history)
+        for index in range(len(events) - 1, -1, -1):
+            if events[index][0] == last_event_id:
+                return events[index + 1 :]
+        return events
+
+
+class FanoutHub:
+    def __init__(
+        self,
+        replay_size: int = REPLAY_BUFFER_SIZE,
+        queue_size: int = SUBSCRIBER_QUEUE_SIZE,
+    ):
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self.rooms: Dict[str, Room] = {}
+
+    def _room(self, room: str) -> Room:
+        if room not in self.rooms:
+            self.rooms[room] = Room(self.replay_size)
+        return self.rooms[room]
+
+    def subscribe(
+        self, room: str, last_event_id: Optional[str] = None
+    ) -> Tuple[Subscription, List[Event]]:
+        """
+        Register a viewer for ``room``.
+
+        Returns the subscription together with the buffered events the viewer
+        missed after ``last_event_id``.
+        """
+        state = self._room(room)
+        subscription = Subscription(room, self.queue_size)
+        state.subscribers.add(subscription)
+        return subscription, state.events_after(last_event_id)
+
+    def unsubscribe(self, subscription: Subscription):
+        state = self.rooms.get(subscription.room)
+        if state is None:
+            return
+        state.subscribers.discard(subscription)
+        if subscription.dropped:
+            logger.warning(
+                f"⚠️ Viewer of room {subscription.room} dropped "
+                f"{subscription.dropped} events"
+            )
+
+    def publish(self, room: str, event_id: str, data: Dict[str, Any]) -> int:
+        """Buffer an event and queue it for every viewer; returns viewer count."""
+        state = self._room(room)
+        event = (event_id, data)
+        state.history.append(event)
+        for subscription in state.subscribers:
+            subscription.push(event)
+        return len(state.subscribers)
+
+    def connection_count(self, room: str) -> int:
+        state = self.rooms.get(room)
+        return len(state.subscribers) if state else 0
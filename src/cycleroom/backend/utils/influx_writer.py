@@ -16,7 +16,7 @@ client = InfluxDBClient(
 
 write_api = client.write_api(write_options=SYNCHRONOUS)
 
-def write_broadcast_data(device_name: str, parsed: object):
+def build_broadcast_point(parsed: object, timestamp=None):
     point = (
         Point("m3i_broadcast")
         .tag("bike_id", parsed.id)
@@ -34,9 +34,27 @@ def write_broadcast_data(device_name: str, parsed: object):
         .field("is_real_time", int(parsed.is_real_time))
         .field("speed", parsed.speed)
     )
+    if timestamp is not None:
+        point = point.time(timestamp, WritePrecision.MS)
+    return point
+
+def write_broadcast_data(device_name: str, parsed: object):
+    point = build_broadcast_point(parsed)
 
     try:
         write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=point)
         return True, None
     except Exception as e:
         return False, str(e)
+
+def write_broadcast_batch(records: list):
+    """Write (parsed, timestamp_ms) pairs to InfluxDB in a single request."""
+    points = [
+        build_broadcast_point(parsed, timestamp) for parsed, timestamp in records
+    ]
+
+    try:
+        write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=points)
+        return True, None
+    except Exception as e:
+        return False, str(e)
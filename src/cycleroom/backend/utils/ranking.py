@@ -0,0 +1,87 @@
+"""
+Incrementally maintained leaderboard order.
+
+Bikes are kept in a list sorted by score (trip distance), highest first, with
+ties broken by bike ID. An update only moves the one bike whose score changed:
+its old and new places are found by bisection, so a rank lookup is O(log n),
+a page is a slice, and nothing is re-sorted while the scores stand still.
+"""
+
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+# (negated score, bike ID): ascending order is the leaderboard order
+RankKey = Tuple[float, str]
+
+
+def score_of(metrics: dict, field: str = "trip_miles") -> float:
+    try:
+        return float(metrics.get(field) or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Ranking:
+    def __init__(self):
+        self._order: List[RankKey] = []
+        self._keys: Dict[str, RankKey] = {}
+        self.version = 0  # Bumped whenever the order or a score changes
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, bike_id: str):
+        return bike_id in self._keys
+
+    def update(self, bike_id: str, score: float) -> bool:
+        """Set one bike's score; returns True if it changed."""
+        key = (-score, bike_id)
+        old = self._keys.get(bike_id)
+        if old == key:
+            return False
+        if old is not None:
+            del self._order[bisect_left(self._order, old)]
+        insort(self._order, key)
+        self._keys[bike_id] = key
+        self.version += 1
+        return True
+
+    def remove(self, bike_id: str) -> bool:
+        old = self._keys.pop(bike_id, None)
+        if old is None:
+            return False
+        del self._order[bisect_left(self._order, old)]
+        self.version += 1
+        return True
+
+    def sync(self, bikes: Dict[str, dict], field: str = "trip_miles") -> bool:
+        """Match a full snapshot of bike metrics; returns True if anything moved."""
+        changed = False
+        for bike_id in [b for b in self._keys if b not in bikes]:
+            changed |= self.remove(bike_id)
+        for bike_id, metrics in bikes.items():
+            changed |= self.update(bike_id, score_of(metrics, field))
+        return changed
+
+    def clear(self):
+        self._order.clear()
+        self._keys.clear()
+        self.version += 1
+
+    def rank(self, bike_id: str) -> Optional[int]:
+        """1-based place of a bike, or None if it is not ranked."""
+        key = self._keys.get(bike_id)
+        if key is None:
+            return None
+        return bisect_left(self._order, key) + 1
+
+    def score(self, bike_id: str) -> Optional[float]:
+        key = self._keys.get(bike_id)
+        return None if key is None else -key[0]
+
+    def page(
+        self, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """(bike ID, score) for places ``offset + 1`` onwards, best first."""
+        end = None if limit is None else offset + limit
+        return [(bike_id, -negated) for negated, bike_id in self._order[offset:end]]
@@ -0,0 +1,222 @@
+"""
+Readers for recorded BLE captures.
+
+Two formats are in use: the phone sensor-logger JSON export read by
+``utils/send_json.py`` and ``utils/import_json.py`` (a JSON array of entries
+with ``sensor``, ``id``, ``rssi``, ``manufacturerData`` and ``time`` or
+``seconds_elapsed``) and the per-device CSV files read by
+``utils/testparse.py`` (columns ``time, seconds_elapsed, rssi, id,
+manufacturerData``). Both, and binary captures (``backend.utils.capture``),
+are turned into ``Advertisement`` records sorted by receive time.
+
+Phone exports run to gigabytes, so JSON is never loaded whole:
+``iter_json_entries`` decodes one entry at a time from a fixed-size buffer,
+and ``NdjsonWriter`` writes compact newline-delimited JSON, which the reader
+accepts as well.
+"""
+
+import binascii
+import csv
+import heapq
+import json
+import logging
+import os
+import re
+from typing import IO, Iterator, List, Optional
+from backend.utils.advertisement import Advertisement
+from backend.utils.capture import Capture, to_advertisements
+
+logger = logging.getLogger(__name__)
+
+JSON_CHUNK_SIZE = 1 << 20
+JSON_LOOKAHEAD = 64
+# Capture records turned into Advertisements at a time while streaming
+CAPTURE_CHUNK_SIZE = 4096
+_decoder = json.JSONDecoder()
+_SEPARATORS = re.compile(r"[ \t\r\n,]*")
+
+
+def iter_json_entries(file: IO[str], chunk_size: int = JSON_CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array, or the values of an NDJSON
+    stream, one at a time; memory use is bounded by the largest element.
+    """
+    buffer = ""
+    position = 0
+    eof = False
+    in_array = None  # Unknown until the first non-blank character
+
+    while True:
+        # Skip separators between values
+        position = _SEPARATORS.match(buffer, position).end()
+        if position >= len(buffer):
+            if eof:
+                return
+            buffer = file.read(chunk_size)
+            position = 0
+            eof = not buffer
+            continue
+        if in_array is None:
+            in_array = buffer[position] == "["
+            position += in_array
+            continue
+        if in_array and buffer[position] == "]":
+            return
+        if len(buffer) - position < JSON_LOOKAHEAD and not eof:
+            # Never decode a number that may continue in the next chunk
+            truncated = True
+        else:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+                truncated = end == len(buffer) and not eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                truncated = True
+        if truncated:
+            # The value runs past the end of the buffer
+            chunk = file.read(chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+            continue
+        position = end
+        yield value
+
+
+def iter_json_file(path: str) -> Iterator:
+    with open(path, "r", encoding="utf-8") as file:
+        yield from iter_json_entries(file)
+
+
+class NdjsonWriter:
+    """Writes one compact JSON value per line."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry, separators=(",", ":")))
+        self.file.write("\n")
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def entry_timestamp(entry: dict) -> Optional[float]:
+    """Receive time of a recording entry in seconds."""
+    if entry.get("time"):
+        try:
+            return int(entry["time"]) / 1e9  # Nanoseconds since the epoch
+        except ValueError:
+            pass
+    if entry.get("seconds_elapsed") not in (None, ""):
+        return float(entry["seconds_elapsed"])
+    return None
+
+
+def entry_to_advertisement(entry: dict, source: str = "") -> Optional[Advertisement]:
+    """Convert one recorded entry; None if it is not a usable BLE packet."""
+    sensor = entry.get("sensor", "")
+    if sensor and not sensor.lower().startswith("bluetooth"):
+        return None
+    data = (entry.get("manufacturerData") or "").strip()
+    ts = entry_timestamp(entry)
+    if not data or ts is None:
+        return None
+    try:
+        payload = binascii.unhexlify(data)
+    except binascii.Error:
+        logger.warning(f"⚠️ Skipping invalid manufacturer data: {data}")
+        return None
+    rssi = int(float(entry.get("rssi") or 0))
+    return Advertisement(entry.get("id", ""), rssi, ts, payload, source)
+
+
+def iter_json_recording(path: str) -> Iterator[Advertisement]:
+    """Packets of a JSON or NDJSON recording in file order, streamed."""
+    source = os.path.basename(path)
+    for entry in iter_json_file(path):
+        packet = entry_to_advertisement(entry, source)
+        if packet:
+            yield packet
+
+
+def read_json_recording(path: str) -> List[Advertisement]:
+    return sorted(iter_json_recording(path), key=lambda p: p.ts)
+
+
+def iter_csv_recording(path: str) -> Iterator[Advertisement]:
+    """Packets of a CSV recording in file order, streamed row by row."""
+    source = os.path.basename(path)
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = [column.strip() for column in next(reader, [])]
+        named = "manufacturerData" in header
+        for row in reader:
+            if named:
+                entry = dict(zip(header, row))
+            elif len(row) < 5:
+                continue
+            else:
+                # testparse.py layout
+                entry = {
+                    "time": row[0].strip(),
+                    "seconds_elapsed": row[1],
+                    "rssi": row[2],
+                    "id": row[3].strip(),
+                    "manufacturerData": row[4],
+                }
+            packet = entry_to_advertisement(entry, source)
+            if packet:
+                yield packet
+
+
+def read_csv_recording(path: str) -> List[Advertisement]:
+    return sorted(iter_csv_recording(path), key=lambda p: p.ts)
+
+
+def read_recording(path: str) -> List[Advertisement]:
+    """Read a JSON, CSV or binary capture, picked by file extension."""
+    if path.lower().endswith(".cap"):
+        with Capture(path) as capture:
+            return capture.advertisements(source=os.path.basename(path))
+    if path.lower().endswith(".csv"):
+        return read_csv_recording(path)
+    return read_json_recording(path)
+
+
+def iter_capture_recording(
+    path: str, chunk_size: int = CAPTURE_CHUNK_SIZE
+) -> Iterator[Advertisement]:
+    """Packets of a binary capture in receive-time order, a chunk at a time."""
+    source = os.path.basename(path)
+    with Capture(path) as capture:
+        for start in range(0, len(capture), chunk_size):
+            records = capture.records[start : start + chunk_size]
+            yield from to_advertisements(records, capture.addresses, source)
+
+
+def iter_sorted_recording(path: str) -> Iterator[Advertisement]:
+    """
+    Packets of one recording in receive-time order. Captures are already
+    sorted and stream from the mapping; JSON and CSV files are sorted whole.
+    """
+    if path.lower().endswith(".cap"):
+        return iter_capture_recording(path)
+    return iter(read_recording(path))
+
+
+def iter_recordings(paths: List[str]) -> Iterator[Advertisement]:
+    """All packets from several captures, merged in receive-time order."""
+    return heapq.merge(
+        *(iter_sorted_recording(path) for path in paths), key=lambda p: p.ts
+    )
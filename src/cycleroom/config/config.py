@@ -18,9 +18,27 @@ class Config:
     SCREEN_HEIGHT = int(os.getenv("SCREEN_HEIGHT", 600))
     TRACK_WIDTH = int(os.getenv("TRACK_WIDTH", 800))
     TRACK_LENGTH_MILES = float(os.getenv("TRACK_LENGTH_MILES", 3.0))
+    RACE_FPS = int(os.getenv("RACE_FPS", 30))
+    # The FastAPI server the race view reads /bikes and /events/bikes from
+    RACE_API_URL = os.getenv("RACE_API_URL", "http://127.0.0.1:8000")
+    RACE_FETCH_INTERVAL = float(os.getenv("RACE_FETCH_INTERVAL", 5))
+    # Live updates come from /events/bikes; /bikes is then only polled to
+    # catch removals, this often
+    RACE_STREAM = os.getenv("RACE_STREAM", "1") == "1"
+    RACE_RECONCILE_INTERVAL = float(os.getenv("RACE_RECONCILE_INTERVAL", 30))
+    RACE_STATS_OVERLAY = os.getenv("RACE_STATS_OVERLAY", "0") == "1"
+    # Render without a window, through SDL's dummy video driver
+    RACE_HEADLESS = os.getenv("RACE_HEADLESS", "0") == "1"
+    # Turn bike sprites to the direction of the track
+    RACE_ROTATE_SPRITES = os.getenv("RACE_ROTATE_SPRITES", "0") == "1"
+    # Frame rate of the MJPEG stream served at /stream.mjpg
+    RACE_VIDEO_FPS = float(os.getenv("RACE_VIDEO_FPS", 10))
 
     # Asset Paths
     WAYPOINTS_FILE = os.getenv("WAYPOINTS_FILE", "assets/waypoints.json")
     BIKE_ICON_PATH = os.getenv("BIKE_ICON_PATH", "assets/bike_icon.png")
     TRACK_IMAGE_PATH = os.getenv("TRACK_IMAGE_PATH", "assets/track.jpg")
+    # Waypoints, lookup table and scaled track image packed for mmap; rebuilt
+    # when the sources change. Empty to always load the sources directly.
+    COMPILED_TRACK_FILE = os.getenv("COMPILED_TRACK_FILE", "assets/track.bin")
 
@@ -0,0 +1,216 @@
+"""
+Frame-time benchmarks for the race view.
+
+    python -m race.benchmark --frames 600
+    python -m race.benchmark --dashboard --bikes 50 --frames 600 --dump frames/
+
+By default, for 10, 50 and 200 bikes it times one frame of positions, laps
+and icon blits, computed per bike in Python (as race.py used to) and with the
+vectorized RaceState, drawing onto an off-screen surface.
+
+``--dashboard`` renders the whole race view headless (SDL's dummy driver) with
+synthetic data for ``--bikes`` bikes and reports frame times by phase: taking
+the data snapshot, restoring the track, sprites, leaderboard, metrics,
+composing and presenting. ``--dump`` saves frames as PNGs for visual diffs.
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pygame
+from config.config import Config
+from race.race_state import RaceState
+from race.track import Track
+from utils.benchmark import percentile
+
+BIKE_COUNTS = (10, 50, 200)
+
+
+def make_bike_data(count, rng):
+    return {
+        str(i): {"trip_miles": float(rng.uniform(0, 10))} for i in range(1, count + 1)
+    }
+
+
+def advance(bike_data, rng):
+    for metrics in bike_data.values():
+        metrics["trip_miles"] += float(rng.uniform(0, 0.0005))
+
+
+def per_bike_frame(track, bike_data, laps, start, surface, icon):
+    """The old approach: one position and lap lookup per bike per frame."""
+    for bike_id, metrics in bike_data.items():
+        distance = metrics["trip_miles"]
+        x, y, _ = track.position(distance)
+        start_distance = start.setdefault(bike_id, distance)
+        laps[bike_id] = track.laps(distance) - track.laps(start_distance)
+        surface.blit(icon, (int(x), int(y)))
+
+
+def vectorized_frame(state, surface, icon):
+    state.step()
+    xs = state.x.astype(int)
+    ys = state.y.astype(int)
+    for slot in np.flatnonzero(state.active[: len(state)]):
+        surface.blit(icon, (xs[slot], ys[slot]))
+
+
+def time_frames(frame, frames):
+    samples = []
+    for _ in range(frames):
+        started = time.perf_counter()
+        frame()
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)
+
+
+def run(track, frames=300, seed=1):
+    surface = pygame.Surface((Config.SCREEN_WIDTH, Config.SCREEN_HEIGHT))
+    icon = pygame.Surface((20, 10))
+    results = []
+    for count in BIKE_COUNTS:
+        rng = np.random.default_rng(seed)
+        bike_data = make_bike_data(count, rng)
+        laps, start = {}, {}
+        state = RaceState(track)
+
+        def old_frame():
+            advance(bike_data, rng)
+            per_bike_frame(track, bike_data, laps, start, surface, icon)
+
+        def new_frame():
+            advance(bike_data, rng)
+            state.update(bike_data)  # race.py does this per fetch, not per frame
+            vectorized_frame(state, surface, icon)
+
+        def state_only():
+            vectorized_frame(state, surface, icon)
+
+        for name, frame in (
+            ("per-bike", old_frame),
+            ("vectorized+update", new_frame),
+            ("vectorized", state_only),
+        ):
+            samples = time_frames(frame, frames)
+            results.append(
+                (
+                    count,
+                    name,
+                    percentile(samples, 50) * 1000,
+                    percentile(samples, 99) * 1000,
+                )
+            )
+    return results
+
+
+def synthetic_bikes(count, rng, elapsed):
+    """Metrics for ``count`` bikes ``elapsed`` seconds into a ride."""
+    bikes = {}
+    for i in range(1, count + 1):
+        mph = 14 + (i * 7919 % 100) / 10  # A steady 14-24 mph per bike
+        bikes[str(i)] = {
+            "trip_miles": round(mph * elapsed / 3600, 1),  # 0.1 mile steps
+            "power": int(rng.integers(80, 320)),
+            "cadence": int(rng.integers(60, 110)),
+            "gear": int(rng.integers(1, 24)),
+        }
+    return bikes
+
+
+def run_dashboard(
+    bikes=50,
+    frames=600,
+    fps=30,
+    update_every=3,
+    full_repaint=False,
+    dump=None,
+    dump_every=60,
+    seed=1,
+):
+    """
+    Render ``frames`` frames of the race view headless. New metrics are
+    published every ``update_every`` frames, as the event stream would, and
+    ride time advances at ``fps`` per frame. Returns (PhaseTimer, frame
+    times in seconds, sorted).
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from race import race as dashboard
+    from race.frame_loop import PhaseTimer
+
+    dashboard.load_assets()
+    rng = np.random.default_rng(seed)
+    phases = PhaseTimer()
+    samples = []
+    if dump:
+        os.makedirs(dump, exist_ok=True)
+    ride_seconds = 600.0  # Bikes are spread out ten minutes into the ride
+    for frame in range(frames):
+        if frame % update_every == 0:
+            dashboard.feed.publish(
+                synthetic_bikes(bikes, rng, ride_seconds), dashboard.feed.generation + 1
+            )
+        if full_repaint:
+            dashboard.compositor.invalidate()
+        started = time.perf_counter()
+        dashboard.update_display(phases)
+        samples.append(time.perf_counter() - started)
+        if dump and frame % dump_every == 0:
+            pygame.image.save(
+                dashboard.screen, os.path.join(dump, f"frame_{frame:05d}.png")
+            )
+        ride_seconds += 1 / fps
+    return phases, sorted(samples)
+
+
+def print_dashboard(phases, samples):
+    print(f"{'phase':<12} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for phase, mean, p50, p95, p99 in phases.summary():
+        print(f"{phase:<12} {mean:>8.3f} {p50:>8.3f} {p95:>8.3f} {p99:>8.3f}")
+    mean = sum(samples) / len(samples) * 1000
+    p50, p95, p99 = (percentile(samples, p) * 1000 for p in (50, 95, 99))
+    print(f"{'frame':<12} {mean:>8.3f} {p50:>8.3f} {p95:>8.3f} {p99:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the race view rendering.")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--waypoints", default=Config.WAYPOINTS_FILE)
+    parser.add_argument(
+        "--dashboard", action="store_true", help="Render the whole view headless"
+    )
+    parser.add_argument("--bikes", type=int, default=50)
+    parser.add_argument("--fps", type=int, default=Config.RACE_FPS)
+    parser.add_argument(
+        "--update-every", type=int, default=3, help="Frames between data updates"
+    )
+    parser.add_argument(
+        "--full-repaint", action="store_true", help="Redraw everything every frame"
+    )
+    parser.add_argument("--dump", help="Directory to save frames to as PNG")
+    parser.add_argument("--dump-every", type=int, default=60)
+    args = parser.parse_args()
+
+    if args.dashboard:
+        phases, samples = run_dashboard(
+            args.bikes,
+            args.frames,
+            args.fps,
+            args.update_every,
+            args.full_repaint,
+            args.dump,
+            args.dump_every,
+        )
+        print(f"🏁 {args.bikes} bikes, {args.frames} frames")
+        print_dashboard(phases, samples)
+        return
+
+    track = Track.load(args.waypoints, Config.TRACK_LENGTH_MILES)
+    print(f"{'bikes':>5}  {'approach':<18} {'p50 ms':>8} {'p99 ms':>8}")
+    for count, name, p50, p99 in run(track, args.frames):
+        print(f"{count:>5}  {name:<18} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Track centerline extraction: from a track drawing to an ordered waypoint loop.
+
+    mask -> thin() -> skeleton pixels -> prune spurs -> largest loop
+         -> trace() in riding order -> simplify() -> resample()
+
+The skeleton is thinned to one pixel wide, branches that do not close a loop
+(text, arrows, stubs) are pruned away end by end, and the largest remaining
+component is walked pixel by pixel, preferring the straightest way on at
+junctions, until it comes back around to where it started. Douglas-Peucker
+simplification then drops the staircase of pixel steps and ``resample``
+spaces the points evenly by arc length, which is what ``Track`` expects.
+"""
+
+import math
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+
+Pixel = Tuple[int, int]  # (row, column)
+
+_NEIGHBOUR_OFFSETS = [
+    (-1, 0),
+    (-1, 1),
+    (0, 1),
+    (1, 1),
+    (1, 0),
+    (1, -1),
+    (0, -1),
+    (-1, -1),
+]
+# Pixels looked back along the path to tell which way the walk is heading
+HEADING_LOOKBACK = 6
+
+
+def thin(mask: np.ndarray) -> np.ndarray:
+    """Zhang-Suen thinning of a boolean image to one-pixel-wide lines."""
+    img = np.pad(mask.astype(np.uint8), 1)
+    while True:
+        changed = False
+        for first in (True, False):
+            centre = img[1:-1, 1:-1]
+            p2, p3, p4 = img[:-2, 1:-1], img[:-2, 2:], img[1:-1, 2:]
+            p5, p6, p7 = img[2:, 2:], img[2:, 1:-1], img[2:, :-2]
+            p8, p9 = img[1:-1, :-2], img[:-2, :-2]
+            ring = [p2, p3, p4, p5, p6, p7, p8, p9, p2]
+            count = p2 + p3 + p4 + p5 + p6 + p7 + p8 + p9
+            transitions = sum(
+                ((a == 0) & (b == 1)).astype(np.uint8) for a, b in zip(ring, ring[1:])
+            )
+            if first:
+                side = (p2 * p4 * p6 == 0) & (p4 * p6 * p8 == 0)
+            else:
+                side = (p2 * p4 * p8 == 0) & (p2 * p6 * p8 == 0)
+            remove = (
+                (centre == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & side
+            )
+            if remove.any():
+                centre[remove] = 0
+                changed = True
+        if not changed:
+            return img[1:-1, 1:-1].astype(bool)
+
+
+def pixel_graph(skeleton: np.ndarray) -> Dict[Pixel, Set[Pixel]]:
+    """8-connected neighbours of every skeleton pixel."""
+    pixels = set(map(tuple, np.argwhere(skeleton).tolist()))
+    return {
+        (r, c): {
+            (r + dr, c + dc)
+            for dr, dc in _NEIGHBOUR_OFFSETS
+            if (r + dr, c + dc) in pixels
+        }
+        for r, c in pixels
+    }
+
+
+def prune_spurs(graph: Dict[Pixel, Set[Pixel]]) -> Dict[Pixel, Set[Pixel]]:
+    """Remove, end by end, every branch that does not lie on a loop."""
+    graph = {pixel: set(neighbours) for pixel, neighbours in graph.items()}
+    ends = deque(p for p, n in graph.items() if len(n) <= 1)
+    while ends:
+        pixel = ends.popleft()
+        neighbours = graph.pop(pixel, None)
+        if neighbours is None:
+            continue
+        for neighbour in neighbours:
+            links = graph.get(neighbour)
+            if links is None:
+                continue
+            links.discard(pixel)
+            if len(links) <= 1:
+                ends.append(neighbour)
+    return graph
+
+
+def largest_component(graph: Dict[Pixel, Set[Pixel]]) -> Set[Pixel]:
+    best: Set[Pixel] = set()
+    seen: Set[Pixel] = set()
+    for start in graph:
+        if start in seen:
+            continue
+        component = {start}
+        queue = deque([start])
+        while queue:
+            for neighbour in graph[queue.popleft()]:
+                if neighbour not in component:
+                    component.add(neighbour)
+                    queue.append(neighbour)
+        seen |= component
+        if len(component) > len(best):
+            best = component
+    return best
+
+
+def trace(graph: Dict[Pixel, Set[Pixel]], component: Set[Pixel]) -> List[Pixel]:
+    """
+    Walk a component of the pruned skeleton once around, in pixel order.
+    Returns an empty list if the component holds no loop.
+    """
+    if not component:
+        return []
+    # Start on a plain stretch of line rather than at a junction
+    plain = [p for p in component if len(graph[p]) == 2]
+    start = min(plain or component)
+    min_length = max(3, len(component) // 2)
+
+    def choices(path: List[Pixel]) -> List[Pixel]:
+        here = path[-1]
+        back = path[max(0, len(path) - 1 - HEADING_LOOKBACK)]
+        heading = math.atan2(here[0] - back[0], here[1] - back[1])
+
+        def turn(pixel):
+            if back == here:
+                return 0.0
+            angle = math.atan2(pixel[0] - here[0], pixel[1] - here[1]) - heading
+            return abs(math.atan2(math.sin(angle), math.cos(angle)))
+
+        return sorted((p for p in graph[here] if p in component), key=turn)
+
+    path = [start]
+    visited = {start}
+    options = [choices(path)]
+    while path:
+        if not options[-1]:
+            path.pop()  # Dead end: back up and try the next way on
+            options.pop()
+            continue
+        pixel = options[-1].pop(0)
+        if pixel in visited:
+            continue
+        path.append(pixel)
+        visited.add(pixel)
+        if len(path) >= min_length and start in graph[pixel]:
+            return path
+        options.append(choices(path))
+    return []
+
+
+def simplify(points: np.ndarray, epsilon: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification of a closed loop: keep the fewest points
+    such that no dropped point lies more than ``epsilon`` from the outline.
+    """
+    count = len(points)
+    if count < 4:
+        return points
+    # Split the loop at the point furthest from the first into two chains
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    closed = np.vstack([points, points[:1]])
+    keep = np.zeros(len(closed), dtype=bool)
+    keep[[0, far, count]] = True
+    stack = [(0, far), (far, count)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = closed[first], closed[last]
+        segment = closed[first + 1 : last]
+        span = b - a
+        length = math.hypot(*span)
+        if length == 0:
+            distances = np.hypot(*(segment - a).T)
+        else:
+            offset = segment - a
+            cross = span[0] * offset[:, 1] - span[1] * offset[:, 0]
+            distances = np.abs(cross) / length
+        worst = int(np.argmax(distances))
+        if distances[worst] > epsilon:
+            split = first + 1 + worst
+            keep[split] = True
+            stack += [(first, split), (split, last)]
+    return closed[:-1][keep[:-1]]
+
+
+def resample(points: np.ndarray, spacing: float) -> np.ndarray:
+    """Points evenly ``spacing`` apart (as near as fits) around a closed loop."""
+    closed = np.vstack([points, points[:1]])
+    lengths = np.hypot(*np.diff(closed, axis=0).T)
+    cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+    perimeter = cumulative[-1]
+    count = max(3, int(round(perimeter / spacing)))
+    samples = np.arange(count) * (perimeter / count)
+    return np.column_stack(
+        [
+            np.interp(samples, cumulative, closed[:, 0]),
+            np.interp(samples, cumulative, closed[:, 1]),
+        ]
+    )
+
+
+def orient(
+    points: np.ndarray,
+    start: Optional[Sequence[float]] = None,
+    clockwise: Optional[bool] = None,
+) -> np.ndarray:
+    """
+    Rotate the loop to begin nearest ``start`` and, if given, make it run
+    clockwise or anticlockwise on screen (y pointing down).
+    """
+    if clockwise is not None:
+        x, y = points[:, 0], points[:, 1]
+        area = np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) / 2
+        if (area > 0) != clockwise:  # Positive area is clockwise with y down
+            points = points[::-1]
+    if start is not None:
+        first = int(np.argmin(np.hypot(*(points - np.asarray(start)).T)))
+        points = np.roll(points, -first, axis=0)
+    return points
+
+
+def extract_centerline(
+    mask: np.ndarray, epsilon: float = 1.5, spacing: float = 15.0
+) -> np.ndarray:
+    """
+    Ordered (x, y) waypoints along the largest loop drawn in ``mask``, a
+    boolean image indexed [y, x] that is True on the track.
+    """
+    graph = prune_spurs(pixel_graph(thin(mask)))
+    pixels = trace(graph, largest_component(graph))
+    if not pixels:
+        raise ValueError("No closed track loop found in the image")
+    points = np.asarray(pixels, dtype=np.float64)[:, ::-1]  # (row, col) -> (x, y)
+    return resample(simplify(points, epsilon), spacing)
@@ -0,0 +1,189 @@
+"""
+Compiled track: everything the race view needs about the course in one file.
+
+    python -m race.compiled_track            # compile from the configured assets
+
+Waypoints, their cumulative arc lengths, the (x, y, heading) lookup table,
+the lap length and the track image already scaled to the race view are
+packed into flat little-endian arrays behind a fixed header:
+
+    header | waypoints f8[n, 2] | cumulative f8[n + 1] | lut f8[3, resolution]
+           | background u8[height, width, 3]
+
+Opening it maps the file and wraps each array with ``numpy.frombuffer``:
+no JSON to parse, no JPEG to decode and no image to rescale. The mapping is
+read-only, so every process that opens the same file (race views, server-side
+race logic) shares one copy of it in the page cache.
+
+The header carries a hash of the source files and settings; ``open_track``
+recompiles when they no longer match.
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import time
+from typing import Optional, Tuple
+import numpy as np
+import pygame
+from config.config import Config
+from race.track import LUT_RESOLUTION, Track, load_waypoints
+
+MAGIC = b"CRTRACK\0"
+VERSION = 1
+# magic, version, waypoints, resolution, width, height, lap miles, source key
+HEADER = struct.Struct("<8sIIIIId16s")
+# Arrays start 8-byte aligned after the header
+DATA_OFFSET = 64
+
+
+def source_key(
+    waypoints_path: str,
+    image_path: str,
+    size: Tuple[int, int],
+    length_miles: float,
+    resolution: int = LUT_RESOLUTION,
+) -> bytes:
+    """Hash of the source files and settings a compiled track was built from."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in (waypoints_path, image_path):
+        with open(path, "rb") as f:
+            digest.update(hashlib.blake2b(f.read(), digest_size=16).digest())
+    digest.update(struct.pack("<IIdI", size[0], size[1], length_miles, resolution))
+    return digest.digest()
+
+
+def compile_track(
+    output_path: str,
+    waypoints_path: str,
+    image_path: str,
+    size: Tuple[int, int],
+    length_miles: float,
+    resolution: int = LUT_RESOLUTION,
+):
+    """Build the compiled track file; it replaces any old one atomically."""
+    track = Track(load_waypoints(waypoints_path), length_miles, resolution)
+    image = pygame.transform.scale(pygame.image.load(image_path), size)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(track.waypoints),
+        resolution,
+        size[0],
+        size[1],
+        length_miles,
+        source_key(waypoints_path, image_path, size, length_miles, resolution),
+    )
+    arrays = [
+        np.asarray(track.waypoints, dtype="<f8"),
+        track.cumulative.astype("<f8"),
+        np.stack([track.lut_x, track.lut_y, track.lut_heading]).astype("<f8"),
+    ]
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(header.ljust(DATA_OFFSET, b"\0"))
+            for array in arrays:
+                f.write(array.tobytes())
+            f.write(pygame.image.tobytes(image, "RGB"))
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class CompiledTrack:
+    def __init__(self, path: str):
+        """Map a compiled track file; raises ValueError if it is not one."""
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < DATA_OFFSET:
+            raise ValueError(f"{path} is not a compiled track")
+        (
+            magic,
+            version,
+            count,
+            resolution,
+            width,
+            height,
+            self.length_miles,
+            self.key,
+        ) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled track")
+        self.size = (width, height)
+        self._offset = DATA_OFFSET
+        self.waypoints = self._take("<f8", count * 2).reshape(count, 2)
+        self.cumulative = self._take("<f8", count + 1)
+        self.lut = self._take("<f8", 3 * resolution).reshape(3, resolution)
+        self._background = self._take("u1", width * height * 3)
+        if self._offset != len(self._map):
+            raise ValueError(f"{path} is truncated or has trailing data")
+        self.track = Track(
+            self.waypoints,
+            self.length_miles,
+            tables=tuple(self.lut),
+            cumulative=self.cumulative,
+        )
+
+    def _take(self, dtype: str, count: int) -> np.ndarray:
+        """The next ``count`` items of the file as a read-only array view."""
+        size = np.dtype(dtype).itemsize * count
+        if self._offset + size > len(self._map):
+            raise ValueError("Compiled track is truncated")
+        array = np.frombuffer(self._map, dtype=dtype, count=count, offset=self._offset)
+        self._offset += size
+        return array
+
+    def background(self) -> pygame.Surface:
+        """The track image at the race view's size, drawn from the mapping."""
+        return pygame.image.frombuffer(self._background, self.size, "RGB")
+
+
+def open_track(
+    path: str,
+    waypoints_path: str,
+    image_path: str,
+    size: Tuple[int, int],
+    length_miles: float,
+    resolution: int = LUT_RESOLUTION,
+) -> CompiledTrack:
+    """The compiled track at ``path``, (re)compiled first if it is missing or stale."""
+    key = source_key(waypoints_path, image_path, size, length_miles, resolution)
+    compiled: Optional[CompiledTrack] = None
+    try:
+        compiled = CompiledTrack(path)
+    except (OSError, ValueError):
+        pass
+    if compiled is not None and compiled.key == key:
+        return compiled
+    compile_track(path, waypoints_path, image_path, size, length_miles, resolution)
+    return CompiledTrack(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default=Config.COMPILED_TRACK_FILE)
+    parser.add_argument("--waypoints", default=Config.WAYPOINTS_FILE)
+    parser.add_argument("--image", default=Config.TRACK_IMAGE_PATH)
+    args = parser.parse_args()
+
+    size = (Config.TRACK_WIDTH, Config.SCREEN_HEIGHT)
+    compile_track(
+        args.output, args.waypoints, args.image, size, Config.TRACK_LENGTH_MILES
+    )
+    started = time.perf_counter()
+    compiled = CompiledTrack(args.output)
+    compiled.background()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(
+        f"✅ Compiled {len(compiled.waypoints)} waypoints and a "
+        f"{size[0]}x{size[1]} background into {args.output} "
+        f"({os.path.getsize(args.output) // 1024} KiB, opens in {elapsed:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Frame pacing and shared state for the race view's render loop.
+
+The renderer and the network tasks run as separate asyncio tasks. The
+``/events/bikes`` stream and the ``/bikes`` poller publish into a
+``BikeFeed``; the render loop
+picks up the newest snapshot at the start of a frame, draws, and then waits
+on a ``FramePacer`` until the next frame is due. Nothing in the loop blocks:
+``FramePacer.wait`` sleeps with ``asyncio.sleep`` against fixed deadlines, so
+a slow response never stalls a frame and a slow frame never delays a fetch.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from utils.benchmark import percentile
+
+# Frames kept for the overlay statistics
+STATS_WINDOW = 120
+
+
+class BikeFeed:
+    """
+    The latest bike snapshot from the network task. ``bikes`` is replaced,
+    never mutated, so a reader can keep the dict it took for a whole frame.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.bikes: Dict[str, dict] = {}
+        self.version: Optional[int] = None
+        self.generation = 0  # Bumped whenever bikes changes
+        self.received_at: Optional[float] = None  # Last successful poll
+        self.refresh = asyncio.Event()  # Set to poll again without waiting
+        self.streaming = False  # Live events are arriving
+
+    def publish(self, bikes: Dict[str, dict], version: Optional[int]):
+        self.bikes = bikes
+        self.version = version
+        self.generation += 1
+        self.confirm()
+
+    def apply_delta(self, changed: Dict[str, dict], removed, version: int) -> bool:
+        """
+        Merge the bikes changed since the current version. Deltas older than
+        the snapshot, or arriving before there is one, are dropped.
+        """
+        if self.version is None or version < self.version:
+            return False
+        bikes = {**self.bikes, **changed}
+        for bike_id in removed:
+            bikes.pop(bike_id, None)
+        self.publish(bikes, version)
+        return True
+
+    def confirm(self):
+        """The server answered and the snapshot is current."""
+        self.received_at = self.clock()
+
+    def reset(self):
+        """Forget the snapshot so the next poll fetches everything."""
+        self.publish({}, None)
+        self.received_at = None
+        self.refresh.set()
+
+    async def wait_for_poll(self, interval: float):
+        """Sleep until the next poll is due, or until a refresh is asked for."""
+        try:
+            await asyncio.wait_for(self.refresh.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        self.refresh.clear()
+
+    def age(self) -> Optional[float]:
+        """Seconds since the server last confirmed the snapshot."""
+        if self.received_at is None:
+            return None
+        return self.clock() - self.received_at
+
+
+async def read_events(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Server-Sent Events from a stream of lines, as (event ID, data). Comment
+    lines such as keepalives come through as ("", "") so readers know the
+    connection is alive.
+    """
+    event_id, data = "", []
+    async for line in lines:
+        if line.startswith(":"):
+            yield "", ""
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+        elif line.startswith("id:"):
+            event_id = line[3:].strip()
+        elif not line and data:
+            yield event_id, "\n".join(data)
+            data = []
+
+
+class FramePacer:
+    """
+    Fixed-timestep frame deadlines. Deadlines advance by exactly one step per
+    frame so the rate does not drift; after a stall longer than
+    ``max_lag_frames`` the schedule restarts from now instead of racing to
+    catch up.
+    """
+
+    def __init__(
+        self,
+        fps: float,
+        clock: Callable[[], float] = time.perf_counter,
+        max_lag_frames: int = 5,
+    ):
+        self.step = 1.0 / fps
+        self.clock = clock
+        self.max_lag = max_lag_frames * self.step
+        self.deadline: Optional[float] = None
+        self.dropped = 0
+
+    def next_delay(self) -> float:
+        """Advance to the next deadline and return how long to wait for it."""
+        now = self.clock()
+        if self.deadline is None:
+            self.deadline = now
+        self.deadline += self.step
+        behind = now - self.deadline
+        if behind > self.max_lag:
+            self.dropped += int(behind // self.step)
+            self.deadline = now
+        return max(0.0, self.deadline - now)
+
+    async def wait(self):
+        await asyncio.sleep(self.next_delay())
+
+
+class FrameStats:
+    """Frame work time and frame-to-frame interval over the last frames."""
+
+    def __init__(
+        self,
+        window: int = STATS_WINDOW,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.clock = clock
+        self.work = deque(maxlen=window)
+        self.intervals = deque(maxlen=window)
+        self._last_start: Optional[float] = None
+        self._started: Optional[float] = None
+
+    def begin(self):
+        now = self.clock()
+        if self._last_start is not None:
+            self.intervals.append(now - self._last_start)
+        self._last_start = self._started = now
+
+    def end(self):
+        if self._started is not None:
+            self.work.append(self.clock() - self._started)
+            self._started = None
+
+    def fps(self) -> float:
+        if not self.intervals:
+            return 0.0
+        return len(self.intervals) / sum(self.intervals)
+
+    def work_ms(self, p: float = 50) -> float:
+        return percentile(sorted(self.work), p) * 1000
+
+    def format(self, data_age: Optional[float] = None) -> str:
+        age = "no data" if data_age is None else f"data {data_age:.1f} s old"
+        return (
+            f"{self.fps():.0f} fps | frame {self.work_ms(50):.1f} ms "
+            f"(p99 {self.work_ms(99):.1f}) | {age}"
+        )
+
+
+class PhaseTimer:
+    """Time spent in each named step of a frame, across many frames."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.samples: Dict[str, List[float]] = {}
+        self._last = 0.0
+
+    def start(self):
+        self._last = self.clock()
+
+    def mark(self, phase: str):
+        """Close ``phase``, which ran since the previous mark."""
+        now = self.clock()
+        self.samples.setdefault(phase, []).append(now - self._last)
+        self._last = now
+
+    def summary(self) -> List[Tuple[str, float, float, float, float]]:
+        """(phase, mean, p50, p95, p99) in milliseconds, in frame order."""
+        rows = []
+        for phase, samples in self.samples.items():
+            ordered = sorted(samples)
+            rows.append(
+                (
+                    phase,
+                    sum(ordered) / len(ordered) * 1000,
+                    percentile(ordered, 50) * 1000,
+                    percentile(ordered, 95) * 1000,
+                    percentile(ordered, 99) * 1000,
+                )
+            )
+        return rows
+
+
+class _NoPhases:
+    def start(self):
+        pass
+
+    def mark(self, phase: str):
+        pass
+
+
+# Stands in for a PhaseTimer when frames are not being timed
+NO_PHASES = _NoPhases()
@@ -0,0 +1,135 @@
+"""
+Layered compositing for the race view.
+
+Everything that never changes during a race (the track image and titles) is
+drawn once into a background surface. Each frame only the parts of the
+screen that changed are restored from the background and redrawn:
+
+* sprites (the bikes) are erased at their previous rects and drawn at their
+  new ones, unless none of them moved;
+* regions (leaderboard rows, the metrics area) are fixed rectangles that are
+  redrawn only when their content key changes.
+
+``end_frame`` returns the dirty rectangles for ``pygame.display.update``.
+"""
+
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+import pygame
+
+Point = Tuple[int, int]
+
+# Content key that never matches, forcing a region to redraw
+_STALE = object()
+
+
+def build_background(
+    size: Tuple[int, int],
+    track_image: Optional[pygame.Surface] = None,
+    titles: Sequence[Tuple[pygame.Surface, Point]] = (),
+    fill=(0, 0, 0),
+) -> pygame.Surface:
+    """Compose the static layer: fill, track image and titles."""
+    background = pygame.Surface(size)
+    background.fill(fill)
+    if track_image is not None:
+        background.blit(track_image, (0, 0))
+    for surface, position in titles:
+        background.blit(surface, position)
+    if pygame.display.get_surface() is not None:
+        background = background.convert()  # Match the screen format for fast blits
+    return background
+
+
+class Compositor:
+    def __init__(self, screen: pygame.Surface, background: pygame.Surface):
+        self.screen = screen
+        self.background = background
+        self._sprite_rects: List[pygame.Rect] = []
+        self._sprite_key: Optional[tuple] = None
+        self._sprite_items: Sequence[Tuple[pygame.Surface, Point]] = ()
+        self._sprites_moved = False
+        self._regions: Dict[Hashable, Tuple[pygame.Rect, object]] = {}
+        self._dirty: List[pygame.Rect] = []
+        self._full = True
+
+    def set_background(self, background: pygame.Surface):
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """Redraw everything on the next frame, e.g. after something else drew."""
+        self._full = True
+
+    def begin_frame(self):
+        """Start a frame; after ``invalidate`` this repaints the background."""
+        self._dirty = []
+        self._sprite_items = ()
+        self._sprites_moved = False
+        if self._full:
+            self.screen.blit(self.background, (0, 0))
+            self._sprite_rects = []
+            self._sprite_key = None
+            for name, (rect, _) in self._regions.items():
+                self._regions[name] = (rect, _STALE)
+
+    def _erase(self, rect: pygame.Rect):
+        self.screen.blit(self.background, rect, rect)
+        self._dirty.append(rect)
+
+    def sprites(self, items: Sequence[Tuple[pygame.Surface, Point]]):
+        """Draw (image, topleft) pairs this frame, erasing last frame's."""
+        key = tuple((image, tuple(position)) for image, position in items)
+        self._sprite_items = items
+        if key == self._sprite_key:
+            return
+        self._sprite_key = key
+        self._sprites_moved = True
+        previous = self._sprite_rects
+        for rect in previous:
+            self._erase(rect)
+        # Regions under erased sprites have lost their pixels
+        for name, (rect, _) in self._regions.items():
+            if rect.collidelist(previous) != -1:
+                self._regions[name] = (rect, _STALE)
+        self._sprite_rects = [
+            image.get_rect(topleft=position) for image, position in items
+        ]
+
+    def region(
+        self,
+        name: Hashable,
+        rect: pygame.Rect,
+        content: Hashable,
+        draw: Callable[[pygame.Surface], None],
+    ):
+        """
+        Redraw ``rect`` with ``draw(screen)`` when ``content`` differs from
+        last frame's. ``draw`` must stay inside ``rect``.
+        """
+        rect = pygame.Rect(rect).clip(self.screen.get_rect())
+        cached = self._regions.get(name)
+        if cached is not None and cached[0] == rect and cached[1] == content:
+            return
+        if cached is not None and cached[0] != rect:
+            self._erase(cached[0])
+        self._erase(rect)
+        self.screen.set_clip(rect)
+        draw(self.screen)
+        self.screen.set_clip(None)
+        self._regions[name] = (rect, content)
+
+    def drop_region(self, name: Hashable):
+        cached = self._regions.pop(name, None)
+        if cached is not None:
+            self._erase(cached[0])
+
+    def end_frame(self) -> List[pygame.Rect]:
+        """Draw the sprites on top and return the rectangles to present."""
+        if self._sprite_items:
+            self.screen.blits(self._sprite_items, doreturn=False)
+            if self._sprites_moved:
+                self._dirty.extend(self._sprite_rects)
+        if self._full:
+            self._full = False
+            return [self.screen.get_rect()]
+        return self._dirty
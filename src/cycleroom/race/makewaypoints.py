@@ -1,43 +1,166 @@
-import cv2
-import numpy as np
+"""
+Generate the waypoint file for a track image.
+
+    python -m race.makewaypoints
+    python -m race.makewaypoints --image assets/track.jpg --spacing 10 \\
+        --start 485,500 --clockwise
+
+The image is scaled to the size the race view draws it at, the dark track
+line is thresholded out and its centerline traced into one ordered, closed
+loop (see race.centerline), simplified and resampled to evenly spaced
+waypoints. Results are cached under a hash of the image bytes and the
+settings, so running it again for an unchanged track is instant.
+"""
+
+import argparse
+import hashlib
 import json
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pygame
+from config.config import Config
+from race.centerline import extract_centerline, orient
+
+CACHE_DIR = os.getenv(
+    "WAYPOINTS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "cycleroom", "waypoints"),
+)
+# Grey level (0-255) below which a pixel counts as track
+THRESHOLD = 128
+
+
+def track_mask(
+    image: pygame.Surface, size: Tuple[int, int], threshold: int = THRESHOLD
+) -> np.ndarray:
+    """Boolean [y, x] image of the dark pixels, at the size the track is drawn."""
+    flat = pygame.Surface(image.get_size(), depth=24)  # smoothscale needs 24 bits
+    flat.fill((255, 255, 255))
+    flat.blit(image, (0, 0))
+    scaled = pygame.transform.smoothscale(flat, size)
+    rgb = pygame.surfarray.array3d(scaled).astype(np.float32)
+    grey = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return (grey < threshold).T
+
+
+def cache_key(image_bytes: bytes, settings: dict) -> str:
+    digest = hashlib.blake2b(image_bytes, digest_size=16)
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def make_waypoints(
+    image_path: str,
+    size: Tuple[int, int],
+    threshold: int = THRESHOLD,
+    epsilon: float = 1.5,
+    spacing: float = 15.0,
+    start: Optional[Sequence[float]] = None,
+    clockwise: Optional[bool] = None,
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> Tuple[List[dict], bool]:
+    """
+    Waypoints as written to the waypoint file, and whether they came from the
+    cache.
+    """
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+    settings = {
+        "size": list(size),
+        "threshold": threshold,
+        "epsilon": epsilon,
+        "spacing": spacing,
+        "start": None if start is None else list(start),
+        "clockwise": clockwise,
+    }
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, cache_key(image_bytes, settings) + ".json")
+        try:
+            with open(cache_path) as f:
+                return json.load(f), True
+        except (OSError, ValueError):
+            pass
+
+    image = pygame.image.load(image_path)
+    points = extract_centerline(track_mask(image, size, threshold), epsilon, spacing)
+    points = orient(points, start, clockwise)
+    waypoints = [
+        {"index": i + 1, "x": round(float(x), 1), "y": round(float(y), 1)}
+        for i, (x, y) in enumerate(points)
+    ]
 
-# Load the track image
-image_path = "race/track.jpg"
-try:
-    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    if image is None:
-        raise FileNotFoundError(f"❌ Unable to load image at {image_path}")
-except Exception as e:
-    print(e)
-    exit()
-
-# Apply thresholding to isolate the track
-_, binary = cv2.threshold(image, 128, 255, cv2.THRESH_BINARY_INV)
-
-# Find contours (detects the outer boundary of the track)
-contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-if not contours:
-    print("❌ No track contour detected!")
-    exit()
-
-# Get the largest contour (assumed to be the track boundary)
-track_contour = max(contours, key=cv2.contourArea)
-
-# Compute the track's centerline by applying morphological thinning
-skeleton = cv2.ximgproc.thinning(binary)
-
-# Extract centerline waypoints
-waypoints = np.column_stack(np.where(skeleton > 0))  # Get all pixels in the skeleton
-waypoints = [(int(x), int(y)) for y, x in waypoints]  # Convert to (x, y) format
-
-# Save waypoints to a JSON file
-waypoints_json_path = "race/waypoints.json"
-try:
-    with open(waypoints_json_path, "w") as f:
-        json.dump(waypoints, f)
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(waypoints, f)
+        except OSError as e:
+            print(f"⚠️ Could not cache waypoints in {cache_dir}: {e}")
+    return waypoints, False
+
+
+def parse_pair(text: str) -> Tuple[float, float]:
+    x, y = text.split(",")
+    return float(x), float(y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--image", default=Config.TRACK_IMAGE_PATH)
+    parser.add_argument("--output", default=Config.WAYPOINTS_FILE)
+    parser.add_argument(
+        "--size",
+        type=parse_pair,
+        default=(Config.TRACK_WIDTH, Config.SCREEN_HEIGHT),
+        help="WIDTH,HEIGHT the track is drawn at (default: the race view's)",
+    )
+    parser.add_argument("--threshold", type=int, default=THRESHOLD)
+    parser.add_argument(
+        "--epsilon",
+        type=float,
+        default=1.5,
+        help="Largest distance in pixels the simplified line may stray",
+    )
+    parser.add_argument(
+        "--spacing", type=float, default=15.0, help="Pixels between waypoints"
+    )
+    parser.add_argument(
+        "--start", type=parse_pair, help="X,Y of the start line: waypoint 1 is nearest"
+    )
+    direction = parser.add_mutually_exclusive_group()
+    direction.add_argument("--clockwise", dest="clockwise", action="store_true")
+    direction.add_argument("--anticlockwise", dest="clockwise", action="store_false")
+    parser.set_defaults(clockwise=None)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        waypoints, cached = make_waypoints(
+            args.image,
+            tuple(int(v) for v in args.size),
+            threshold=args.threshold,
+            epsilon=args.epsilon,
+            spacing=args.spacing,
+            start=args.start,
+            clockwise=args.clockwise,
+            cache_dir=None if args.no_cache else CACHE_DIR,
+        )
+    except (OSError, pygame.error, ValueError) as e:
+        print(f"❌ Could not extract waypoints from {args.image}: {e}")
+        raise SystemExit(1)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    with open(args.output, "w") as f:
+        json.dump(waypoints, f, indent=2)
+    source = "from cache" if cached else "extracted"
     print(
-        f"✅ Extracted {len(waypoints)} centerline waypoints and saved to {waypoints_json_path}"
+        f"✅ {len(waypoints)} waypoints {source} in {elapsed:.0f} ms "
+        f"and saved to {args.output}"
     )
-except Exception as e:
-    print(f"❌ Failed to save waypoints to {waypoints_json_path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,34 @@
 import pygame
 import os
 import json
+import math
 import asyncio
 import httpx
 import logging
 import signal
 import sys
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from config.config import Config  # Import the Config class
+from backend.utils.ranking import Ranking
+from race.compiled_track import open_track
+from race.frame_loop import (
+    NO_PHASES,
+    BikeFeed,
+    FramePacer,
+    FrameStats,
+    read_events,
+)
+from race.layers import Compositor, build_background
+from race.race_state import RaceState
+from race.sprites import PALETTE, BikeSprites, SpriteCache
+from race.text_cache import PanelCache, TextCache
+from race.track import Track
+from race.video import MJPEG_MEDIA_TYPE, FrameBroadcaster
 from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
 # Load environment variables from .env file
 load_dotenv()
@@ -35,13 +55,23 @@ def set_env_variables():
     os.environ["TRACK_IMAGE_PATH"] = Config.TRACK_IMAGE_PATH
 
 # Initialize Pygame
-try:
+def init_display(headless=Config.RACE_HEADLESS):
+    """
+    Open the window, or with ``headless`` an off-screen display through SDL's
+    dummy drivers, for benchmarks and machines without a screen.
+    """
+    if headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
     pygame.init()
-    screen = pygame.display.set_mode((Config.SCREEN_WIDTH, Config.SCREEN_HEIGHT))
+    display = pygame.display.set_mode((Config.SCREEN_WIDTH, Config.SCREEN_HEIGHT))
     pygame.display.set_caption("Real-Time Bike Race Visualization")
-    clock = pygame.time.Clock()
+    return display
+
+try:
+    screen = init_display()
 except pygame.error as e:
-    logger.error(f"❌ Pygame initialization failed: {e}")
+    logger.error(f"❌ Pygame initialization failed: {e} (set RACE_HEADLESS=1 to run without a display)")
     sys.exit(1)  # Exit the program if Pygame cannot initialize
 except ValueError as e:
     logger.error(f"❌ Invalid screen dimensions or display configuration: {e}")
@@ -49,114 +79,136 @@ except ValueError as e:
 
 # Global Variables
 WAYPOINTS = []
+TRACK = None  # Track built from WAYPOINTS, with its position lookup table
+race_state = None  # Positions, laps and race distances of every bike
 BIKE_ICON = None
+bike_sprites = None  # One tinted sprite per bike, built from BIKE_ICON
 TRACK_IMAGE = None
 bike_data = {}
-bike_positions = {}
-bike_laps = {}
 bike_colors = {}
-bike_last_waypoint = {}
-bike_initial_distance = {}  # Track initial distance for each bike
 font = pygame.font.SysFont(None, 24)
 small_font = pygame.font.SysFont(None, 18)  # Smaller font for metrics
+# Rendered text is reused until it changes
+text_cache = TextCache()
+metric_panels = PanelCache(text_cache, small_font, column_width=200, row_height=15)
+# Static layers are composed once; frames only redraw what changed
+compositor = Compositor(screen, pygame.Surface(screen.get_size()))
 countdown_timer = 10  # Countdown timer in seconds
+# Latest snapshot from the network task, and the generation the view shows
+feed = BikeFeed()
+ranking = Ranking()  # Leaderboard order, updated only for bikes that moved
+shown_generation = None
+frame_stats = FrameStats()
+show_stats = Config.RACE_STATS_OVERLAY  # Toggled with F3
+# Every HTTP viewer shares the frames rendered here, encoded once
+video = FrameBroadcaster(fps=Config.RACE_VIDEO_FPS)
 
 # Assign Colors to Bikes
 def assign_bike_colors():
-    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 165, 0), (255, 255, 0)]
-    for i, bike_id in enumerate(bike_data.keys()):
-        bike_colors[bike_id] = colors[i % len(colors)]
+    """Give bikes seen for the first time the next palette color; others keep theirs."""
+    for bike_id in bike_data.keys():
+        if bike_id not in bike_colors:
+            bike_colors[bike_id] = PALETTE[len(bike_colors) % len(PALETTE)]
 
 # Reset all stats
 def reset_stats():
-    global bike_data, bike_positions, bike_laps, bike_last_waypoint, bike_initial_distance
+    global bike_data
     bike_data = {}
-    bike_positions = {}
-    bike_laps = {}
-    bike_last_waypoint = {}
-    bike_initial_distance = {}
+    ranking.clear()
+    feed.reset()  # Refetch the full snapshot
+    if race_state is not None:
+        race_state.reset()
+    if bike_sprites is not None:
+        bike_sprites.reset()  # Slots are handed out afresh
+    metric_panels.clear()
 
 # Load Assets
 def load_assets():
-    global WAYPOINTS, BIKE_ICON, TRACK_IMAGE
+    global WAYPOINTS, TRACK, BIKE_ICON, TRACK_IMAGE, race_state, bike_sprites
+    # Waypoints, lookup table and scaled image mapped from one compiled file
+    compiled = None
+    if Config.COMPILED_TRACK_FILE:
+        try:
+            compiled = open_track(
+                Config.COMPILED_TRACK_FILE,
+                Config.WAYPOINTS_FILE,
+                Config.TRACK_IMAGE_PATH,
+                (Config.TRACK_WIDTH, Config.SCREEN_HEIGHT),
+                Config.TRACK_LENGTH_MILES,
+            )
+        except (OSError, json.JSONDecodeError, ValueError, pygame.error) as e:
+            print(f"⚠️ Compiled track unavailable, loading the sources: {e}")
+
     # Load Waypoints
     try:
-        with open(Config.WAYPOINTS_FILE, "r") as f:
-            WAYPOINTS = [(wp["x"], wp["y"]) for wp in json.load(f)]
-        print(f"✅ Loaded {len(WAYPOINTS)} waypoints.")
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        if compiled is not None:
+            TRACK = compiled.track
+        else:
+            TRACK = Track.load(Config.WAYPOINTS_FILE, Config.TRACK_LENGTH_MILES)
+        WAYPOINTS = TRACK.waypoints
+        race_state = RaceState(TRACK)
+        print(f"✅ Loaded {len(WAYPOINTS)} waypoints ({TRACK.perimeter:.0f} px per lap).")
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
         print(f"❌ Error loading waypoints: {e}")
         WAYPOINTS = []
+        TRACK = None
+        race_state = None
 
     # Load Bike Icon
     try:
         BIKE_ICON = pygame.image.load(Config.BIKE_ICON_PATH)
-        BIKE_ICON = pygame.transform.scale(BIKE_ICON, (20, 10))
+        BIKE_ICON = pygame.transform.smoothscale(BIKE_ICON, (20, 10))
+        bike_sprites = BikeSprites(
+            SpriteCache(BIKE_ICON), rotate=Config.RACE_ROTATE_SPRITES
+        )
     except pygame.error as e:
         print(f"❌ Error loading bike icon: {e}")
         BIKE_ICON = None
+        bike_sprites = None
 
     # Load Track Image
     try:
-        TRACK_IMAGE = pygame.image.load(Config.TRACK_IMAGE_PATH)
-        TRACK_IMAGE = pygame.transform.scale(TRACK_IMAGE, (Config.TRACK_WIDTH, Config.SCREEN_HEIGHT))
+        if compiled is not None:
+            TRACK_IMAGE = compiled.background()
+        else:
+            TRACK_IMAGE = pygame.image.load(Config.TRACK_IMAGE_PATH)
+            TRACK_IMAGE = pygame.transform.scale(TRACK_IMAGE, (Config.TRACK_WIDTH, Config.SCREEN_HEIGHT))
     except pygame.error as e:
         print(f"❌ Error loading track image: {e}")
         TRACK_IMAGE = None
 
-# Get bike position with interpolation
-def interpolate_position(start_pos, end_pos, progress):
-    return (
-        int(start_pos[0] + (end_pos[0] - start_pos[0]) * progress),
-        int(start_pos[1] + (end_pos[1] - start_pos[1]) * progress),
-    )
-
-def get_bike_position(distance_miles, bike_id):
-    if not WAYPOINTS:
-        return (0, 0)   
-
-    distance_pixels = (distance_miles / Config.TRACK_LENGTH_MILES) * len(WAYPOINTS)
-    index = int(distance_pixels) % len(WAYPOINTS)
-    next_index = (index + 1) % len(WAYPOINTS)
-
-    start_pos = WAYPOINTS[index]
-    end_pos = WAYPOINTS[next_index]
-    progress = distance_pixels % 1
+    compositor.set_background(compose_background())
 
-    # Update lap counter
-    update_lap_counter(bike_id, index)
-
-    bike_positions[bike_id] = interpolate_position(start_pos, end_pos, progress)
-    return bike_positions[bike_id]
-
-# Update Lap Counter
-def update_lap_counter(bike_id, current_waypoint):
-    if bike_id not in bike_laps:
-        bike_laps[bike_id] = 0
-        bike_last_waypoint[bike_id] = current_waypoint
-
-    # Check if the bike crossed the start/finish line (first waypoint)
-    if bike_last_waypoint[bike_id] > current_waypoint and current_waypoint == 0:
-        bike_laps[bike_id] += 1
-
-    bike_last_waypoint[bike_id] = current_waypoint
+def compose_background():
+    """The track image and titles, which stay put for the whole race."""
+    title_surface = text_cache.render(font, "Leaderboard", (255, 255, 255))
+    return build_background(
+        screen.get_size(),
+        TRACK_IMAGE,
+        titles=[(title_surface, LEADERBOARD_POS)],
+    )
 
 # Draw Bike Icons with Smooth Animation
 def draw_bike_icons():
-    for bike_id, metrics in bike_data.items():
-        bike_pos = get_bike_position(metrics["trip_miles"], bike_id)
-        color = bike_colors.get(bike_id, (255, 255, 255))
-        if BIKE_ICON:
-            screen.blit(BIKE_ICON, bike_pos)
+    if race_state is None:
+        return
+    # Every bike's position in one vectorized pass, moved on between updates
+    race_state.step(time.monotonic())
+    if bike_sprites is None:
+        return
+    # Drawn with one Surface.blits call when the frame is composed
+    compositor.sprites(bike_sprites.items(race_state, bike_colors))
+
+def bike_laps(bike_id):
+    return race_state.lap_count(bike_id) if race_state is not None else 0
 
 # Draw Real-Time Metrics under Leaderboard
 def draw_metrics_under_leaderboard():
     metrics_pos = (Config.TRACK_WIDTH + 50, 400)
     y_offset = 0
-    column_width = 200  # Width of each column
+    placed = []
     for bike_id, metrics in bike_data.items():
-        initial_distance = bike_initial_distance.get(bike_id, 0)
-        race_distance = metrics["trip_miles"] - initial_distance
+        race_distance = race_state.race_distance_of(bike_id) if race_state is not None else 0.0
         text_lines = [
             f"Bike ID: {bike_id}",
             f"Speed: {metrics.get('speed', 'N/A')} mph",
@@ -165,135 +217,308 @@ def draw_metrics_under_leaderboard():
             f"Distance: {metrics.get('trip_miles', 'N/A')} miles",
             f"Race Distance: {race_distance:.2f} miles",
             f"Gear: {metrics.get('gear', 'N/A')}",
-            f"Laps: {bike_laps.get(bike_id, 0)}",
+            f"Laps: {bike_laps(bike_id)}",
         ]
-        for i, line in enumerate(text_lines):
-            text_surface = small_font.render(line, True, (255, 255, 255))
-            column = i % 2  # Determine the column (0 or 1)
-            row = i // 2  # Determine the row
-            screen.blit(text_surface, (metrics_pos[0] + column * column_width, metrics_pos[1] + y_offset + row * 15))
+        # Two columns of lines; only re-rendered when a value changes
+        panel = metric_panels.panel(bike_id, text_lines)
+        placed.append((panel, (metrics_pos[0], metrics_pos[1] + y_offset)))
         y_offset += 40  # Add extra space between bikes
 
+    # Panels overlap, so the metrics area is one region, redrawn only when a
+    # panel changed
+    area = pygame.Rect(metrics_pos, screen.get_size()).clip(screen.get_rect())
+    compositor.region(
+        "metrics",
+        area,
+        tuple(panel for panel, _ in placed),
+        lambda target: target.blits(placed, doreturn=False),
+    )
+
 # Global variable to track leaderboard scrolling
 leaderboard_scroll_offset = 0
 LEADERBOARD_ITEMS_PER_PAGE = 10  # Number of items to display per page
+LEADERBOARD_POS = (Config.TRACK_WIDTH + 50, 50)
+LEADERBOARD_ROW_HEIGHT = 25
+
+def draw_leaderboard_row(name, position, surface):
+    """One line of the leaderboard, redrawn only when its text changes."""
+    rect = pygame.Rect(
+        position, (screen.get_width() - position[0], LEADERBOARD_ROW_HEIGHT)
+    )
+    compositor.region(
+        name,
+        rect,
+        surface,
+        lambda target: surface and target.blit(surface, position),
+    )
 
 # Draw Real-Time Leaderboard with Scrolling
 def draw_leaderboard():
     global leaderboard_scroll_offset
-    sorted_bikes = sorted(
-        bike_data.items(), key=lambda x: x[1]["trip_miles"], reverse=True
-    )
-    leaderboard_pos = (Config.TRACK_WIDTH + 50, 50)
-    y_offset = 0
-
-    # Draw leaderboard title
-    title_surface = font.render("Leaderboard", True, (255, 255, 255))
-    screen.blit(title_surface, leaderboard_pos)
+    leaderboard_pos = LEADERBOARD_POS  # The title is part of the background
 
     # Calculate the range of items to display based on the scroll offset
     start_index = leaderboard_scroll_offset
     end_index = start_index + LEADERBOARD_ITEMS_PER_PAGE
-    visible_bikes = sorted_bikes[start_index:end_index]
-
-    # Display the visible bikes
-    for rank, (bike_id, metrics) in enumerate(visible_bikes, start=start_index + 1):
-        color = bike_colors.get(bike_id, (255, 255, 255))
-        leaderboard_text = f"{rank}. {bike_id}: {metrics['trip_miles']:.2f} miles | Laps: {bike_laps.get(bike_id, 0)}"
-        text_surface = font.render(leaderboard_text, True, color)
-        screen.blit(
-            text_surface, (leaderboard_pos[0], leaderboard_pos[1] + 25 + y_offset)
+    visible_bikes = ranking.page(start_index, LEADERBOARD_ITEMS_PER_PAGE)
+
+    # Rows below the last visible bike are cleared; the one right after it
+    # holds the down arrow when there is more to scroll to
+    rows = [
+        text_cache.render(
+            font,
+            f"{rank}. {bike_id}: {trip_miles:.2f} miles | Laps: {bike_laps(bike_id)}",
+            bike_colors.get(bike_id, (255, 255, 255)),
+        )
+        for rank, (bike_id, trip_miles) in enumerate(
+            visible_bikes, start=start_index + 1
         )
-        y_offset += 25
+    ]
+    if end_index < len(ranking):
+        rows.append(text_cache.render(font, "↓ Scroll Down", (255, 255, 255)))
+    rows += [None] * (LEADERBOARD_ITEMS_PER_PAGE + 1 - len(rows))
+    for i, surface in enumerate(rows):
+        row_pos = (
+            leaderboard_pos[0],
+            leaderboard_pos[1] + LEADERBOARD_ROW_HEIGHT * (i + 1),
+        )
+        draw_leaderboard_row(("row", i), row_pos, surface)
 
     # Draw scroll indicators if needed
+    up_arrow_surface = None
     if leaderboard_scroll_offset > 0:
-        up_arrow_surface = font.render("↑ Scroll Up", True, (255, 255, 255))
-        screen.blit(up_arrow_surface, (leaderboard_pos[0], leaderboard_pos[1] - 20))
-    if end_index < len(sorted_bikes):
-        down_arrow_surface = font.render("↓ Scroll Down", True, (255, 255, 255))
-        screen.blit(
-            down_arrow_surface,
-            (leaderboard_pos[0], leaderboard_pos[1] + 25 + y_offset),
-        )
+        up_arrow_surface = text_cache.render(font, "↑ Scroll Up", (255, 255, 255))
+    draw_leaderboard_row(
+        "up", (leaderboard_pos[0], leaderboard_pos[1] - 20), up_arrow_surface
+    )
 
 # Handle Leaderboard Scrolling
 def handle_leaderboard_scrolling(event):
     global leaderboard_scroll_offset
-    sorted_bikes = sorted(
-        bike_data.items(), key=lambda x: x[1]["trip_miles"], reverse=True
-    )
-    max_offset = max(0, len(sorted_bikes) - LEADERBOARD_ITEMS_PER_PAGE)
+    if event.type != pygame.KEYDOWN:
+        return  # Mouse motion and the like need no ranking at all
+    max_offset = max(0, len(ranking) - LEADERBOARD_ITEMS_PER_PAGE)
 
-    if event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_UP:  # Scroll up
-            leaderboard_scroll_offset = max(0, leaderboard_scroll_offset - 1)
-        elif event.key == pygame.K_DOWN:  # Scroll down
-            leaderboard_scroll_offset = min(max_offset, leaderboard_scroll_offset + 1)
+    if event.key == pygame.K_UP:  # Scroll up
+        leaderboard_scroll_offset = max(0, leaderboard_scroll_offset - 1)
+    elif event.key == pygame.K_DOWN:  # Scroll down
+        leaderboard_scroll_offset = min(max_offset, leaderboard_scroll_offset + 1)
 
 # Update Display
-def update_display():
-    screen.fill((0, 0, 0))
-    if TRACK_IMAGE:
-        screen.blit(TRACK_IMAGE, (0, 0))
+def update_display(phases=None):
+    """Draw one frame; ``phases``, a PhaseTimer, times each step of it."""
+    frame_stats.begin()
+    phases = phases or NO_PHASES
+    phases.start()
+    take_latest_snapshot()
+    phases.mark("data")
+    compositor.begin_frame()
+    phases.mark("track")
     draw_bike_icons()
+    phases.mark("sprites")
     draw_leaderboard()
+    phases.mark("leaderboard")
     draw_metrics_under_leaderboard()
-    pygame.display.flip()
-    clock.tick(30)  # Maintain 30 FPS
+    draw_stats_overlay()
+    phases.mark("metrics")
+    dirty_rects = compositor.end_frame()
+    phases.mark("compose")
+    pygame.display.update(dirty_rects)  # Only the changed rectangles
+    phases.mark("present")
+    video.submit(screen, changed=bool(dirty_rects))
+    phases.mark("video")
+    frame_stats.end()
+
+def take_latest_snapshot():
+    """Switch to the network task's newest bikes, if there is a newer one."""
+    global bike_data, shown_generation
+    if feed.generation == shown_generation:
+        return
+    shown_generation = feed.generation
+    bike_data = feed.bikes
+    ranking.sync(bike_data)
+    assign_bike_colors()
+    if race_state is not None:
+        race_state.update(bike_data)
+
+STATS_RECT = pygame.Rect(5, 5, 420, 22)
+STATS_REFRESH = 0.25  # Seconds between overlay text updates
+stats_text = ""
+stats_refreshed_at = 0.0
+
+def draw_stats_overlay():
+    """Frame time and data age in the top-left corner, when enabled."""
+    global stats_text, stats_refreshed_at
+    if not show_stats:
+        compositor.drop_region("stats")
+        return
+    now = time.perf_counter()
+    if now - stats_refreshed_at >= STATS_REFRESH:
+        stats_text = frame_stats.format(feed.age())
+        stats_refreshed_at = now
+    text_surface = text_cache.render(small_font, stats_text, (255, 255, 0))
+
+    def draw(target):
+        target.fill((0, 0, 0), STATS_RECT)
+        target.blit(text_surface, (STATS_RECT.x + 4, STATS_RECT.y + 5))
+
+    compositor.region("stats", STATS_RECT, text_surface, draw)
 
 # Fetch Real-Time Data from FastAPI
-async def fetch_real_time_data():
-    global bike_data
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get("http://127.0.0.1:8000/bikes")
-            if response.status_code == 200:
-                bike_data = response.json()
-                assign_bike_colors()
+BIKES_URL = f"{Config.RACE_API_URL.rstrip('/')}/bikes"
+EVENTS_URL = f"{Config.RACE_API_URL.rstrip('/')}/events/bikes"
+
+async def fetch_real_time_data(client):
+    """Poll /bikes, asking only for the bikes that changed since the last poll."""
+    params = {"since": feed.version} if feed.version else {}
+    try:
+        response = await client.get(BIKES_URL, params=params)
+        if response.status_code == 304:
+            feed.confirm()  # Nothing changed
+        elif response.status_code == 200:
+            if feed.version:
+                delta = response.json()
+                feed.apply_delta(delta["bikes"], delta["removed"], delta["version"])
             else:
-                print(f"❌ Error fetching real-time data: {response.status_code}")
-        except httpx.RequestError as e:
-            print(f"❌ HTTP Request Error: {e}")
+                feed.publish(
+                    response.json(), int(response.headers.get("X-Bikes-Version", 0))
+                )
+        else:
+            print(f"❌ Error fetching real-time data: {response.status_code}")
+    except httpx.RequestError as e:
+        print(f"❌ HTTP Request Error: {e}")
+
+async def stream_bike_events(client):
+    """Apply each live update from /events/bikes as it arrives."""
+    headers = {}
+    while True:
+        try:
+            async with client.stream(
+                "GET", EVENTS_URL, headers=headers, timeout=None
+            ) as response:
+                response.raise_for_status()
+                feed.streaming = True
+                feed.refresh.set()  # Catch up on what changed while disconnected
+                async for event_id, data in read_events(response.aiter_lines()):
+                    if not data:
+                        feed.confirm()  # Keepalive: nothing changed
+                        continue
+                    headers["Last-Event-ID"] = event_id
+                    update = json.loads(data)
+                    feed.apply_delta(update["bikes"], [], update["version"])
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            print(f"❌ Bike event stream error: {e}")
+        feed.streaming = False
+        await asyncio.sleep(Config.RACE_FETCH_INTERVAL)
+
+async def network_loop(interval=None):
+    """
+    Keep the feed current; runs beside the render loop and never waits on it.
+    While the event stream is up, /bikes is only polled to catch removals.
+    """
+    interval = interval or Config.RACE_FETCH_INTERVAL
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        stream_task = None
+        if Config.RACE_STREAM:
+            stream_task = asyncio.create_task(stream_bike_events(client))
+        try:
+            while True:
+                await fetch_real_time_data(client)
+                await feed.wait_for_poll(
+                    Config.RACE_RECONCILE_INTERVAL if feed.streaming else interval
+                )
+        finally:
+            if stream_task:
+                stream_task.cancel()
+
+def draw_countdown(seconds_left):
+    screen.fill((0, 0, 0))
+    countdown_text = text_cache.render(
+        font, f"Race starts in: {seconds_left}", (255, 255, 255)
+    )
+    screen.blit(
+        countdown_text, (Config.SCREEN_WIDTH // 2 - 100, Config.SCREEN_HEIGHT // 2)
+    )
+    pygame.display.flip()
+    video.submit(screen)
+    compositor.invalidate()  # The race view repaints in full afterwards
+
+async def render(draw, *args):
+    """
+    Run one drawing step. Headless, it runs on a worker thread so a slow
+    frame never holds up the /stream.mjpg and /frame.jpg handlers sharing
+    this event loop; the loop thread only touches the drawing state between
+    frames, and the network task only swaps in new ``feed`` snapshots. A
+    window must be drawn from the thread that owns it, so it renders inline.
+    """
+    if Config.RACE_HEADLESS:
+        await asyncio.to_thread(draw, *args)
+    else:
+        draw(*args)
 
 # Main Loop
 async def main_loop():
+    global countdown_timer, show_stats
     load_assets()
     running = True
-    global countdown_timer
-
-    async def periodic_fetch():
-        while running:
-            await fetch_real_time_data()
-            await asyncio.sleep(5)
-
-    fetch_task = asyncio.create_task(periodic_fetch())
+    video.start()  # Frames may be submitted from the render thread
+    fetch_task = asyncio.create_task(network_loop())
+    pacer = FramePacer(Config.RACE_FPS)
+    countdown_ends = time.perf_counter() + countdown_timer
+    shown_countdown = None
 
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_stats = not show_stats
             handle_leaderboard_scrolling(event)
-        
+
         if countdown_timer > 0:
-            screen.fill((0, 0, 0))
-            countdown_text = font.render(f"Race starts in: {countdown_timer}", True, (255, 255, 255))
-            screen.blit(countdown_text, (Config.SCREEN_WIDTH // 2 - 100, Config.SCREEN_HEIGHT // 2))
-            pygame.display.flip()
-            await asyncio.sleep(1)
-            countdown_timer -= 1
+            countdown_timer = max(0, math.ceil(countdown_ends - time.perf_counter()))
+            if countdown_timer and countdown_timer != shown_countdown:
+                await render(draw_countdown, countdown_timer)
+                shown_countdown = countdown_timer
         else:
             if countdown_timer == 0:
-                reset_stats()
-                for bike_id, metrics in bike_data.items():
-                    bike_initial_distance[bike_id] = metrics["trip_miles"]
+                reset_stats()  # Bikes race from where they are next seen
                 countdown_timer -= 1  # Ensure this block runs only once
-            update_display()
-            await asyncio.sleep(0.03)  # Maintain 30 FPS
+            await render(update_display)
+        await pacer.wait()  # Sleep until the next frame is due
 
     fetch_task.cancel()
+    video.stop()
     pygame.quit()
-    sys.exit(0)
+
+# Served by main.py with uvicorn: the render loop runs in the background and
+# any number of screens watch the same frames over HTTP
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    render_task = asyncio.create_task(main_loop())
+    yield
+    render_task.cancel()
+    video.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.get("/stream.mjpg", tags=["Race Video"])
+async def stream_video():
+    """The race view as an MJPEG stream; open it in a browser or media player."""
+    return StreamingResponse(
+        video.stream(),
+        media_type=MJPEG_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/frame.jpg", tags=["Race Video"])
+async def latest_frame():
+    """The newest frame of the race view as a single JPEG."""
+    try:
+        jpeg = await asyncio.wait_for(video.fresh_frame(), timeout=5)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="No frame rendered yet")
+    return Response(content=jpeg, media_type="image/jpeg")
 
 def signal_handler(sig, frame):
     """Handle termination signals and gracefully shut down processes."""
@@ -310,4 +535,5 @@ if __name__ == "__main__":
     signal.signal(signal.SIGTERM, signal_handler)  # Handle termination signals
 
     # Run the main loop
-    asyncio.run(main_loop())
\ No newline at end of file
+    asyncio.run(main_loop())
+    sys.exit(0)
\ No newline at end of file
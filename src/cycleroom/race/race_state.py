@@ -0,0 +1,192 @@
+"""
+Race state for every bike, held in NumPy arrays indexed by bike slot.
+
+Each bike gets a slot the first time it is seen. Fetches write the latest
+distances into the arrays; once per frame ``step`` computes positions,
+headings, laps and race distances for all bikes at once, and the drawing code
+only reads the results.
+
+Bikes report trip distance in 0.1 mile steps, seconds apart. Given the frame
+time, ``step`` moves each bike by dead reckoning between reports: its speed is
+estimated from the last two distance changes, it is extrapolated from the
+latest report (never further than the next 0.1 mile step, which has not been
+reported yet), and the drawn distance eases toward that prediction rather
+than jumping when a new report arrives.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from race.track import Track
+
+# Largest room: equipment IDs go up to 200
+DEFAULT_CAPACITY = 200
+# Resolution of the trip distance the bikes report, in miles
+DISTANCE_STEP = 0.1
+# Weight of the newest speed sample in the running estimate
+SPEED_SMOOTHING = 0.5
+# Time constant, in seconds, for easing the drawn distance to the prediction
+CORRECTION_SECONDS = 0.5
+# Errors bigger than this (a reset odometer, a long gap) snap instead of easing
+SNAP_MILES = 0.5
+
+
+class RaceState:
+    def __init__(self, track: Track, capacity: int = DEFAULT_CAPACITY):
+        self.track = track
+        self.slots: Dict[str, int] = {}
+        self.bike_ids: List[str] = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        self.distance = np.zeros(capacity)  # Latest trip miles
+        self.start_distance = np.full(capacity, np.nan)  # Trip miles at the start
+        self.active = np.zeros(capacity, dtype=bool)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.heading = np.zeros(capacity)
+        self.laps = np.zeros(capacity, dtype=np.int32)
+        self.race_distance = np.zeros(capacity)
+        self.shown_distance = np.zeros(capacity)  # Distance drawn on the track
+        self.speed = np.zeros(capacity)  # Estimated miles per second
+        self.changed_at = np.full(capacity, np.nan)  # When distance last changed
+        self.last_step: Optional[float] = None
+
+    def _grow(self):
+        old = {
+            name: getattr(self, name)
+            for name in (
+                "distance",
+                "start_distance",
+                "active",
+                "x",
+                "y",
+                "heading",
+                "laps",
+                "race_distance",
+                "shown_distance",
+                "speed",
+                "changed_at",
+            )
+        }
+        last_step = self.last_step
+        self._allocate(self.capacity * 2)
+        for name, values in old.items():
+            getattr(self, name)[: len(values)] = values
+        self.last_step = last_step
+
+    def __len__(self):
+        return len(self.bike_ids)
+
+    def slot(self, bike_id: str) -> int:
+        """The slot of a bike, assigning the next free one if it is new."""
+        slot = self.slots.get(bike_id)
+        if slot is None:
+            if len(self.bike_ids) == self.capacity:
+                self._grow()
+            slot = self.slots[bike_id] = len(self.bike_ids)
+            self.bike_ids.append(bike_id)
+        return slot
+
+    def update(self, bike_data: Dict[str, dict], now: Optional[float] = None):
+        """Take the latest distances; bikes missing from ``bike_data`` go inactive."""
+        now = time.monotonic() if now is None else now
+        self.active[:] = False
+        for bike_id, metrics in bike_data.items():
+            known = bike_id in self.slots
+            slot = self.slot(bike_id)
+            distance = metrics.get("trip_miles", 0.0)
+            self.active[slot] = True
+            if known and distance == self.distance[slot]:
+                continue
+            if known and distance > self.distance[slot]:
+                elapsed = now - self.changed_at[slot]
+                if elapsed > 0:
+                    sample = (distance - self.distance[slot]) / elapsed
+                    previous = self.speed[slot]
+                    self.speed[slot] = (
+                        sample
+                        if previous == 0
+                        else previous + SPEED_SMOOTHING * (sample - previous)
+                    )
+            else:
+                # New bike or odometer went back: start over from this report
+                self.speed[slot] = 0.0
+                self.shown_distance[slot] = distance
+            self.distance[slot] = distance
+            self.changed_at[slot] = now
+
+    def reset(self):
+        self.slots.clear()
+        self.bike_ids.clear()
+        self._allocate(self.capacity)
+
+    def step(self, now: Optional[float] = None):
+        """
+        Compute the positions, laps and race distances of every bike. With
+        ``now``, the frame time, positions are dead-reckoned between reports;
+        without it, bikes are drawn at their reported distances.
+        """
+        count = len(self.bike_ids)
+        if not count:
+            return
+        distance = self.distance[:count]
+        start = self.start_distance[:count]
+        # Bikes that joined after the start race from where they were first seen
+        unset = np.isnan(start)
+        start[unset] = distance[unset]
+
+        if now is None:
+            shown = self.shown_distance[:count] = distance
+        else:
+            shown = self._dead_reckon(count, now)
+
+        track = self.track
+        laps = shown / track.length_miles
+        index = ((laps % 1.0) * track.resolution).astype(np.intp) % track.resolution
+        self.x[:count] = track.lut_x[index]
+        self.y[:count] = track.lut_y[index]
+        self.heading[:count] = track.lut_heading[index]
+        self.laps[:count] = np.floor(distance / track.length_miles) - np.floor(
+            start / track.length_miles
+        )
+        self.race_distance[:count] = distance - start
+
+    def _dead_reckon(self, count: int, now: float) -> np.ndarray:
+        first = self.last_step is None
+        dt = 0.0 if first else max(0.0, now - self.last_step)
+        self.last_step = now
+        distance = self.distance[:count]
+        speed = self.speed[:count]
+        shown = self.shown_distance[:count]
+
+        # Where each bike should be now, short of the next unreported step
+        since = np.maximum(now - self.changed_at[:count], 0.0)
+        ceiling = distance + DISTANCE_STEP
+        target = np.minimum(distance + speed * since, ceiling)
+
+        # Keep riding at the estimated speed, then ease off the error
+        moved = shown + speed * dt
+        moved += (target - moved) * (1.0 - np.exp(-dt / CORRECTION_SECONDS))
+        moved = np.minimum(moved, ceiling)
+        # Bikes never roll backwards unless the prediction is far off
+        np.maximum(moved, shown, out=moved)
+        snap = np.abs(target - moved) > SNAP_MILES
+        if first:
+            snap[:] = True
+        moved[snap] = target[snap]
+        shown[:] = moved
+        return shown
+
+    def position(self, bike_id: str) -> Tuple[int, int]:
+        slot = self.slots[bike_id]
+        return int(self.x[slot]), int(self.y[slot])
+
+    def lap_count(self, bike_id: str) -> int:
+        slot = self.slots.get(bike_id)
+        return 0 if slot is None else int(self.laps[slot])
+
+    def race_distance_of(self, bike_id: str) -> float:
+        slot = self.slots.get(bike_id)
+        return 0.0 if slot is None else float(self.race_distance[slot])
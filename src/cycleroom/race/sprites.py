@@ -0,0 +1,134 @@
+"""
+Per-bike sprites for the race view.
+
+``SpriteCache`` turns the bike icon into a colored sprite once per color (and
+per heading step when rotation is on): the icon's dark strokes become the
+bike's color and its light background becomes transparent. ``BikeSprites``
+remembers which sprite each RaceState slot uses and only looks a new one up
+when that bike's color or heading step changes, so a frame is one pass that
+builds the (sprite, position) list for a single ``Surface.blits`` call.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pygame
+
+Color = Tuple[int, int, int]
+
+# Rotated sprites are made for headings this many degrees apart
+ANGLE_STEP = 15
+PALETTE: Sequence[Color] = (
+    (255, 0, 0),
+    (0, 255, 0),
+    (0, 0, 255),
+    (255, 165, 0),
+    (255, 255, 0),
+)
+
+
+def ink_mask(icon: pygame.Surface) -> np.ndarray:
+    """How much ink each pixel of the icon carries, 0-255, indexed [x, y]."""
+    rgb = pygame.surfarray.array3d(icon).astype(np.float32)
+    ink = 255.0 - rgb.mean(axis=2)
+    if icon.get_flags() & pygame.SRCALPHA:
+        ink *= pygame.surfarray.array_alpha(icon) / 255.0
+    return ink.astype(np.uint8)
+
+
+class SpriteCache:
+    def __init__(self, icon: pygame.Surface, angle_step: int = ANGLE_STEP):
+        self.angle_step = angle_step
+        self._sprites: Dict[Tuple[Color, int], pygame.Surface] = {}
+        self.set_icon(icon)
+
+    def set_icon(self, icon: pygame.Surface):
+        """Use a new icon; sprites are rebuilt if its size changed."""
+        size = icon.get_size()
+        if getattr(self, "size", None) != size:
+            self._sprites.clear()
+        self.size = size
+        self._ink = ink_mask(icon)
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def _tinted(self, color: Color) -> pygame.Surface:
+        sprite = self._sprites.get((color, 0))
+        if sprite is None:
+            sprite = pygame.Surface(self.size, pygame.SRCALPHA)
+            sprite.fill(color)
+            alpha = pygame.surfarray.pixels_alpha(sprite)
+            alpha[:] = self._ink
+            del alpha  # Unlock the surface
+            self._sprites[(color, 0)] = sprite
+        return sprite
+
+    def sprite(self, color: Color, step: int = 0) -> pygame.Surface:
+        """
+        The icon in ``color``, turned to heading ``step * angle_step`` degrees
+        (screen coordinates: 0 is right, 90 is down).
+        """
+        key = (tuple(color), step)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            return sprite
+        sprite = self._tinted(key[0])
+        if step:
+            heading = step * self.angle_step
+            if 90 < heading < 270:
+                # Riding left: mirror rather than turn the bike upside down
+                sprite = pygame.transform.flip(sprite, True, False)
+                heading -= 180
+            sprite = pygame.transform.rotate(sprite, -heading)
+        self._sprites[key] = sprite
+        return sprite
+
+
+class BikeSprites:
+    def __init__(self, cache: SpriteCache, rotate: bool = False):
+        self.cache = cache
+        self.rotate = rotate
+        self._keys: List[Optional[Tuple[Color, int]]] = []
+        self._sprites: List[Optional[pygame.Surface]] = []
+        self._offsets: List[Tuple[int, int]] = []
+
+    def reset(self):
+        self._keys.clear()
+        self._sprites.clear()
+        self._offsets.clear()
+
+    def items(
+        self, state, colors: Dict[str, Color], default: Color = (255, 255, 255)
+    ) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        """(sprite, top-left) for every active bike in a stepped RaceState."""
+        count = len(state)
+        if len(self._keys) < count:
+            grow = count - len(self._keys)
+            self._keys += [None] * grow
+            self._sprites += [None] * grow
+            self._offsets += [(0, 0)] * grow
+        steps_per_turn = 360 // self.cache.angle_step
+        if self.rotate:
+            steps = np.rint(state.heading[:count] / self.cache.angle_step)
+            steps = (steps.astype(np.intp) % steps_per_turn).tolist()
+        else:
+            steps = [0] * count
+        # Sprites are centred where the unturned icon's centre would be
+        half_w, half_h = self.cache.size[0] // 2, self.cache.size[1] // 2
+        xs = (state.x[:count] + half_w).astype(np.intp).tolist()
+        ys = (state.y[:count] + half_h).astype(np.intp).tolist()
+
+        items = []
+        for slot in np.flatnonzero(state.active[:count]).tolist():
+            key = (colors.get(state.bike_ids[slot], default), steps[slot])
+            if self._keys[slot] != key:
+                sprite = self.cache.sprite(*key)
+                self._keys[slot] = key
+                self._sprites[slot] = sprite
+                self._offsets[slot] = (
+                    sprite.get_width() // 2,
+                    sprite.get_height() // 2,
+                )
+            dx, dy = self._offsets[slot]
+            items.append((self._sprites[slot], (xs[slot] - dx, ys[slot] - dy)))
+        return items
@@ -0,0 +1,104 @@
+"""
+Caches for rendered text.
+
+Rasterizing text is the most expensive thing the dashboard does, and nearly
+every string it draws is the same as on the previous frame. ``TextCache``
+keeps rendered surfaces keyed by font, text and color, evicting the least
+recently used; ``PanelCache`` keeps each bike's whole metrics panel and only
+re-renders it when one of its lines changes.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Hashable, Sequence, Tuple
+import pygame
+
+Color = Tuple[int, int, int]
+
+
+class TextCache:
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._surfaces: "OrderedDict[Hashable, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(
+        self,
+        font: pygame.font.Font,
+        text: str,
+        color: Color,
+        antialias: bool = True,
+    ) -> pygame.Surface:
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+class PanelCache:
+    """
+    One pre-composed surface per bike holding its metric lines, laid out in
+    ``columns`` columns ``column_width`` apart and ``row_height`` apart.
+    """
+
+    def __init__(
+        self,
+        text_cache: TextCache,
+        font: pygame.font.Font,
+        column_width: int = 200,
+        row_height: int = 15,
+        columns: int = 2,
+        color: Color = (255, 255, 255),
+    ):
+        self.text_cache = text_cache
+        self.font = font
+        self.column_width = column_width
+        self.row_height = row_height
+        self.columns = columns
+        self.color = color
+        self._panels: Dict[str, Tuple[Tuple[str, ...], pygame.Surface]] = {}
+        self.renders = 0
+
+    def panel(self, bike_id: str, lines: Sequence[str]) -> pygame.Surface:
+        lines = tuple(lines)
+        cached = self._panels.get(bike_id)
+        if cached is not None and cached[0] == lines:
+            return cached[1]
+        self.renders += 1
+        rows = -(-len(lines) // self.columns)
+        surface = pygame.Surface(
+            (
+                self.columns * self.column_width,
+                rows * self.row_height + self.font.get_linesize(),
+            ),
+            pygame.SRCALPHA,
+        )
+        for i, line in enumerate(lines):
+            column = i % self.columns
+            row = i // self.columns
+            surface.blit(
+                self.text_cache.render(self.font, line, self.color),
+                (column * self.column_width, row * self.row_height),
+            )
+        self._panels[bike_id] = (lines, surface)
+        return surface
+
+    def discard(self, bike_id: str):
+        self._panels.pop(bike_id, None)
+
+    def clear(self):
+        self._panels.clear()
@@ -0,0 +1,118 @@
+"""
+Track geometry: where a bike is on the course for a given distance ridden.
+
+The waypoints form a closed loop. Their segments differ in length, so
+positions are found by arc length: cumulative segment lengths are computed
+once, and a fine lookup table of (x, y, heading) samples spaced evenly along
+the loop turns any distance into a position with one index operation.
+"""
+
+import bisect
+import json
+import math
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# Samples in the distance -> position lookup table
+LUT_RESOLUTION = 4096
+
+Point = Tuple[float, float]
+
+
+def load_waypoints(path: str) -> List[Point]:
+    """Read waypoints saved as [{"x", "y"}, ...] or [[x, y], ...]."""
+    with open(path, "r") as f:
+        raw = json.load(f)
+    return [
+        (wp["x"], wp["y"]) if isinstance(wp, dict) else (wp[0], wp[1]) for wp in raw
+    ]
+
+
+class Track:
+    def __init__(
+        self,
+        waypoints: Sequence[Point],
+        length_miles: float,
+        resolution: int = LUT_RESOLUTION,
+        tables: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+        cumulative: Optional[np.ndarray] = None,
+    ):
+        """
+        Args:
+            waypoints:    Points of the loop in screen pixels; the last one
+                          joins back to the first.
+            length_miles: Distance ridden for one lap.
+            resolution:   Number of samples in the lookup table.
+            tables:       The lookup table's (x, y, heading) columns, already
+                          computed for these waypoints (see race.compiled_track).
+            cumulative:   Arc length at each waypoint plus the perimeter, also
+                          computed already.
+        """
+        if len(waypoints) < 2:
+            raise ValueError("A track needs at least two waypoints")
+        self.waypoints = [tuple(p) for p in waypoints]
+        self.length_miles = length_miles
+        self.resolution = resolution
+
+        points = np.asarray(waypoints, dtype=np.float64)
+        segments = np.roll(points, -1, axis=0) - points
+        if cumulative is not None:
+            self.cumulative = np.asarray(cumulative, dtype=np.float64)
+            lengths = np.diff(self.cumulative)
+        else:
+            lengths = np.hypot(segments[:, 0], segments[:, 1])
+            # cumulative[i] is the arc length at waypoint i; the last entry
+            # closes the loop and is the perimeter
+            self.cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+        self.perimeter = float(self.cumulative[-1])
+        self._points = points
+        self._segments = segments
+        self._lengths = np.maximum(lengths, 1e-9)
+        self._cumulative_list = self.cumulative.tolist()
+
+        if tables is not None:
+            self.lut_x, self.lut_y, self.lut_heading = tables
+            self.resolution = len(self.lut_x)
+        else:
+            samples = np.arange(resolution) * (self.perimeter / resolution)
+            self.lut_x, self.lut_y, self.lut_heading = self._interpolate(samples)
+
+    @classmethod
+    def load(cls, path: str, length_miles: float, **kwargs) -> "Track":
+        return cls(load_waypoints(path), length_miles, **kwargs)
+
+    def _interpolate(self, arc: np.ndarray):
+        """Exact (x, y, heading) at arc lengths in [0, perimeter)."""
+        index = np.searchsorted(self.cumulative, arc, side="right") - 1
+        index = np.clip(index, 0, len(self._lengths) - 1)
+        progress = (arc - self.cumulative[index]) / self._lengths[index]
+        xy = self._points[index] + self._segments[index] * progress[:, None]
+        heading = np.degrees(
+            np.arctan2(self._segments[index, 1], self._segments[index, 0])
+        )
+        return xy[:, 0], xy[:, 1], heading
+
+    def laps(self, distance_miles: float) -> int:
+        """Complete laps in a distance."""
+        return int(distance_miles // self.length_miles)
+
+    def lap_fraction(self, distance_miles: float) -> float:
+        """How far around the current lap a distance is, in [0, 1)."""
+        return (distance_miles / self.length_miles) % 1.0
+
+    def position(self, distance_miles: float) -> Tuple[float, float, float]:
+        """
+        (x, y, heading) from the lookup table. Heading is in degrees in screen
+        coordinates: 0 points right and 90 points down.
+        """
+        i = int(self.lap_fraction(distance_miles) * self.resolution) % self.resolution
+        return self.lut_x[i], self.lut_y[i], self.lut_heading[i]
+
+    def exact_position(self, distance_miles: float) -> Tuple[float, float, float]:
+        """(x, y, heading) interpolated between waypoints, found by bisection."""
+        arc = self.lap_fraction(distance_miles) * self.perimeter
+        i = bisect.bisect_right(self._cumulative_list, arc) - 1
+        i = min(max(i, 0), len(self.waypoints) - 1)
+        progress = (arc - self._cumulative_list[i]) / self._lengths[i]
+        (x, y), (dx, dy) = self.waypoints[i], self._segments[i]
+        return x + dx * progress, y + dy * progress, math.degrees(math.atan2(dy, dx))
@@ -0,0 +1,164 @@
+"""
+Render once, stream to many: the race view as an MJPEG stream.
+
+The render loop hands each finished frame to a ``FrameBroadcaster``. Raw
+pixels are copied out on the render thread (a plain memory copy), which may
+be a worker thread once ``start`` has been called on the event loop; JPEG
+encoding runs on a worker thread and only keeps the newest frame, so a slow
+encode drops frames instead of holding up rendering. Every viewer then
+receives the same encoded bytes. A viewer always gets the newest frame when
+it is ready for one, so a slow screen skips frames instead of building up a
+backlog, and nothing is encoded while nobody is watching.
+"""
+
+import asyncio
+import io
+import logging
+import threading
+import time
+from typing import AsyncIterator, Optional, Tuple
+import pygame
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = "frame"
+MJPEG_MEDIA_TYPE = f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+
+
+def encode_jpeg(raw: bytes, size: Tuple[int, int]) -> bytes:
+    """JPEG bytes for an RGB frame from ``pygame.image.tobytes``."""
+    image = pygame.image.frombuffer(raw, size, "RGB")
+    buffer = io.BytesIO()
+    pygame.image.save(image, buffer, "frame.jpg")
+    return buffer.getvalue()
+
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+        f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n"
+    )
+
+
+class FrameBroadcaster:
+    def __init__(self, fps: float = 10):
+        self.interval = 1.0 / fps
+        self.viewers = 0
+        self.jpeg: Optional[bytes] = None
+        self.sequence = 0  # Number of frames encoded so far
+        self.encoded = 0
+        self.skipped = 0  # Frames replaced before the encoder got to them
+        self._stale = True  # The screen changed since the last submitted frame
+        self._last_submit = 0.0
+        self._pending: Optional[Tuple[bytes, Tuple[int, int]]] = None
+        self._lock = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._new_frame: Optional[asyncio.Event] = None
+
+    def submit(self, surface: pygame.Surface, changed: bool = True):
+        """
+        Offer the frame just drawn. It is encoded only if someone is watching,
+        the screen changed since the last encoded frame and the stream's frame
+        interval has passed.
+        """
+        self._stale = self._stale or changed
+        if not self.viewers or not self._stale:
+            return
+        now = time.monotonic()
+        if now - self._last_submit < self.interval:
+            return
+        self._last_submit = now
+        self._stale = False
+        frame = (pygame.image.tobytes(surface, "RGB"), surface.get_size())
+        self.start()
+        with self._lock:
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = frame
+            self._lock.notify()
+
+    def start(self):
+        """Start the encoder; must run on the event loop serving the viewers."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._new_frame = asyncio.Event()
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._encode_loop, name="race-video-encoder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._lock.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _encode_loop(self):
+        while True:
+            with self._lock:
+                while self._running and self._pending is None:
+                    self._lock.wait()
+                if not self._running:
+                    return
+                raw, size = self._pending
+                self._pending = None
+            try:
+                jpeg = encode_jpeg(raw, size)
+            except (pygame.error, ValueError) as e:
+                logger.error(f"❌ Frame encoding failed: {e}")
+                continue
+            self.encoded += 1
+            try:
+                self._loop.call_soon_threadsafe(self._publish, jpeg)
+            except RuntimeError:
+                return  # The event loop has closed
+
+    def _publish(self, jpeg: bytes):
+        self.jpeg = jpeg
+        self.sequence += 1
+        # Wake everyone waiting and give later waiters a fresh event
+        event, self._new_frame = self._new_frame, asyncio.Event()
+        event.set()
+
+    def watch(self):
+        """Count a viewer in; frames are encoded while anyone is watching."""
+        self.viewers += 1
+        self._stale = True  # Make sure the newcomer gets a current frame
+
+    def unwatch(self):
+        self.viewers -= 1
+
+    async def next_frame(self, after: int) -> Tuple[int, bytes]:
+        """The newest frame with a sequence number above ``after``."""
+        while self.sequence <= after or self.jpeg is None:
+            if self._new_frame is None:
+                await asyncio.sleep(self.interval)  # Encoder not started yet
+            else:
+                await self._new_frame.wait()
+        return self.sequence, self.jpeg
+
+    async def fresh_frame(self) -> bytes:
+        """A frame encoded after this call, for one-off requests."""
+        self.watch()
+        try:
+            _, jpeg = await self.next_frame(self.sequence)
+            return jpeg
+        finally:
+            self.unwatch()
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """MJPEG parts for one viewer, newest frame first, never queued up."""
+        self.watch()
+        try:
+            sequence = self.sequence  # Start from a frame drawn from now on
+            while True:
+                sequence, jpeg = await self.next_frame(sequence)
+                yield mjpeg_part(jpeg)
+        finally:
+            self.unwatch()
@@ -0,0 +1,48 @@
+"""
+Latency and throughput bookkeeping shared by the replay and load tools.
+"""
+
+import math
+from typing import Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values; 0 when empty."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LatencyStats:
+    """Collects latency samples in seconds and summarises them in milliseconds."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def summary(self) -> Dict[str, float]:
+        values = sorted(self.samples)
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+    def format(self) -> str:
+        s = self.summary()
+        return (
+            f"p50 {s['p50_ms']:.1f} ms, p95 {s['p95_ms']:.1f} ms, "
+            f"p99 {s['p99_ms']:.1f} ms, max {s['max_ms']:.1f} ms"
+        )
+
+
+def rate(count: int, seconds: float) -> float:
+    return count / seconds if seconds > 0 else 0.0
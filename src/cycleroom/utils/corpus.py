@@ -0,0 +1,188 @@
+"""
+Generate large corpora of valid Keiser M3 advertisements with NumPy.
+
+    python -m utils.corpus corpus.cap --packets 5000000 --bikes 200 --seed 1
+
+``simbledata.generate_m3_data`` builds one packet at a time in Python; here
+every field is a column array, the rides of all bikes are simulated at once
+and the payloads are packed with a handful of array assignments. The corpus is
+written as a binary capture (``backend.utils.capture``) next to
+``<name>.truth.npy``, which holds the values the parser must decode from each
+packet, in the same order.
+"""
+
+import argparse
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from backend.utils.capture import RECORD_DTYPE, write_capture
+
+PAYLOAD_LENGTH = 19
+KM_PER_MILE = 1.60934
+
+# Version bytes are BCD coded; 6.30 reports the gear
+VERSION_MAJOR = 0x06
+VERSION_MINOR = 0x30
+
+# What Parser.parse() returns for each packet
+TRUTH_DTYPE = np.dtype(
+    [
+        ("id", "u1"),
+        ("cadence", "u2"),  # RPM
+        ("heart_rate", "u2"),  # BPM
+        ("power", "u2"),  # Watts
+        ("energy", "u2"),  # kcal
+        ("time", "u2"),  # Seconds
+        ("trip", "f8"),  # Kilometres
+        ("gear", "u1"),
+    ]
+)
+
+
+def simulate_columns(
+    count: int, bikes: int, rate: float, rng: np.random.Generator
+) -> Dict[str, np.ndarray]:
+    """
+    Raw M3 field values for ``count`` packets from ``bikes`` riders.
+
+    Every bike advertises ``rate`` times a second, staggered so the packets
+    come out in receive-time order. Cadence and power drift as random walks
+    around each rider's own effort level; distance, calories and duration
+    accumulate from them.
+    """
+    ticks = -(-count // bikes)
+    dt = 1 / rate
+    shape = (ticks, bikes)
+
+    base_cadence = rng.uniform(65, 95, bikes)
+    base_power = rng.uniform(80, 250, bikes)
+    cadence = np.clip(
+        base_cadence + np.cumsum(rng.normal(0, 0.4, shape), axis=0), 0, 160
+    )
+    power = np.clip(base_power + np.cumsum(rng.normal(0, 1.5, shape), axis=0), 0, 999)
+    heart_rate = np.clip(90 + power * 0.35 + rng.normal(0, 1, shape), 40, 220)
+    gear = np.clip(
+        rng.integers(8, 15, bikes) + np.cumsum(rng.random(shape) < 0.002, axis=0),
+        1,
+        24,
+    )
+    elapsed = np.arange(1, ticks + 1)[:, None] * dt + rng.uniform(0, 600, bikes)
+    speed_mph = cadence * gear * 0.0125
+    distance = np.cumsum(speed_mph * dt / 3600, axis=0)  # Miles
+    calories = np.cumsum(power * dt / 1000, axis=0)
+
+    seconds = np.minimum(elapsed.astype(np.int64), 255 * 60 + 59)
+    ts = np.arange(ticks)[:, None] * dt + np.arange(bikes) * (dt / bikes)
+
+    def flat(values, dtype):
+        return np.ascontiguousarray(values, dtype=dtype).reshape(-1)[:count]
+
+    return {
+        "ts": flat(ts, np.float64),
+        "equipment_id": flat(np.broadcast_to(np.arange(1, bikes + 1), shape), np.uint8),
+        "cadence": flat(cadence * 10, np.uint16),
+        "heart_rate": flat(heart_rate * 10, np.uint16),
+        "power": flat(power, np.uint16),
+        "caloric_burn": flat(np.minimum(calories, 65535), np.uint16),
+        "duration_minutes": flat(seconds // 60, np.uint8),
+        "duration_seconds": flat(seconds % 60, np.uint8),
+        "distance": flat(np.minimum(distance * 10, 999), np.uint16),
+        "gear": flat(gear, np.uint8),
+    }
+
+
+def pack_payloads(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Build the (count, 19) byte array of M3 manufacturer payloads."""
+    count = len(columns["equipment_id"])
+    payloads = np.empty((count, PAYLOAD_LENGTH), dtype=np.uint8)
+    payloads[:, 0] = 0x02  # Same prefix as generate_m3_data
+    payloads[:, 1] = 0x01
+    payloads[:, 2] = VERSION_MAJOR
+    payloads[:, 3] = VERSION_MINOR
+    payloads[:, 4] = 0  # Real-time data
+    payloads[:, 5] = columns["equipment_id"]
+    for offset, name in (
+        (6, "cadence"),
+        (8, "heart_rate"),
+        (10, "power"),
+        (12, "caloric_burn"),
+        (16, "distance"),  # Miles: the metric bit is left clear
+    ):
+        payloads[:, offset : offset + 2] = (
+            columns[name].astype("<u2").view(np.uint8).reshape(count, 2)
+        )
+    payloads[:, 14] = columns["duration_minutes"]
+    payloads[:, 15] = columns["duration_seconds"]
+    payloads[:, 18] = columns["gear"]
+    return payloads
+
+
+def decode_truth(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    truth = np.empty(len(columns["equipment_id"]), dtype=TRUTH_DTYPE)
+    truth["id"] = columns["equipment_id"]
+    truth["cadence"] = columns["cadence"] // 10
+    truth["heart_rate"] = columns["heart_rate"] // 10
+    truth["power"] = columns["power"]
+    truth["energy"] = columns["caloric_burn"]
+    truth["time"] = (
+        columns["duration_minutes"].astype(np.uint16) * 60 + columns["duration_seconds"]
+    )
+    truth["trip"] = columns["distance"] / 10.0 * KM_PER_MILE
+    truth["gear"] = columns["gear"]
+    return truth
+
+
+def generate_corpus(
+    count: int, bikes: int = 200, rate: float = 4.0, seed=None, start: float = 0.0
+) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Returns capture records, their address table and the decoded truth."""
+    bikes = max(1, min(bikes, 200))
+    columns = simulate_columns(count, bikes, rate, np.random.default_rng(seed))
+    payloads = pack_payloads(columns)
+
+    records = np.zeros(count, dtype=RECORD_DTYPE)
+    records["ts"] = start + columns["ts"]
+    records["address"] = columns["equipment_id"] - 1
+    records["rssi"] = -60
+    records["length"] = PAYLOAD_LENGTH
+    records["payload"][:, :PAYLOAD_LENGTH] = payloads
+    addresses = [f"5E:00:00:00:00:{bike:02X}" for bike in range(1, bikes + 1)]
+    return records, addresses, decode_truth(columns)
+
+
+def truth_path(capture_path: str) -> str:
+    stem = capture_path[:-4] if capture_path.endswith(".cap") else capture_path
+    return f"{stem}.truth.npy"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic M3 corpus.")
+    parser.add_argument("output", help="Capture file to write, e.g. corpus.cap")
+    parser.add_argument("--packets", type=int, default=1_000_000)
+    parser.add_argument("--bikes", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=4.0, help="Hz per bike")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--start",
+        type=float,
+        default=time.time(),
+        help="Receive time of the first packet, seconds since the epoch",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    records, addresses, truth = generate_corpus(
+        args.packets, args.bikes, args.rate, args.seed, args.start
+    )
+    generated = time.perf_counter() - started
+    write_capture(args.output, records, addresses)
+    np.save(truth_path(args.output), truth)
+    print(
+        f"Generated {len(records)} packets in {generated:.2f} s "
+        f"({len(records) / max(generated, 1e-9):,.0f} packets/s); "
+        f"wrote {args.output} and {truth_path(args.output)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
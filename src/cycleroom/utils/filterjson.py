@@ -1,58 +1,112 @@
-import pandas as pd
-import json
-from datetime import datetime, timedelta
+"""
+Filter a phone sensor-logger export down to the Keiser M3 bikes.
+
+    python -m utils.filterjson 2025-02-09_17-11-56.json filtered_output.ndjson
+    python -m utils.filterjson 2025-02-09_17-11-56.json ride.cap
+
+The export is streamed: entries are decoded, checked against the M3 device IDs
+from the Bluetooth metadata CSV and written out one at a time, so memory use
+stays flat however big the file is. A ``.cap`` output is a binary capture
+(``backend/utils/capture.py``) of the M3 advertisements; anything else is
+compact NDJSON with the other sensors kept, as before.
+"""
+
+import argparse
+import csv
+import time
+from datetime import datetime, timezone
+from typing import Set
+from backend.utils.capture import CaptureWriter
+from backend.utils.recordings import (
+    NdjsonWriter,
+    entry_to_advertisement,
+    iter_json_file,
+)
 
 # File Paths
 metadata_file = "BluetoothMetadata.csv"
 json_file = "2025-02-09_17-11-56.json"
-output_file = "filtered_output.json"
-
-# ✅ Load the Bluetooth metadata CSV
-metadata_df = pd.read_csv(metadata_file)
-
-# ✅ Extract device IDs where `name` is "M3"
-m3_device_ids = set(metadata_df.loc[metadata_df["name"] == "M3", "id"].dropna())
-
-# ✅ Load JSON file
-with open(json_file, "r", encoding="utf-8") as file:
-    json_data = json.load(file)
-
-# Count before filtering
-before_count = len(json_data)
-
-# ✅ Filter JSON records to keep only M3 Bluetooth devices
-filtered_json_data = []
-valid_times = []
-for entry in json_data:
-    entry_time_ns = entry.get("time")
-    if entry_time_ns:
-        try:
-            entry_time = datetime.utcfromtimestamp(
-                int(entry_time_ns) / 1e9
-            )  # Convert nanoseconds to seconds
-            valid_times.append(entry_time)
-            if entry.get("sensor") != "Bluetooth" or entry.get("id") in m3_device_ids:
-                filtered_json_data.append(entry)
-        except ValueError:
-            continue  # Skip entries with invalid time format
-
-# Count after filtering
-after_count = len(filtered_json_data)
-
-# Compute time difference if valid times exist
-if valid_times:
-    first_time = min(valid_times)
-    last_time = max(valid_times)
-    time_difference = last_time - first_time
-    print(f"🕒 First record time: {first_time}")
-    print(f"🕒 Last record time: {last_time}")
-    print(f"⏳ Time difference: {time_difference}")
-
-# ✅ Save the filtered JSON data
-with open(output_file, "w", encoding="utf-8") as file:
-    json.dump(filtered_json_data, file, indent=4)
-
-# Display results
-print(f"📊 Records before filtering: {before_count}")
-print(f"✅ Records after filtering: {after_count}")
-print(f"💾 Filtered JSON saved as: {output_file}")
+output_file = "filtered_output.ndjson"
+
+
+def load_m3_ids(path: str) -> Set[str]:
+    """Device IDs whose `name` is "M3" in the Bluetooth metadata CSV."""
+    with open(path, newline="", encoding="utf-8") as file:
+        return {
+            row["id"] for row in csv.DictReader(file) if row.get("name") == "M3"
+        } - {""}
+
+
+def keep_entry(entry: dict, m3_ids: Set[str]) -> bool:
+    return entry.get("sensor") != "Bluetooth" or entry.get("id") in m3_ids
+
+
+def filter_recording(source: str, output: str, m3_ids: Set[str]):
+    """Stream ``source`` into ``output``; returns (read, written, first, last)."""
+    to_capture = output.lower().endswith(".cap")
+    writer = CaptureWriter(output) if to_capture else NdjsonWriter(output)
+    read = written = 0
+    first_ns = last_ns = None
+    with writer:
+        for entry in iter_json_file(source):
+            read += 1
+            try:
+                entry_time_ns = int(entry.get("time") or 0)
+            except (TypeError, ValueError):
+                continue  # Skip entries with invalid time format
+            if not entry_time_ns:
+                continue
+            first_ns = (
+                entry_time_ns if first_ns is None else min(first_ns, entry_time_ns)
+            )
+            last_ns = entry_time_ns if last_ns is None else max(last_ns, entry_time_ns)
+            if not keep_entry(entry, m3_ids):
+                continue
+            if to_capture:
+                packet = entry_to_advertisement(entry)
+                if packet and writer.write(packet):
+                    written += 1
+            else:
+                writer.write(entry)
+                written += 1
+    return read, written, first_ns, last_ns
+
+
+def as_datetime(time_ns: int) -> datetime:
+    return datetime.fromtimestamp(time_ns / 1e9, tz=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep only M3 Bluetooth records.")
+    parser.add_argument("json_file", nargs="?", default=json_file)
+    parser.add_argument("output_file", nargs="?", default=output_file)
+    parser.add_argument("--metadata", default=metadata_file)
+    args = parser.parse_args()
+
+    m3_device_ids = load_m3_ids(args.metadata)
+    started = time.perf_counter()
+    before_count, after_count, first_ns, last_ns = filter_recording(
+        args.json_file, args.output_file, m3_device_ids
+    )
+    elapsed = time.perf_counter() - started
+
+    # Compute time difference if valid times exist
+    if first_ns is not None:
+        first_time = as_datetime(first_ns)
+        last_time = as_datetime(last_ns)
+        print(f"🕒 First record time: {first_time}")
+        print(f"🕒 Last record time: {last_time}")
+        print(f"⏳ Time difference: {last_time - first_time}")
+
+    # Display results
+    print(f"📊 Records before filtering: {before_count}")
+    print(f"✅ Records after filtering: {after_count}")
+    print(
+        f"⚡ Processed in {elapsed:.2f} s "
+        f"({before_count / max(elapsed, 1e-9):,.0f} records/s)"
+    )
+    print(f"💾 Filtered records saved as: {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,83 +32,105 @@ except Exception as e:
     logger.error(f"Unexpected error importing KeiserM3BLEBroadcast: {e}")
     sys.exit(1)
 
-# Hard code the JSON file path
-json_file = "/home/glen/cycleroom-v2/src/cycleroom/utils/filtered_output.json"
+from backend.utils.recordings import iter_json_file
 
-# Load JSON data from file
-try:
-    with open(json_file, "r") as file:
-        data = json.load(file)
-except FileNotFoundError as e:
-    logger.error(f"File not found: {json_file}")
-    sys.exit(1)
-except json.JSONDecodeError as e:
-    logger.error(f"Error decoding JSON from file {json_file}: {e}")
-    sys.exit(1)
-
-# Extract Bluetooth data
-bluetooth_records = [entry for entry in data if "seconds_elapsed" in entry]
-
-# Sort records by time (to ensure correct scheduling)
-bluetooth_records.sort(key=lambda x: float(x["seconds_elapsed"]))
+# Hard code the JSON file path; filterjson.py writes NDJSON, older JSON arrays work too
+json_file = "/home/glen/cycleroom-v2/src/cycleroom/utils/filtered_output.ndjson"
 
 server_url = "http://127.0.0.1:8000/sessions"
 
-# Get start time to sync delays
-start_time = time.time()
-
-# Process records one by one
-for index, record in enumerate(bluetooth_records):
-    manufacturer_data_hex = record.get("manufacturerData", "").strip()
-    bluetooth_mac = record.get("id", "UNKNOWN_DEVICE")
-
-    # Skip if `manufacturerData` is missing or empty
-    if not manufacturer_data_hex:
-        logger.warning(f"⚠️ Skipping device {bluetooth_mac} - No manufacturer data")
-        continue
-
-    # Skip invalid hex format
-    if not all(c in "0123456789abcdefABCDEF" for c in manufacturer_data_hex):
-        logger.error(
-            f"❌ Skipping device {bluetooth_mac} - Invalid manufacturer data format: {manufacturer_data_hex}"
-        )
-        continue
 
+def iter_bluetooth_records(path):
+    """Stream the records that carry timing, in file order (chronological)."""
     try:
-        # Convert hex string to bytes
-        manufacturer_data_bytes = bytes.fromhex(manufacturer_data_hex)
+        for entry in iter_json_file(path):
+            if "seconds_elapsed" in entry:
+                yield entry
+    except FileNotFoundError:
+        logger.error(f"File not found: {path}")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding JSON from file {path}: {e}")
+        sys.exit(1)
+
+
+def main():
+    parser = ArgumentParser(description="Replay a filtered recording into /sessions.")
+    parser.add_argument("json_file", nargs="?", default=json_file)
+    parser.add_argument("--server-url", default=server_url)
+    args = parser.parse_args()
+
+    # Get start time to sync delays
+    start_time = time.time()
+    processed = 0
+
+    session = requests.Session()  # Reuse one connection for every record
+
+    # Process records one by one
+    for record in iter_bluetooth_records(args.json_file):
+        processed += 1
+        manufacturer_data_hex = record.get("manufacturerData", "").strip()
+        bluetooth_mac = record.get("id", "UNKNOWN_DEVICE")
+
+        # Skip if `manufacturerData` is missing or empty
+        if not manufacturer_data_hex:
+            logger.warning(f"⚠️ Skipping device {bluetooth_mac} - No manufacturer data")
+            continue
+
+        # Skip invalid hex format
+        if not all(c in "0123456789abcdefABCDEF" for c in manufacturer_data_hex):
+            logger.error(
+                f"❌ Skipping device {bluetooth_mac} - Invalid manufacturer data format: {manufacturer_data_hex}"
+            )
+            continue
 
-        # Parse the manufacturer data
-        parsed_data = KeiserM3BLEBroadcast(manufacturer_data_bytes).to_dict()
+        try:
+            # Convert hex string to bytes
+            manufacturer_data_bytes = bytes.fromhex(manufacturer_data_hex)
 
-        if parsed_data:
-            # Extract the correct `equipment_id` from parsed data
-            equipment_id = str(parsed_data.get("ordinal_id", bluetooth_mac))
-            parsed_data["equipment_id"] = equipment_id
-            parsed_data["bluetooth_mac"] = bluetooth_mac
+            # Parse the manufacturer data
+            parsed_data = KeiserM3BLEBroadcast(manufacturer_data_bytes).to_dict()
 
-            # Calculate Delay Based on `seconds_elapsed`
-            elapsed_time = float(record["seconds_elapsed"])
-            current_time = time.time()
-            delay = max(0, start_time + elapsed_time - current_time)
+            if parsed_data:
+                # Extract the correct `equipment_id` from parsed data
+                equipment_id = str(parsed_data.get("ordinal_id", bluetooth_mac))
+                parsed_data["equipment_id"] = equipment_id
+                parsed_data["bluetooth_mac"] = bluetooth_mac
 
-            logger.info(
-                f"⏳ Waiting {delay:.2f} sec before sending data for Equipment {equipment_id}..."
+                # Calculate Delay Based on `seconds_elapsed`
+                elapsed_time = float(record["seconds_elapsed"])
+                current_time = time.time()
+                delay = max(0, start_time + elapsed_time - current_time)
+
+                logger.info(
+                    f"⏳ Waiting {delay:.2f} sec before sending data for Equipment {equipment_id}..."
+                )
+                time.sleep(delay)  # Wait to match `seconds_elapsed`
+
+                # Send parsed data to the server
+                response = session.post(args.server_url, json=parsed_data)
+
+                if response.status_code == 200:
+                    logger.info(
+                        f"✅ Successfully sent data for Equipment {equipment_id}"
+                    )
+                else:
+                    logger.error(
+                        f"❌ Failed to send data for {equipment_id}: {response.text}"
+                    )
+
+        except Exception as e:
+            logger.error(
+                f"🔥 BLE Parsing Error for device {bluetooth_mac} - Data: {manufacturer_data_hex}"
             )
-            time.sleep(delay)  # Wait to match `seconds_elapsed`
+            logger.error(f"   Exception: {e}")
 
-            # Send parsed data to the server
-            response = requests.post(server_url, json=parsed_data)
+    duration = time.time() - start_time
+    logger.info(
+        f"📊 Processed {processed} records in {duration:.1f} sec "
+        f"({processed / max(duration, 1e-9):.1f} records/s)"
+    )
 
-            if response.status_code == 200:
-                logger.info(f"✅ Successfully sent data for Equipment {equipment_id}")
-            else:
-                logger.error(
-                    f"❌ Failed to send data for {equipment_id}: {response.text}"
-                )
 
-    except Exception as e:
-        logger.error(
-            f"🔥 BLE Parsing Error for device {bluetooth_mac} - Data: {manufacturer_data_hex}"
-        )
-        logger.error(f"   Exception: {e}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Load generator: a room full of virtual bikes against a running server.
+
+    python -m utils.loadgen --bikes 200 --rate 4 --duration 60 --viewers 20
+    python -m utils.loadgen --bikes 100 --aggregate-rate 2000 --scanners 4
+
+Each virtual bike rides an evolving profile (see ``VirtualBike``) and
+advertises ``--rate`` times a second. The bikes are split across
+``--scanners`` simulated scanner hosts, which post their packets to the batch
+ingest endpoint once per advertising interval, like the real uplink.
+``--viewers`` SSE clients subscribe to ``/events/bikes`` and time how long it
+takes from posting a packet to seeing its metrics broadcast.
+
+The report covers the sustained packet rate against the target, request and
+packet error rates, request latency and ingest-to-broadcast latency.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+import httpx
+from backend.packet_sources import VirtualBike
+from backend.routes.parse_raw_data import Parser, live_metrics
+from backend.utils.advertisement import Advertisement
+from utils.benchmark import LatencyStats, rate
+from utils.replay import ReplayReport, post_batch
+
+logger = logging.getLogger(__name__)
+
+SERVER_URL = "http://127.0.0.1:8000"
+MAX_BIKES = 200
+# Sent metrics not seen by any viewer within this many seconds are forgotten
+MATCH_TIMEOUT = 10.0
+
+
+def metrics_key(bike_id: str, metrics: Dict) -> Tuple[str, str]:
+    return bike_id, json.dumps(metrics, sort_keys=True)
+
+
+class BroadcastTracker:
+    """Matches metrics seen by viewers with the time they were posted."""
+
+    def __init__(self):
+        self.sent_at: Dict[Tuple[str, str], float] = {}
+        self.latency = LatencyStats()
+        self.broadcasts = 0
+        self.unmatched = 0
+
+    def sent(self, packet: Advertisement):
+        parsed = Parser.parse(packet.address, packet.payload, packet.rssi)
+        key = metrics_key(str(parsed.id), live_metrics(parsed))
+        # Unchanged metrics are not broadcast again; time the first post
+        self.sent_at.setdefault(key, time.monotonic())
+
+    def received(self, bikes: Dict[str, Dict]):
+        now = time.monotonic()
+        self.broadcasts += 1
+        for bike_id, metrics in bikes.items():
+            sent_at = self.sent_at.get(metrics_key(bike_id, metrics))
+            if sent_at is None:
+                self.unmatched += 1
+            else:
+                self.latency.record(now - sent_at)
+
+    def prune(self):
+        cutoff = time.monotonic() - MATCH_TIMEOUT
+        self.sent_at = {k: t for k, t in self.sent_at.items() if t >= cutoff}
+
+
+async def watch_events(
+    client: httpx.AsyncClient, url: str, tracker: BroadcastTracker, ready
+):
+    """One SSE viewer of the bikes room."""
+    try:
+        async with client.stream("GET", url, timeout=None) as response:
+            ready.set()
+            data = []
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    tracker.received(json.loads("\n".join(data)).get("bikes", {}))
+                    data = []
+    except httpx.RequestError as e:
+        logger.error(f"❌ Viewer disconnected: {e}")
+    finally:
+        ready.set()
+
+
+async def ride(
+    client: httpx.AsyncClient,
+    ingest_url: str,
+    bikes: List[VirtualBike],
+    scanners: int,
+    interval: float,
+    duration: float,
+    concurrency: int,
+    report: ReplayReport,
+    tracker: BroadcastTracker,
+):
+    """Advance every bike once per interval and post one batch per scanner."""
+    slots = asyncio.Semaphore(concurrency)
+    in_flight = set()
+
+    async def send(source, batch):
+        try:
+            await post_batch(client, ingest_url, source, batch, report)
+        finally:
+            slots.release()
+
+    started = time.monotonic()
+    tick = 0
+    while tick * interval < duration:
+        now = time.time()
+        batches: List[List[Advertisement]] = [[] for _ in range(scanners)]
+        for index, bike in enumerate(bikes):
+            bike.step(interval)
+            packet = Advertisement(bike.address, -60, now, bike.payload(), "loadgen")
+            batches[index % scanners].append(packet)
+        for number, batch in enumerate(batches):
+            if not batch:
+                continue
+            await slots.acquire()
+            for packet in batch:
+                tracker.sent(packet)
+            task = asyncio.create_task(send(f"loadgen-{number + 1}", batch))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        tick += 1
+        if tick % 20 == 0:
+            tracker.prune()
+        delay = started + tick * interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run_load(
+    server: str = SERVER_URL,
+    bikes: int = 40,
+    rate_hz: float = 4.0,
+    duration: float = 30.0,
+    viewers: int = 1,
+    scanners: int = 1,
+    concurrency: int = 16,
+    seed: Optional[int] = None,
+    client: Optional[httpx.AsyncClient] = None,
+):
+    """Run one load test; returns the ingest report and the broadcast tracker."""
+    rng = random.Random(seed)
+    riders = [VirtualBike(i, rng) for i in range(1, min(bikes, MAX_BIKES) + 1)]
+    report = ReplayReport()
+    tracker = BroadcastTracker()
+
+    own_client = client is None
+    if own_client:
+        connections = concurrency + viewers
+        client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=connections, max_keepalive_connections=connections
+            ),
+        )
+    watchers = []
+    try:
+        events_url = urljoin(server, "/events/bikes")
+        for _ in range(viewers):
+            ready = asyncio.Event()
+            watchers.append(
+                asyncio.create_task(watch_events(client, events_url, tracker, ready))
+            )
+            await ready.wait()
+
+        started = time.monotonic()
+        await ride(
+            client,
+            urljoin(server, "/parse_raw_data/batch"),
+            riders,
+            max(1, scanners),
+            1 / rate_hz,
+            duration,
+            concurrency,
+            report,
+            tracker,
+        )
+        report.elapsed = time.monotonic() - started
+        # Give the last broadcasts time to reach the viewers
+        await asyncio.sleep(min(1.0, duration))
+    finally:
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+        if own_client:
+            await client.aclose()
+    return report, tracker
+
+
+def format_report(report: ReplayReport, tracker: BroadcastTracker, target: float):
+    failed = report.failed_requests
+    bad_packets = report.packets - report.accepted - (report.duplicates or 0)
+    return "\n".join(
+        [
+            f"Target:      {target:.0f} packets/s",
+            f"Sustained:   {rate(report.packets, report.elapsed):.0f} packets/s "
+            f"over {report.elapsed:.1f} s ({report.packets} packets)",
+            f"Errors:      {failed} of {report.requests} requests "
+            f"({rate(failed, report.requests) * 100:.2f}%), "
+            f"{bad_packets} packets not accepted "
+            f"({rate(bad_packets, report.packets) * 100:.2f}%)",
+            f"Request:     {report.latency.format()}",
+            f"Broadcast:   {tracker.latency.format()} "
+            f"({tracker.broadcasts} events, {tracker.unmatched} unmatched bikes)",
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive the ingest endpoint with simulated bikes."
+    )
+    parser.add_argument("--server", default=SERVER_URL)
+    parser.add_argument("--bikes", type=int, default=40, help="Up to 200")
+    parser.add_argument(
+        "--rate", type=float, default=4.0, help="Advertisements per bike per second"
+    )
+    parser.add_argument(
+        "--aggregate-rate",
+        type=float,
+        help="Total packets per second; overrides --rate",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument("--viewers", type=int, default=1, help="SSE viewers")
+    parser.add_argument("--scanners", type=int, default=1, help="Scanner hosts")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    bikes = min(args.bikes, MAX_BIKES)
+    rate_hz = args.aggregate_rate / bikes if args.aggregate_rate else args.rate
+    print(
+        f"Simulating {bikes} bikes at {rate_hz:g} Hz through {args.scanners} "
+        f"scanners with {args.viewers} viewers for {args.duration:g} s..."
+    )
+    report, tracker = asyncio.run(
+        run_load(
+            server=args.server,
+            bikes=bikes,
+            rate_hz=rate_hz,
+            duration=args.duration,
+            viewers=args.viewers,
+            scanners=args.scanners,
+            concurrency=args.concurrency,
+            seed=args.seed,
+        )
+    )
+    print(format_report(report, tracker, bikes * rate_hz))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Replay recorded BLE captures into the batch ingest endpoint.
+
+    python -m utils.replay captures/class.json --speed 60
+    python -m utils.replay captures/*.csv --speed 0 --concurrency 16
+
+``--speed 1`` keeps the original timing, ``--speed 60`` replays an hour-long
+class in a minute and ``--speed 0`` sends as fast as the server accepts.
+Packets are grouped into batches the way the scanner uplink sends them, and up
+to ``--concurrency`` batches are in flight at once. When the server cannot keep
+up the replay falls behind schedule instead of queueing without bound; the
+final report shows by how much, along with throughput and request latency.
+
+Receive times are shifted so the capture starts when the replay does; pass
+``--keep-timestamps`` to write them unchanged.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+import httpx
+from backend.utils.advertisement import Advertisement
+from backend.utils.recordings import iter_recordings
+from utils.benchmark import LatencyStats, rate
+
+logger = logging.getLogger(__name__)
+
+INGEST_URL = os.getenv("INGEST_URL", "http://127.0.0.1:8000/parse_raw_data/batch")
+
+
+class ReplayReport:
+    def __init__(self):
+        self.packets = 0
+        self.accepted = 0
+        self.rejected = 0
+        # Dropped by the server's cross-adapter merger; None until a response
+        # reports the count
+        self.duplicates: Optional[int] = None
+        self.requests = 0
+        self.failed_requests = 0
+        self.max_lag = 0.0  # Seconds the replay fell behind schedule
+        self.elapsed = 0.0
+        self.latency = LatencyStats()
+
+    def format_duplicates(self) -> str:
+        if self.duplicates is None:
+            return "duplicates not reported"
+        return f"{self.duplicates} duplicates"
+
+    def format(self) -> str:
+        return "\n".join(
+            [
+                f"Packets:     {self.packets} sent, {self.accepted} accepted, "
+                f"{self.rejected} rejected, {self.format_duplicates()}",
+                f"Requests:    {self.requests} sent, {self.failed_requests} failed",
+                f"Elapsed:     {self.elapsed:.2f} s "
+                f"(fell behind schedule by up to {self.max_lag:.2f} s)",
+                f"Throughput:  {rate(self.packets, self.elapsed):.0f} packets/s, "
+                f"{rate(self.requests, self.elapsed):.1f} requests/s",
+                f"Latency:     {self.latency.format()}",
+            ]
+        )
+
+
+def schedule_batches(
+    packets: List[Advertisement], batch_size: int, speed: float, max_delay: float
+) -> Iterator[Tuple[float, List[Advertisement]]]:
+    """
+    Group packets into batches, each with the offset in seconds from the start
+    of the replay at which it is due.
+
+    A batch is due when its last packet would have been heard. It is closed
+    once it is full or the next packet is due more than ``max_delay`` after
+    its first one, so batching never delays a packet by more than that.
+    """
+    if not packets:
+        return
+    first_ts = packets[0].ts
+    batch: List[Advertisement] = []
+    opened = previous_due = due = 0.0
+    for packet in packets:
+        due = (packet.ts - first_ts) / speed if speed > 0 else 0.0
+        if batch and (len(batch) >= batch_size or due - opened > max_delay):
+            yield previous_due, batch
+            batch = []
+        if not batch:
+            opened = due
+        batch.append(packet)
+        previous_due = due
+    yield due, batch
+
+
+async def post_batch(
+    client: httpx.AsyncClient,
+    url: str,
+    source: str,
+    batch: List[Advertisement],
+    report: ReplayReport,
+):
+    body = {
+        "source": source,
+        "packets": [
+            {
+                "address": packet.address,
+                "rssi": packet.rssi,
+                "ts": packet.ts,
+                "data": packet.payload.hex(),
+                "source": packet.source,
+            }
+            for packet in batch
+        ],
+    }
+    report.requests += 1
+    report.packets += len(batch)
+    started = time.perf_counter()
+    try:
+        response = await client.post(url, json=body)
+    except httpx.RequestError as e:
+        report.failed_requests += 1
+        logger.error(f"❌ Error sending replay batch: {e}")
+        return
+    report.latency.record(time.perf_counter() - started)
+    if response.status_code != 200:
+        report.failed_requests += 1
+        logger.error(f"❌ Replay batch failed. Status Code: {response.status_code}")
+        return
+    result = response.json()
+    report.accepted += result.get("accepted", 0)
+    report.rejected += result.get("rejected", 0)
+    if "duplicates" in result:
+        report.duplicates = (report.duplicates or 0) + result["duplicates"]
+
+
+async def replay(
+    packets: List[Advertisement],
+    url: str = INGEST_URL,
+    speed: float = 1.0,
+    concurrency: int = 8,
+    batch_size: int = 500,
+    max_delay: float = 0.05,
+    source: str = "replay",
+    keep_timestamps: bool = False,
+    client: Optional[httpx.AsyncClient] = None,
+) -> ReplayReport:
+    """Send ``packets`` (sorted by receive time) to ``url``; see the module docs."""
+    report = ReplayReport()
+    if not packets:
+        return report
+    if not keep_timestamps:
+        shift = time.time() - packets[0].ts
+        packets = [packet._replace(ts=packet.ts + shift) for packet in packets]
+
+    own_client = client is None
+    if own_client:
+        client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+        )
+    slots = asyncio.Semaphore(concurrency)
+    in_flight = set()
+
+    async def send(batch):
+        try:
+            await post_batch(client, url, source, batch, report)
+        finally:
+            slots.release()
+
+    started = time.monotonic()
+    try:
+        for due, batch in schedule_batches(packets, batch_size, speed, max_delay):
+            delay = started + due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await slots.acquire()
+            report.max_lag = max(report.max_lag, time.monotonic() - started - due)
+            task = asyncio.create_task(send(batch))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+    finally:
+        report.elapsed = time.monotonic() - started
+        if own_client:
+            await client.aclose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay BLE captures into the ingest endpoint."
+    )
+    parser.add_argument("captures", nargs="+", help="JSON or CSV capture files")
+    parser.add_argument("--url", default=INGEST_URL, help="Batch ingest endpoint")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Time multiplier; 1 is real time, 0 is as fast as possible",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Batches in flight at once"
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=0.05,
+        help="Seconds a packet may wait for its batch to fill",
+    )
+    parser.add_argument("--source", default="replay", help="Scanner name to report")
+    parser.add_argument("--keep-timestamps", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    packets = list(iter_recordings(args.captures))
+    if not packets:
+        print("No BLE packets found in the captures.")
+        return
+    span = packets[-1].ts - packets[0].ts
+    print(
+        f"Replaying {len(packets)} packets spanning {span:.1f} s to {args.url} "
+        f"at {'max' if args.speed <= 0 else f'{args.speed:g}x'} speed..."
+    )
+    report = asyncio.run(
+        replay(
+            packets,
+            url=args.url,
+            speed=args.speed,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            max_delay=args.max_delay,
+            source=args.source,
+            keep_timestamps=args.keep_timestamps,
+        )
+    )
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
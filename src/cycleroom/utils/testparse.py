@@ -6,8 +6,10 @@ import logging
 import argparse
 import time
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timezone
-from multiprocessing import Process
+from itertools import islice
+from backend.utils.recordings import iter_csv_recording
 
 # Configure logger
 logging.basicConfig(level=logging.INFO)
@@ -111,8 +113,8 @@ def hex_string_to_byte_array(hex_string):
         return None
 
 
-def send_parsed_data_to_api(parsed_data, server_url):
-    """Send parsed data to the API"""
+def send_parsed_data_to_api(parsed_data, server_url, session=requests):
+    """Send parsed data to the API, over ``session`` to reuse its connection"""
     data = {
         "equipment_id": parsed_data.ID,
         "timestamp": datetime.now(timezone.utc).isoformat(),  # Add a timestamp
@@ -126,7 +128,7 @@ def send_parsed_data_to_api(parsed_data, server_url):
         "distance": parsed_data.Trip,
     }
 
-    response = requests.post(server_url, json=data)
+    response = session.post(server_url, json=data)
     if response.status_code == 200:
         logger.info(f"✅ Successfully sent data for UUID {parsed_data.ID}")
     else:
@@ -137,7 +139,7 @@ def send_parsed_data_to_api(parsed_data, server_url):
 
 def process_csv_file(csv_file, server_url):
     """Read and process the CSV file, then send data to the API"""
-    with open(csv_file, newline="") as file:
+    with open(csv_file, newline="") as file, requests.Session() as session:
         reader = csv.reader(file)
         header = next(reader)  # Skip header row
 
@@ -171,7 +173,7 @@ def process_csv_file(csv_file, server_url):
             time.sleep(delay)
 
             # Send parsed data to the API
-            send_parsed_data_to_api(parsed_data, server_url)
+            send_parsed_data_to_api(parsed_data, server_url, session)
 
 
 def find_csv_files(directory):
@@ -181,18 +183,125 @@ def find_csv_files(directory):
     ]
 
 
-def process_files_in_directory(directory, server_url):
-    """Process all CSV files in the directory"""
-    csv_files = find_csv_files(directory)
-    processes = []
-
-    for csv_file in csv_files:
-        p = Process(target=process_csv_file, args=(csv_file, server_url))
-        p.start()
-        processes.append(p)
+def process_files_in_directory(directory, server_url, workers=None):
+    """
+    Replay all CSV files in the directory to the API in real time.
+
+    Like ``bulk_import``, at most ``workers`` files (default: one per core)
+    are replayed at once; further files start as earlier ones finish. Each
+    file keeps one connection open for all of its requests.
+    """
+    csv_files = sorted(find_csv_files(directory))
+    if not csv_files:
+        logger.warning(f"⚠️ No CSV files found in {directory}")
+        return
+
+    workers = min(workers or os.cpu_count() or 1, len(csv_files))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(process_csv_file, csv_file, server_url)
+            for csv_file in csv_files
+        ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"❌ Replay worker failed: {e}")
+
+
+def write_to_influx(records):
+    """Write (parsed, timestamp_ms) pairs to InfluxDB in one request"""
+    from backend.utils.influx_writer import write_broadcast_batch
+
+    success, error = write_broadcast_batch(records)
+    if not success:
+        raise RuntimeError(f"InfluxDB write failed: {error}")
+
+
+def import_csv_file(csv_file, batch_size=500, write_batch=write_to_influx):
+    """
+    Bulk-import one CSV file, in file order and as fast as possible.
+
+    Rows are read and decoded a batch at a time; invalid packets are dropped
+    and the rest written with ``write_batch`` (straight to InfluxDB), so old
+    rides never reach live viewers or the live bike state. Runs in a worker
+    process and returns a summary.
+    """
+    from backend.routes.parse_raw_data import Parser
+
+    started = time.time()
+    source = os.path.basename(csv_file)
+    summary = {"file": source, "rows": 0, "accepted": 0, "rejected": 0, "failed": 0}
+    packets = iter_csv_recording(csv_file)
+    while True:
+        batch = list(islice(packets, batch_size))
+        if not batch:
+            break
+        summary["rows"] += len(batch)
+        records = []
+        for packet in batch:
+            parsed = Parser.parse(packet.address, packet.payload, rssi=packet.rssi)
+            if parsed.is_valid:
+                records.append((parsed, int(packet.ts * 1000)))
+        summary["rejected"] += len(batch) - len(records)
+        if not records:
+            continue
+        try:
+            write_batch(records)
+            summary["accepted"] += len(records)
+        except RuntimeError as e:
+            summary["failed"] += len(records)
+            logger.error(f"❌ Failed to import a batch from {source}: {e}")
+    summary["seconds"] = time.time() - started
+    return summary
+
+
+def bulk_import(directory, workers=None, batch_size=500, write_batch=write_to_influx):
+    """
+    Import every CSV file in the directory with a pool of worker processes.
+
+    At most ``workers`` files (default: one per core) are processed at once,
+    each by a single worker so its rows stay in order. ``write_batch`` runs
+    in the workers, so it must be a module-level function.
+    """
+    csv_files = sorted(find_csv_files(directory))
+    totals = {"files": 0, "rows": 0, "accepted": 0, "rejected": 0, "failed": 0}
+    if not csv_files:
+        logger.warning(f"⚠️ No CSV files found in {directory}")
+        return totals
+
+    workers = min(workers or os.cpu_count() or 1, len(csv_files))
+    logger.info(f"📂 Importing {len(csv_files)} files with {workers} workers...")
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(import_csv_file, csv_file, batch_size, write_batch)
+            for csv_file in csv_files
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                summary = future.result()
+            except Exception as e:
+                logger.error(f"❌ Import worker failed: {e}")
+                continue
+            totals["files"] += 1
+            for key in ("rows", "accepted", "rejected", "failed"):
+                totals[key] += summary[key]
+            logger.info(
+                f"📦 [{done}/{len(csv_files)}] {summary['file']}: "
+                f"{summary['rows']} rows, {summary['accepted']} accepted in "
+                f"{summary['seconds']:.1f}s | total {totals['rows']} rows, "
+                f"{totals['rows'] / max(time.time() - started, 1e-9):.0f} rows/s"
+            )
 
-    for p in processes:
-        p.join()
+    elapsed = time.time() - started
+    logger.info(
+        f"✅ Imported {totals['files']} files: {totals['rows']} rows, "
+        f"{totals['accepted']} accepted, {totals['rejected']} rejected, "
+        f"{totals['failed']} failed in {elapsed:.1f}s "
+        f"({totals['rows'] / max(elapsed, 1e-9):.0f} rows/s)"
+    )
+    return totals
 
 
 if __name__ == "__main__":
@@ -212,7 +321,28 @@ if __name__ == "__main__":
         default="http://127.0.0.1:8000/sessions",
         help="Server URL to send data to",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Write straight to InfluxDB as fast as possible instead of "
+        "replaying to the server in real time",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Files imported or replayed at once",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Rows per InfluxDB write in bulk mode",
+    )
     args = parser.parse_args()
 
-    # Process the CSV files in the directory and send data to the API
-    process_files_in_directory(args.directory, args.server_url)
+    if args.bulk:
+        bulk_import(args.directory, workers=args.workers, batch_size=args.batch_size)
+    else:
+        # Process the CSV files in the directory and send data to the API
+        process_files_in_directory(args.directory, args.server_url, args.workers)
@@ -0,0 +1,58 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from backend.utils.backplane import (
+    InProcessBackplane,
+    SocketBackplane,
+)
+
+
+class TestBackplane(unittest.IsolatedAsyncioTestCase):
+    async def test_in_process_delivers_to_handler(self):
+        received = []
+
+        async def handler(room, event_id, data):
+            received.append((room, data))
+
+        backplane = InProcessBackplane()
+        backplane.set_handler(handler)
+        await backplane.publish("12", {"power": 150})
+
+        self.assertEqual(received, [("12", {"power": 150})])
+
+    async def test_unix_socket_reaches_every_worker(self):
+        path = os.path.join(tempfile.mkdtemp(), "backplane.sock")
+        received = {"a": [], "b": []}
+        workers = []
+        for name in received:
+
+            async def handler(room, event_id, data, name=name):
+                received[name].append((room, data))
+
+            worker = SocketBackplane(f"unix://{path}")
+            worker.set_handler(handler)
+            await worker.start()
+            workers.append(worker)
+
+        # Wait until both workers are connected to the elected broker
+        for _ in range(100):
+            if all(w._writer is not None for w in workers):
+                break
+            await asyncio.sleep(0.05)
+
+        await workers[1].publish("7", {"cadence": 85})
+        for _ in range(100):
+            if all(received.values()):
+                break
+            await asyncio.sleep(0.01)
+
+        for worker in workers:
+            await worker.stop()
+
+        self.assertEqual(received["a"], [("7", {"cadence": 85})])
+        self.assertEqual(received["b"], [("7", {"cadence": 85})])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+from backend.utils.bike_state import BikeStateStore
+from backend.utils.fanout import event_time_ms, new_event_id
+
+
+class TestBikeStateStore(unittest.TestCase):
+    def test_unchanged_snapshot_keeps_version_and_etag(self):
+        store = BikeStateStore()
+        store.apply_snapshot({"1": {"trip_miles": 1.0}})
+        version, etag = store.version, store.etag()
+
+        self.assertEqual(store.apply_snapshot({"1": {"trip_miles": 1.0}}), [])
+        self.assertEqual(store.version, version)
+        self.assertEqual(store.etag(), etag)
+
+    def test_changed_since_returns_only_newer_bikes(self):
+        store = BikeStateStore()
+        store.apply_snapshot({"1": {"trip_miles": 1.0}, "2": {"trip_miles": 2.0}})
+        version = store.version
+
+        store.apply_snapshot({"1": {"trip_miles": 1.5}, "3": {"trip_miles": 0.1}})
+        bikes, removed = store.changed_since(version)
+
+        self.assertGreater(store.version, version)
+        self.assertEqual(bikes, {"1": {"trip_miles": 1.5}, "3": {"trip_miles": 0.1}})
+        self.assertEqual(removed, ["2"])
+
+    def test_live_versions_agree_between_workers(self):
+        messages = [
+            (new_event_id(), {"1": {"trip_miles": 1.0}, "2": {"trip_miles": 2.0}}),
+            (new_event_id(), {"1": {"trip_miles": 1.5}}),
+            (new_event_id(), {"2": {"trip_miles": 2.5}}),
+        ]
+        first, second = BikeStateStore(), BikeStateStore()
+        versions = []
+        # The second worker applies the same messages a while later
+        for store, delay in ((first, 0), (second, 60)):
+            with patch("time.time", return_value=1e10 + delay):
+                for event_id, bikes in messages:
+                    store.apply_live(bikes, event_time_ms(event_id))
+            versions.append(store.version)
+
+        self.assertEqual(versions[0], versions[1])
+        self.assertEqual(first.bike_versions, second.bike_versions)
+        since = event_time_ms(messages[1][0])
+        self.assertEqual(first.changed_since(since), second.changed_since(since))
+
+    def test_update_merges_fields(self):
+        store = BikeStateStore()
+        self.assertTrue(store.update("1", {"trip_miles": 1.0, "gear": 10}))
+        self.assertFalse(store.update("1", {"gear": 10}))
+        self.assertTrue(store.update("1", {"gear": 12}))
+        self.assertEqual(store.bikes["1"], {"trip_miles": 1.0, "gear": 12})
+
+    def test_leaderboard_follows_updates_and_removals(self):
+        store = BikeStateStore()
+        store.apply_snapshot({"1": {"trip_miles": 1.0}, "2": {"trip_miles": 2.0}})
+        store.update("1", {"trip_miles": 2.5})
+        store.apply_snapshot({"1": {"trip_miles": 2.5}, "3": {"trip_miles": 0.5}})
+
+        board = store.leaderboard(offset=1, limit=5)
+        self.assertEqual(board["total"], 2)
+        self.assertEqual(
+            board["bikes"], [{"rank": 2, "bike_id": "3", "trip_miles": 0.5}]
+        )
+        self.assertEqual(store.ranking.rank("1"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
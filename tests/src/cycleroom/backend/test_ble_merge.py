@@ -0,0 +1,68 @@
+import unittest
+from backend.ble_merge import AdvertisementMerger
+
+# A recorded capture: (address, payload) in the order the bikes sent them
+RECORDING = [
+    ("AA", b"\x06\x1e\x00\x01"),
+    ("BB", b"\x06\x1e\x00\x02"),
+    ("AA", b"\x06\x1e\x00\x01"),  # Bike repeating an unchanged payload
+    ("AA", b"\x06\x1e\x01\x01"),
+    ("BB", b"\x06\x1e\x01\x02"),
+]
+
+
+class FakeAdapter:
+    """Replays the recording as heard by one adapter."""
+
+    def __init__(self, name, rssi, missed=()):
+        self.name = name
+        self.rssi = rssi
+        self.missed = set(missed)
+
+    def packets(self):
+        for index, (address, payload) in enumerate(RECORDING):
+            if index not in self.missed:
+                yield index, address, self.rssi[address], payload
+
+
+class TestAdvertisementMerger(unittest.TestCase):
+    def replay(self, adapters, window):
+        emitted = []
+        merger = AdvertisementMerger(lambda *packet: emitted.append(packet), window)
+        streams = [list(adapter.packets()) for adapter in adapters]
+        for index in range(len(RECORDING)):
+            for adapter, stream in zip(adapters, streams):
+                for packet_index, address, rssi, payload in stream:
+                    if packet_index == index:
+                        merger.offer(adapter.name, address, rssi, index, payload)
+        merger.flush(force=True)
+        return merger, emitted
+
+    def test_merged_stream_is_deduplicated_per_bike(self):
+        near_aa = FakeAdapter("hci0", {"AA": -50, "BB": -90}, missed=[4])
+        near_bb = FakeAdapter("hci1", {"AA": -85, "BB": -45}, missed=[0])
+        merger, emitted = self.replay([near_aa, near_bb], window=0.05)
+
+        self.assertEqual(
+            [(address, payload) for address, _, _, payload, _ in emitted],
+            [RECORDING[0], RECORDING[1], RECORDING[3], RECORDING[4]],
+        )
+        # Each packet is tagged with the adapter closest to that bike
+        self.assertEqual(
+            [source for *_, source in emitted], ["hci0", "hci1", "hci0", "hci1"]
+        )
+        self.assertEqual(merger.duplicates, 4)
+        self.assertEqual(merger.sources["hci0"].received, 4)
+        self.assertEqual(merger.sources["hci1"].received, 4)
+
+    def test_zero_window_emits_first_copy_immediately(self):
+        emitted = []
+        merger = AdvertisementMerger(lambda *packet: emitted.append(packet))
+
+        self.assertTrue(merger.offer("a", "AA", -80, 0.0, b"\x01"))
+        self.assertFalse(merger.offer("b", "AA", -40, 0.0, b"\x01"))
+        self.assertEqual([source for *_, source in emitted], ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
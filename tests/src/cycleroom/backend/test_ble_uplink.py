@@ -0,0 +1,52 @@
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import httpx
+from backend import ble_listener
+from backend.ble_listener import ScanStats, detection_callback, send_batch
+
+
+class TestBleUplink(unittest.IsolatedAsyncioTestCase):
+    async def test_callback_queues_only_keiser_packets(self):
+        queue = asyncio.Queue()
+        with patch.object(ble_listener, "packet_queue", queue), patch.object(
+            ble_listener, "scan_stats", ScanStats()
+        ):
+            keiser = SimpleNamespace(name="M3", address="AA")
+            phone = SimpleNamespace(name="Phone", address="BB")
+            detection_callback(
+                keiser, SimpleNamespace(manufacturer_data={0x0645: b"\x06"}, rssi=-60)
+            )
+            detection_callback(
+                phone, SimpleNamespace(manufacturer_data={0x004C: b"\x01"}, rssi=-40)
+            )
+
+        self.assertEqual(queue.qsize(), 1)
+        packet = queue.get_nowait()
+        self.assertEqual((packet.address, packet.rssi), ("AA", -60))
+        self.assertEqual(packet.payload, b"\x06")
+
+    async def test_send_batch_posts_all_packets_in_one_request(self):
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(200, json={"status": "success"})
+
+        stats = ScanStats()
+        batch = [
+            ble_listener.Advertisement("AA", -60, 1.0, b"\x06\x1e"),
+            ble_listener.Advertisement("BB", -70, 1.1, b"\x06\x1f"),
+        ]
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await send_batch(client, "http://server/parse_raw_data/batch", batch, stats)
+
+        self.assertEqual(len(requests), 1)
+        self.assertEqual([p["data"] for p in requests[0]["packets"]], ["061e", "061f"])
+        self.assertEqual(stats.uplinked, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
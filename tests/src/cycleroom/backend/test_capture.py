@@ -0,0 +1,129 @@
+import json
+import os
+import struct
+import tempfile
+import unittest
+import numpy as np
+from backend.utils.advertisement import Advertisement
+from backend.utils.capture import (
+    MAGIC,
+    RECORD_DTYPE,
+    Capture,
+    CaptureError,
+    convert,
+    records_from_advertisements,
+    write_capture,
+)
+from backend.utils.recordings import read_recording
+
+
+class TestCapture(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rng = np.random.default_rng(5)
+        times = np.sort(rng.uniform(0, 100, 3000))
+        self.packets = [
+            Advertisement(f"AA:{i % 7:02X}", -50 - i % 30, ts, bytes([2, 1, i % 256]))
+            for i, ts in enumerate(times)
+        ]
+        records, addresses = records_from_advertisements(self.packets)
+        self.path = os.path.join(self.directory, "ride.cap")
+        # A small stride so slices cross several index blocks
+        write_capture(self.path, records, addresses, stride=64)
+
+    def test_time_slices_are_views(self):
+        times = np.array([p.ts for p in self.packets])
+        with Capture(self.path) as capture:
+            self.assertEqual(len(capture), 3000)
+            for start, end in [(10.0, 20.5), (-1, 0.01), (99.9, 200), (50, 50)]:
+                expected = np.count_nonzero((times >= start) & (times < end))
+                records = capture.between(start, end)
+                self.assertEqual(len(records), expected)
+                if len(records):
+                    self.assertTrue(np.shares_memory(records, capture.records))
+                    self.assertGreaterEqual(records["ts"].min(), start)
+                    self.assertLess(records["ts"].max(), end)
+            del records
+
+    def test_address_slices(self):
+        with Capture(self.path) as capture:
+            records = capture.for_address("AA:03", 25.0, 75.0)
+            expected = [
+                p for p in self.packets if p.address == "AA:03" and 25 <= p.ts < 75
+            ]
+            self.assertEqual(capture.advertisements(records), expected)
+            self.assertEqual(len(capture.for_address("unknown")), 0)
+
+    def test_convert_json_recording(self):
+        source = os.path.join(self.directory, "ride.json")
+        with open(source, "w") as file:
+            json.dump(
+                [
+                    {
+                        "sensor": "bluetooth-M3",
+                        "id": "BB",
+                        "rssi": "-70",
+                        "manufacturerData": "0201063000",
+                        "seconds_elapsed": "2.5",
+                    },
+                    {"sensor": "Location", "seconds_elapsed": "1.0"},
+                    {
+                        "sensor": "bluetooth-M3",
+                        "id": "AA",
+                        "rssi": "-60",
+                        "manufacturerData": "0201",
+                        "seconds_elapsed": "1.5",
+                    },
+                ],
+                file,
+            )
+        output = os.path.join(self.directory, "converted.cap")
+        self.assertEqual(convert([source], output), 2)
+        self.assertEqual(
+            [(p.address, p.payload) for p in read_recording(output)],
+            [("AA", b"\x02\x01"), ("BB", bytes.fromhex("0201063000"))],
+        )
+
+    def test_rejects_other_files(self):
+        path = os.path.join(self.directory, "not-a-capture.cap")
+        with open(path, "wb") as file:
+            file.write(b"[]" * 64)
+        with self.assertRaises(CaptureError):
+            Capture(path)
+
+    def test_reads_version_1_captures_without_indexes(self):
+        records, addresses = records_from_advertisements(self.packets)
+        table = "\n".join(addresses).encode()
+        header = struct.pack(
+            "<8sHHIQQQ",
+            MAGIC,
+            1,
+            RECORD_DTYPE.itemsize,
+            len(addresses),
+            len(records),
+            64,
+            64 + records.nbytes,
+        )
+        path = os.path.join(self.directory, "old.cap")
+        with open(path, "wb") as file:
+            file.write(header.ljust(64, b"\0") + records.tobytes() + table)
+
+        with Capture(path) as old, Capture(self.path) as new:
+            self.assertEqual(old.addresses, new.addresses)
+            self.assertEqual(old.records.tobytes(), new.records.tobytes())
+            self.assertEqual(len(old.between(10.0, 20.5)), len(new.between(10.0, 20.5)))
+            self.assertEqual(
+                old.for_address("AA:03").tobytes(), new.for_address("AA:03").tobytes()
+            )
+
+    def test_rejects_unknown_versions(self):
+        path = os.path.join(self.directory, "future.cap")
+        header = struct.pack("<8sHH", MAGIC, 99, RECORD_DTYPE.itemsize)
+        with open(path, "wb") as file:
+            file.write(header.ljust(128, b"\0"))
+        with self.assertRaisesRegex(CaptureError, "version 99"):
+            Capture(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
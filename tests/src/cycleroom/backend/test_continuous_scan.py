@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from bleak.exc import BleakError
+from backend import ble_listener
+from backend.ble_listener import (
+    ScanStats,
+    make_detection_callback,
+    scan_continuously,
+)
+
+
+class FakeScanner:
+    """Emits advertisements at a fixed rate while started."""
+
+    def __init__(self, callback, rate=200, fail_starts=0):
+        self.callback = callback
+        self.rate = rate
+        self.fail_starts = fail_starts
+        self.emitted = 0
+        self._task = None
+
+    async def start(self):
+        if self.fail_starts:
+            self.fail_starts -= 1
+            raise BleakError("adapter not ready")
+        self._task = asyncio.create_task(self._emit())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _emit(self):
+        device = SimpleNamespace(name="Phone", address="AA:BB")
+        advertisement = SimpleNamespace(manufacturer_data={0x004C: b"\x01"})
+        while True:
+            self.emitted += 1
+            self.callback(device, advertisement)
+            await asyncio.sleep(1 / self.rate)
+
+
+class TestContinuousScan(unittest.IsolatedAsyncioTestCase):
+    async def run_scan(self, scanners, seconds):
+        stats = ScanStats()
+
+        def factory(callback):
+            return scanners.pop(0)(callback)
+
+        with patch.object(ble_listener, "scan_stats", stats), patch.object(
+            ble_listener, "SCAN_HEALTH_INTERVAL", 0.05
+        ), patch.object(ble_listener, "SCAN_RESTART_DELAY", 0.01):
+            task = asyncio.create_task(
+                scan_continuously(
+                    factory,
+                    stats=stats,
+                    callback=make_detection_callback("fake", stats),
+                )
+            )
+            await asyncio.sleep(seconds)
+            task.cancel()
+        return stats
+
+    async def test_captures_every_advertisement_without_restarts(self):
+        created = []
+
+        def make(callback):
+            created.append(FakeScanner(callback))
+            return created[-1]
+
+        stats = await self.run_scan([make], 0.5)
+
+        self.assertEqual(stats.restarts, 0)
+        self.assertEqual(stats.packets, created[0].emitted)
+
+    async def test_restarts_only_after_adapter_failure(self):
+        created = []
+
+        def failing(callback):
+            created.append(FakeScanner(callback, fail_starts=1))
+            return created[-1]
+
+        def healthy(callback):
+            created.append(FakeScanner(callback))
+            return created[-1]
+
+        stats = await self.run_scan([failing, healthy], 0.3)
+
+        self.assertEqual(stats.restarts, 1)
+        self.assertEqual(stats.last_error, "adapter not ready")
+        self.assertGreater(stats.packets, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from backend.utils.fanout import FanoutHub
+
+
+class TestFanoutHub(unittest.IsolatedAsyncioTestCase):
+    async def test_publish_reaches_subscribers_of_room_only(self):
+        hub = FanoutHub()
+        bike_12, _ = hub.subscribe("12")
+        bike_13, _ = hub.subscribe("13")
+
+        self.assertEqual(hub.publish("12", "1", {"power": 150}), 1)
+
+        self.assertEqual(await bike_12.get(), ("1", {"power": 150}))
+        self.assertTrue(bike_13.queue.empty())
+
+    async def test_resume_replays_events_after_last_event_id(self):
+        hub = FanoutHub(replay_size=3)
+        for event_id in ["1", "2", "3", "4"]:
+            hub.publish("12", event_id, {"seq": event_id})
+
+        _, backlog = hub.subscribe("12", last_event_id="2")
+        self.assertEqual([event_id for event_id, _ in backlog], ["3", "4"])
+
+        # An ID that fell out of the ring replays everything still buffered
+        _, backlog = hub.subscribe("12", last_event_id="1")
+        self.assertEqual([event_id for event_id, _ in backlog], ["2", "3", "4"])
+
+        _, backlog = hub.subscribe("12")
+        self.assertEqual(backlog, [])
+
+    async def test_slow_subscriber_drops_oldest(self):
+        hub = FanoutHub(queue_size=2)
+        subscription, _ = hub.subscribe("12")
+        for event_id in ["1", "2", "3"]:
+            hub.publish("12", event_id, {})
+
+        self.assertEqual(subscription.dropped, 1)
+        self.assertEqual((await subscription.get())[0], "2")
+
+
+if __name__ == "__main__":
+    unittest.main()
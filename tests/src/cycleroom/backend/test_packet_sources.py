@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from bleak.exc import BleakError
+from backend import packet_sources
+from backend.packet_sources import KEISER_COMPANY_ID, create_packet_source
+from backend.routes.parse_raw_data import Parser
+
+
+class FakeBleakScanner:
+    """Refuses to start passive scans, as BlueZ without --experimental does."""
+
+    built = []
+
+    def __init__(self, callback, scanning_mode="active", **kwargs):
+        self.scanning_mode = scanning_mode
+        self.started = False
+        FakeBleakScanner.built.append(self)
+
+    async def start(self):
+        if self.scanning_mode == "passive":
+            raise BleakError("passive scanning on Linux requires BlueZ >= 5.56")
+        self.started = True
+
+    async def stop(self):
+        self.started = False
+
+
+def write_json_capture(entries):
+    path = os.path.join(tempfile.mkdtemp(), "capture.json")
+    with open(path, "w") as file:
+        json.dump(entries, file)
+    return path
+
+
+class TestPacketSources(unittest.IsolatedAsyncioTestCase):
+    async def replay(self, spec):
+        received = []
+
+        def callback(device, advertisement_data):
+            received.append(
+                (
+                    device.address,
+                    advertisement_data.manufacturer_data[KEISER_COMPANY_ID],
+                )
+            )
+
+        source = create_packet_source(spec, callback)
+        await source.start()
+        await source.finished.wait()
+        return received
+
+    async def test_json_replay_as_fast_as_possible_keeps_order(self):
+        path = write_json_capture(
+            [
+                {
+                    "sensor": "bluetooth-M3",
+                    "id": "BB",
+                    "rssi": "-70",
+                    "manufacturerData": "0602",
+                    "seconds_elapsed": "2.0",
+                },
+                {"sensor": "Location", "seconds_elapsed": "1.5"},
+                {
+                    "sensor": "bluetooth-M3",
+                    "id": "AA",
+                    "rssi": "-60",
+                    "manufacturerData": "0601",
+                    "seconds_elapsed": "1.0",
+                },
+            ]
+        )
+        received = await self.replay(f"replay:{path}?speed=0")
+        self.assertEqual(received, [("AA", b"\x06\x01"), ("BB", b"\x06\x02")])
+
+    async def test_csv_replay_is_time_scaled(self):
+        path = os.path.join(tempfile.mkdtemp(), "capture.csv")
+        with open(path, "w") as file:
+            file.write("time,seconds_elapsed,rssi,id,manufacturerData\n")
+            file.write("1700000000000000000,0.0,-60,AA,0601\n")
+            file.write("1700000001000000000,1.0,-60,AA,0602\n")
+
+        started = time.monotonic()
+        received = await self.replay(f"replay:{path}?speed=10")
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(len(received), 2)
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+
+    async def test_synthetic_packets_parse(self):
+        received = []
+        source = create_packet_source(
+            "synthetic:?bikes=3&rate=50&seed=1",
+            lambda device, data: received.append(data),
+        )
+        source.duration = 0.1
+        await source.start()
+        await source.finished.wait()
+
+        self.assertEqual(len(received), 3 * 5)
+        ids = {
+            Parser.parse("x", data.manufacturer_data[KEISER_COMPANY_ID], 0).id
+            for data in received
+        }
+        self.assertEqual(ids, {1, 2, 3})
+
+
+class TestPassiveFallback(unittest.IsolatedAsyncioTestCase):
+    async def test_passive_start_failure_falls_back_to_active_once(self):
+        FakeBleakScanner.built = []
+        with patch("bleak.BleakScanner", FakeBleakScanner), patch.object(
+            packet_sources, "SCAN_MODE", "passive"
+        ), patch.object(packet_sources, "_passive_unavailable", False):
+            with self.assertLogs(packet_sources.logger, "WARNING") as logs:
+                scanner = create_packet_source("bleak", lambda *args: None)
+                await scanner.start()
+                self.assertEqual(
+                    [s.scanning_mode for s in FakeBleakScanner.built],
+                    ["passive", "active"],
+                )
+                self.assertTrue(FakeBleakScanner.built[-1].started)
+                await scanner.stop()
+
+                # Restarts go straight to active, without logging again
+                scanner = create_packet_source("bleak", lambda *args: None)
+                await scanner.start()
+                self.assertEqual(FakeBleakScanner.built[-1].scanning_mode, "active")
+                self.assertEqual(len(FakeBleakScanner.built), 3)
+            self.assertEqual(len(logs.records), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import random
+import unittest
+from backend.utils.ranking import Ranking
+
+
+class TestRanking(unittest.TestCase):
+    def test_matches_a_full_sort_through_random_updates(self):
+        rng = random.Random(7)
+        ranking = Ranking()
+        scores = {}
+        for _ in range(2000):
+            bike_id = str(rng.randrange(50))
+            if rng.random() < 0.05:
+                ranking.remove(bike_id)
+                scores.pop(bike_id, None)
+            else:
+                scores[bike_id] = round(scores.get(bike_id, 0.0) + rng.random(), 1)
+                ranking.update(bike_id, scores[bike_id])
+
+        expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        self.assertEqual(ranking.page(), expected)
+        self.assertEqual(ranking.page(10, 5), expected[10:15])
+        for place, (bike_id, _) in enumerate(expected, start=1):
+            self.assertEqual(ranking.rank(bike_id), place)
+
+    def test_unchanged_scores_leave_the_version_alone(self):
+        ranking = Ranking()
+        self.assertTrue(ranking.sync({"1": {"trip_miles": 1.0}, "2": {}}))
+        version = ranking.version
+        self.assertFalse(ranking.sync({"1": {"trip_miles": 1.0}, "2": {}}))
+        self.assertEqual(ranking.version, version)
+
+        self.assertTrue(ranking.sync({"2": {"trip_miles": "bad"}}))
+        self.assertEqual(ranking.page(), [("2", 0.0)])
+        self.assertIsNone(ranking.rank("1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
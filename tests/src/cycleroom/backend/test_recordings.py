@@ -0,0 +1,98 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from backend.utils.advertisement import Advertisement
+from backend.utils.capture import Capture, CaptureWriter
+from backend.utils.recordings import (
+    NdjsonWriter,
+    iter_capture_recording,
+    iter_json_entries,
+    iter_json_file,
+    iter_recordings,
+)
+
+ENTRIES = [
+    {"sensor": "bluetooth-M3", "id": "AA", "manufacturerData": "0201", "n": i}
+    for i in range(200)
+] + [12.5, "text", None, [1, [2]]]
+
+
+class TestStreamingJson(unittest.TestCase):
+    def test_array_read_in_small_chunks(self):
+        for text in (json.dumps(ENTRIES), json.dumps(ENTRIES, indent=4)):
+            for chunk_size in (1, 5, 64, 4096):
+                entries = list(iter_json_entries(io.StringIO(text), chunk_size))
+                self.assertEqual(entries, ENTRIES)
+
+    def test_ndjson_round_trip(self):
+        path = os.path.join(tempfile.mkdtemp(), "ride.ndjson")
+        with NdjsonWriter(path) as writer:
+            for entry in ENTRIES:
+                writer.write(entry)
+        self.assertEqual(writer.count, len(ENTRIES))
+        self.assertEqual(list(iter_json_file(path)), ENTRIES)
+
+    def test_truncated_input_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_entries(io.StringIO('[{"a": 1}, {"b"'), 4))
+
+    def test_capture_writer_sorts_and_indexes(self):
+        path = os.path.join(tempfile.mkdtemp(), "ride.cap")
+        with CaptureWriter(path, block_size=3) as writer:
+            for ts in (5.0, 1.0, 3.0, 2.0, 4.0):
+                writer.write(Advertisement(f"B{int(ts) % 2}", -60, ts, b"\x02\x01"))
+            self.assertFalse(writer.write(Advertisement("C", -60, 6.0, b"x" * 21)))
+
+        with Capture(path) as capture:
+            self.assertEqual(list(capture.records["ts"]), [1.0, 2.0, 3.0, 4.0, 5.0])
+            self.assertEqual(len(capture.between(2.0, 4.0)), 2)
+            self.assertEqual(list(capture.for_address("B1")["ts"]), [1.0, 3.0, 5.0])
+
+
+class TestMergedRecordings(unittest.TestCase):
+    def test_streams_merge_in_time_order(self):
+        directory = tempfile.mkdtemp()
+        paths = []
+        for number, times in enumerate([(1.0, 4.0, 6.0), (2.0, 3.0, 4.0)]):
+            path = os.path.join(directory, f"ride{number}.cap")
+            with CaptureWriter(path) as writer:
+                for ts in times:
+                    writer.write(Advertisement(f"C{number}", -60, ts, b"\x02\x01"))
+            paths.append(path)
+        # CSV rows out of order are sorted before merging
+        path = os.path.join(directory, "ride.csv")
+        with open(path, "w") as file:
+            file.write("time,seconds_elapsed,rssi,id,manufacturerData\n")
+            file.write(",5.0,-60,V,0201\n,0.5,-60,V,0201\n")
+        paths.append(path)
+
+        packets = iter_recordings(paths)
+        self.assertNotIsInstance(packets, list)
+        self.assertEqual(
+            [(p.ts, p.address) for p in packets],
+            [
+                (0.5, "V"),
+                (1.0, "C0"),
+                (2.0, "C1"),
+                (3.0, "C1"),
+                (4.0, "C0"),  # Ties keep the order the files were given in
+                (4.0, "C1"),
+                (5.0, "V"),
+                (6.0, "C0"),
+            ],
+        )
+
+    def test_capture_streams_in_chunks(self):
+        path = os.path.join(tempfile.mkdtemp(), "ride.cap")
+        with CaptureWriter(path) as writer:
+            for ts in range(10):
+                writer.write(Advertisement("A", -60, float(ts), b"\x02\x01"))
+        packets = list(iter_capture_recording(path, chunk_size=3))
+        self.assertEqual([p.ts for p in packets], [float(ts) for ts in range(10)])
+        self.assertEqual({p.source for p in packets}, {"ride.cap"})
+
+
+if __name__ == "__main__":
+    unittest.main()
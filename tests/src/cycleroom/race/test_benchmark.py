@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+from race.benchmark import run_dashboard
+
+
+class TestDashboardBenchmark(unittest.TestCase):
+    def test_renders_headless_and_dumps_frames(self):
+        with tempfile.TemporaryDirectory() as dump:
+            phases, samples = run_dashboard(
+                bikes=5, frames=12, update_every=2, dump=dump, dump_every=6
+            )
+            self.assertEqual(
+                sorted(os.listdir(dump)), ["frame_00000.png", "frame_00006.png"]
+            )
+
+        self.assertEqual(len(samples), 12)
+        self.assertEqual(
+            [row[0] for row in phases.summary()],
+            [
+                "data",
+                "track",
+                "sprites",
+                "leaderboard",
+                "metrics",
+                "compose",
+                "present",
+                "video",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
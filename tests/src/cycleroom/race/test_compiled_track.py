@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pygame
+from race.compiled_track import CompiledTrack, compile_track, open_track
+from race.track import Track
+
+RECTANGLE = [(0, 0), (300, 0), (300, 100), (0, 100)]
+SIZE = (40, 30)
+
+
+class TestCompiledTrack(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.waypoints_path = os.path.join(tmp.name, "waypoints.json")
+        self.image_path = os.path.join(tmp.name, "track.png")
+        self.path = os.path.join(tmp.name, "track.bin")
+        with open(self.waypoints_path, "w") as f:
+            json.dump(
+                [{"index": i, "x": x, "y": y} for i, (x, y) in enumerate(RECTANGLE)], f
+            )
+        image = pygame.Surface((80, 60))
+        image.fill((255, 255, 255))
+        pygame.draw.rect(image, (0, 0, 255), (10, 10, 60, 40), 4)
+        pygame.image.save(image, self.image_path)
+
+    def open(self, length_miles=2.0):
+        return open_track(
+            self.path, self.waypoints_path, self.image_path, SIZE, length_miles
+        )
+
+    def test_matches_track_built_from_the_sources(self):
+        compiled = self.open()
+        expected = Track(RECTANGLE, length_miles=2.0)
+        self.assertEqual(compiled.track.perimeter, expected.perimeter)
+        self.assertEqual(compiled.cumulative.tolist(), expected.cumulative.tolist())
+        for distance in (0.0, 0.37, 1.0, 1.99, 5.25):
+            self.assertEqual(
+                compiled.track.position(distance), expected.position(distance)
+            )
+            self.assertEqual(
+                compiled.track.exact_position(distance),
+                expected.exact_position(distance),
+            )
+
+        scaled = pygame.transform.scale(pygame.image.load(self.image_path), SIZE)
+        background = compiled.background()
+        self.assertEqual(background.get_size(), SIZE)
+        self.assertEqual(
+            pygame.image.tobytes(background, "RGB"), pygame.image.tobytes(scaled, "RGB")
+        )
+
+    def test_arrays_are_read_only_views_of_the_file(self):
+        compiled = self.open()
+        self.assertFalse(compiled.track.lut_x.flags.writeable)
+        self.assertFalse(compiled.waypoints.flags.owndata)
+        # The track reads the mapped arc lengths instead of recomputing them
+        self.assertTrue(
+            np.shares_memory(compiled.track.cumulative, compiled.cumulative)
+        )
+
+    def test_recompiles_only_when_sources_or_settings_change(self):
+        key = self.open().key
+        modified = os.path.getmtime(self.path)
+        self.assertEqual(self.open().key, key)
+        self.assertEqual(os.path.getmtime(self.path), modified)
+
+        self.assertNotEqual(self.open(length_miles=3.0).key, key)
+        with open(self.waypoints_path, "w") as f:
+            json.dump([[0, 0], [100, 0], [100, 100]], f)
+        compiled = self.open(length_miles=3.0)
+        self.assertEqual(compiled.waypoints.tolist(), [[0, 0], [100, 0], [100, 100]])
+
+    def test_rejects_files_that_are_not_compiled_tracks(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a track" * 10)
+        with self.assertRaises(ValueError):
+            CompiledTrack(self.path)
+        # open_track compiles over it
+        self.assertEqual(len(self.open().waypoints), len(RECTANGLE))
+
+        compile_track(self.path, self.waypoints_path, self.image_path, SIZE, 2.0)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(ValueError):
+            CompiledTrack(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
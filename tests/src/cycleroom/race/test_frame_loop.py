@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+from race.frame_loop import (
+    BikeFeed,
+    FramePacer,
+    FrameStats,
+    PhaseTimer,
+    read_events,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFramePacer(unittest.TestCase):
+    def test_deadlines_do_not_drift_and_stalls_resync(self):
+        clock = FakeClock()
+        pacer = FramePacer(10, clock=clock, max_lag_frames=2)
+        self.assertAlmostEqual(pacer.next_delay(), 0.1)
+        clock.now += 0.13  # Frame ran 30 ms late
+        self.assertAlmostEqual(pacer.next_delay(), 0.07)
+        clock.now += 0.07
+        self.assertAlmostEqual(pacer.next_delay(), 0.1)
+
+        clock.now += 1.0  # Long stall: start again from now
+        self.assertEqual(pacer.next_delay(), 0.0)
+        self.assertEqual(pacer.dropped, 8)
+        self.assertAlmostEqual(pacer.next_delay(), 0.1)
+
+
+class TestFrameStats(unittest.TestCase):
+    def test_fps_and_work_time(self):
+        clock = FakeClock()
+        stats = FrameStats(clock=clock)
+        for _ in range(5):
+            stats.begin()
+            clock.now += 0.004
+            stats.end()
+            clock.now += 0.016
+        self.assertAlmostEqual(stats.fps(), 50.0)
+        self.assertAlmostEqual(stats.work_ms(), 4.0)
+        self.assertEqual(
+            stats.format(1.25), "50 fps | frame 4.0 ms (p99 4.0) | data 1.2 s old"
+        )
+        self.assertTrue(stats.format().endswith("no data"))
+
+
+class TestPhaseTimer(unittest.TestCase):
+    def test_splits_each_frame_by_phase(self):
+        clock = FakeClock()
+        phases = PhaseTimer(clock=clock)
+        for _ in range(4):
+            phases.start()
+            clock.now += 0.001
+            phases.mark("track")
+            clock.now += 0.003
+            phases.mark("sprites")
+        summary = {row[0]: row[1:] for row in phases.summary()}
+        self.assertEqual(list(summary), ["track", "sprites"])
+        self.assertAlmostEqual(summary["sprites"][0], 3.0)
+        self.assertAlmostEqual(summary["track"][3], 1.0)
+
+
+class TestBikeFeed(unittest.IsolatedAsyncioTestCase):
+    async def test_snapshots_are_replaced_not_mutated(self):
+        clock = FakeClock()
+        feed = BikeFeed(clock=clock)
+        feed.publish({"1": {"trip_miles": 1.0}, "2": {"trip_miles": 2.0}}, 5)
+        taken = feed.bikes
+        clock.now += 3
+        feed.apply_delta({"1": {"trip_miles": 1.5}}, ["2"], 6)
+
+        self.assertEqual(taken, {"1": {"trip_miles": 1.0}, "2": {"trip_miles": 2.0}})
+        self.assertEqual(feed.bikes, {"1": {"trip_miles": 1.5}})
+        self.assertEqual((feed.version, feed.generation, feed.age()), (6, 2, 0.0))
+
+    async def test_stale_and_early_deltas_are_dropped(self):
+        feed = BikeFeed()
+        self.assertFalse(feed.apply_delta({"1": {"trip_miles": 1.0}}, [], 4))
+        feed.publish({"1": {"trip_miles": 1.0}}, 5)
+        self.assertFalse(feed.apply_delta({"1": {"trip_miles": 0.5}}, [], 4))
+        self.assertTrue(feed.apply_delta({"2": {"trip_miles": 0.1}}, [], 7))
+        self.assertEqual(set(feed.bikes), {"1", "2"})
+
+    async def test_read_events(self):
+        async def lines():
+            for line in [
+                "retry: 2000",
+                "",
+                "id: 1",
+                'data: {"version": 3,',
+                'data: "bikes": {}}',
+                "",
+                ": keepalive",
+                "",
+            ]:
+                yield line
+
+        events = [event async for event in read_events(lines())]
+        self.assertEqual(events, [("1", '{"version": 3,\n"bikes": {}}'), ("", "")])
+
+    async def test_reset_wakes_the_poller(self):
+        feed = BikeFeed()
+        feed.publish({"1": {}}, 3)
+        waiting = asyncio.create_task(feed.wait_for_poll(60))
+        await asyncio.sleep(0)
+        feed.reset()
+        await asyncio.wait_for(waiting, 1)
+        self.assertIsNone(feed.version)
+        self.assertIsNone(feed.age())
+        self.assertFalse(feed.refresh.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
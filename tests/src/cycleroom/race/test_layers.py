@@ -0,0 +1,60 @@
+import unittest
+import pygame
+from race.layers import Compositor, build_background
+
+BACKGROUND = (0, 0, 80)
+SPRITE = (255, 0, 0)
+TEXT = (0, 255, 0)
+
+
+class TestCompositor(unittest.TestCase):
+    def setUp(self):
+        self.screen = pygame.Surface((200, 100))
+        self.compositor = Compositor(
+            self.screen, build_background((200, 100), fill=BACKGROUND)
+        )
+        self.sprite = pygame.Surface((10, 10))
+        self.sprite.fill(SPRITE)
+        self.draws = 0
+
+    def frame(self, sprite_positions, region_content=None):
+        def draw(target):
+            self.draws += 1
+            target.fill(TEXT, pygame.Rect(150, 0, 50, 20))
+
+        self.compositor.begin_frame()
+        self.compositor.sprites([(self.sprite, p) for p in sprite_positions])
+        self.compositor.region("row", pygame.Rect(150, 0, 50, 20), region_content, draw)
+        return self.compositor.end_frame()
+
+    def test_first_frame_is_full_then_only_changes(self):
+        self.assertEqual(self.frame([(0, 0)], "a"), [self.screen.get_rect()])
+        self.assertEqual(self.frame([(0, 0)], "a"), [])
+        self.assertEqual(self.draws, 1)
+
+        dirty = self.frame([(20, 0)], "a")
+        self.assertEqual(dirty, [pygame.Rect(0, 0, 10, 10), pygame.Rect(20, 0, 10, 10)])
+        self.assertEqual(self.screen.get_at((5, 5))[:3], BACKGROUND)
+        self.assertEqual(self.screen.get_at((25, 5))[:3], SPRITE)
+
+        self.assertEqual(self.frame([(20, 0)], "b"), [pygame.Rect(150, 0, 50, 20)])
+        self.assertEqual(self.draws, 2)
+
+    def test_sprite_leaving_a_region_redraws_it(self):
+        self.frame([(145, 5)], "a")
+        self.frame([(20, 0)], "a")
+        self.assertEqual(self.draws, 2)
+        self.assertEqual(self.screen.get_at((152, 8))[:3], TEXT)
+        self.assertEqual(self.screen.get_at((147, 8))[:3], BACKGROUND)
+
+    def test_invalidate_repaints_everything(self):
+        self.frame([(0, 0)], "a")
+        self.screen.fill((255, 255, 255))  # Something else drew over the screen
+        self.compositor.invalidate()
+        self.assertEqual(self.frame([(0, 0)], "a"), [self.screen.get_rect()])
+        self.assertEqual(self.screen.get_at((100, 50))[:3], BACKGROUND)
+        self.assertEqual(self.screen.get_at((5, 5))[:3], SPRITE)
+
+
+if __name__ == "__main__":
+    unittest.main()
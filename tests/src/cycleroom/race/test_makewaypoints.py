@@ -0,0 +1,107 @@
+import math
+import os
+import tempfile
+import unittest
+import numpy as np
+import pygame
+from race.centerline import extract_centerline, orient, resample, simplify
+from race.makewaypoints import make_waypoints, track_mask
+
+CENTRE = (200, 150)
+RADIUS = 100
+
+
+def ring_image() -> pygame.Surface:
+    """A thick ring, a stub sticking out of it and a stray stroke."""
+    image = pygame.Surface((400, 300))
+    image.fill((255, 255, 255))
+    pygame.draw.circle(image, (40, 120, 200), CENTRE, RADIUS + 4, 8)
+    pygame.draw.line(image, (0, 0, 0), (300, 150), (340, 150), 3)
+    pygame.draw.line(image, (0, 0, 0), (20, 20), (60, 40), 3)
+    return image
+
+
+class TestCenterline(unittest.TestCase):
+    def test_ring_becomes_one_ordered_evenly_spaced_loop(self):
+        mask = track_mask(ring_image(), (400, 300))
+        points = extract_centerline(mask, epsilon=1.0, spacing=10.0)
+
+        radii = np.hypot(points[:, 0] - CENTRE[0], points[:, 1] - CENTRE[1])
+        self.assertLess(np.abs(radii - RADIUS).max(), 2.5)
+        # Consecutive points, including last to first, are evenly spaced
+        steps = np.hypot(*np.diff(np.vstack([points, points[:1]]), axis=0).T)
+        self.assertLess(steps.max() - steps.min(), 1.0)
+        self.assertAlmostEqual(steps.mean(), 10.0, delta=0.5)
+        # Once around: the angle advances the same way all the way round
+        angles = np.unwrap(
+            np.arctan2(points[:, 1] - CENTRE[1], points[:, 0] - CENTRE[0])
+        )
+        self.assertAlmostEqual(abs(angles[-1] - angles[0]), 2 * math.pi, delta=0.2)
+        self.assertTrue(np.all(np.diff(angles) > 0) or np.all(np.diff(angles) < 0))
+
+    def test_no_loop_is_an_error(self):
+        mask = np.zeros((50, 50), dtype=bool)
+        mask[10:13, 5:45] = True
+        with self.assertRaises(ValueError):
+            extract_centerline(mask)
+
+    def test_simplify_keeps_corners_and_drops_straight_runs(self):
+        side = np.arange(10, dtype=float)
+        square = np.vstack(
+            [
+                np.column_stack([side, np.zeros(10)]),
+                np.column_stack([np.full(10, 10.0), side]),
+                np.column_stack([10 - side, np.full(10, 10.0)]),
+                np.column_stack([np.zeros(10), 10 - side]),
+            ]
+        )
+        corners = {tuple(p) for p in simplify(square, 0.5).tolist()}
+        self.assertEqual(corners, {(0, 0), (10, 0), (10, 10), (0, 10)})
+
+    def test_resample_spacing(self):
+        square = np.array([(0, 0), (10, 0), (10, 10), (0, 10)], dtype=float)
+        points = resample(square, 2.5)
+        self.assertEqual(len(points), 16)
+        self.assertEqual(points[1].tolist(), [2.5, 0])
+
+    def test_orient_start_and_direction(self):
+        square = np.array([(0, 0), (10, 0), (10, 10), (0, 10)], dtype=float)
+        # Right along the top then down is clockwise with y pointing down
+        self.assertEqual(orient(square, clockwise=True).tolist(), square.tolist())
+        points = orient(square, start=(9, 9), clockwise=False)
+        self.assertEqual(points.tolist(), [[10, 10], [10, 0], [0, 0], [0, 10]])
+
+
+class TestMakeWaypoints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.image_path = os.path.join(self.tmp.name, "track.png")
+        pygame.image.save(ring_image(), self.image_path)
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+
+    def test_waypoint_file_format_and_cache(self):
+        waypoints, cached = make_waypoints(
+            self.image_path, (800, 600), start=(600, 300), cache_dir=self.cache_dir
+        )
+        self.assertFalse(cached)
+        self.assertEqual(waypoints[0]["index"], 1)
+        # Scaled to the drawn size: waypoint 1 is the one nearest the start,
+        # at most half the 15 px spacing along the track from it
+        first = (waypoints[0]["x"], waypoints[0]["y"])
+        self.assertLess(math.dist(first, (600, 300)), 8)
+
+        again, cached = make_waypoints(
+            self.image_path, (800, 600), start=(600, 300), cache_dir=self.cache_dir
+        )
+        self.assertTrue(cached)
+        self.assertEqual(again, waypoints)
+        # Other settings are a different cache entry
+        _, cached = make_waypoints(
+            self.image_path, (800, 600), spacing=20.0, cache_dir=self.cache_dir
+        )
+        self.assertFalse(cached)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from race.race_state import RaceState
+from race.track import Track
+
+RECTANGLE = [(0, 0), (300, 0), (300, 100), (0, 100)]
+
+
+class TestRaceState(unittest.TestCase):
+    def setUp(self):
+        self.track = Track(RECTANGLE, length_miles=2.0, resolution=800)
+        self.state = RaceState(self.track, capacity=2)
+
+    def test_step_matches_track_for_every_bike(self):
+        distances = {"1": 0.3, "2": 2.7, "3": 5.1}
+        self.state.update({k: {"trip_miles": v} for k, v in distances.items()})
+        self.state.step()  # The first step starts each bike's race
+        self.assertEqual(self.state.capacity, 4)  # Grew past two bikes
+
+        distances = {"1": 2.4, "2": 3.9, "3": 5.2}
+        self.state.update({k: {"trip_miles": v} for k, v in distances.items()})
+        self.state.step()
+
+        for bike_id, distance in distances.items():
+            x, y, _ = self.track.position(distance)
+            self.assertEqual(self.state.position(bike_id), (int(x), int(y)))
+        self.assertEqual(self.state.lap_count("1"), 1)
+        self.assertEqual(self.state.lap_count("2"), 0)
+        self.assertAlmostEqual(self.state.race_distance_of("2"), 1.2)
+
+    def test_late_joiners_and_missing_bikes(self):
+        self.state.update({"1": {"trip_miles": 1.0}})
+        self.state.step()
+        self.state.update({"2": {"trip_miles": 3.0}})
+        self.state.step()
+
+        self.assertEqual(list(self.state.active[:2]), [False, True])
+        self.assertEqual(self.state.race_distance_of("2"), 0.0)
+        self.assertEqual(self.state.lap_count("unknown"), 0)
+
+        self.state.reset()
+        self.assertEqual(len(self.state), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestDeadReckoning(unittest.TestCase):
+    def setUp(self):
+        track = Track(RECTANGLE, length_miles=2.0, resolution=800)
+        self.state = RaceState(track)
+
+    def ride(self, distance, now):
+        self.state.update({"1": {"trip_miles": distance}}, now=now)
+
+    def shown(self):
+        return float(self.state.shown_distance[0])
+
+    def test_moves_between_reports_and_stops_at_the_next_step(self):
+        self.ride(1.0, now=0.0)
+        self.ride(1.1, now=10.0)  # 0.01 miles per second
+        self.state.step(now=10.0)
+        self.assertAlmostEqual(self.shown(), 1.1)
+
+        self.state.step(now=15.0)
+        self.assertGreater(self.shown(), 1.1)
+        self.assertLessEqual(self.shown(), 1.15 + 1e-9)
+
+        for second in range(16, 60):
+            self.state.step(now=float(second))
+        self.assertAlmostEqual(self.shown(), 1.2)  # Never past the unreported step
+
+        self.ride(1.2, now=60.0)
+        self.state.step(now=60.0)
+        self.assertGreaterEqual(self.shown(), 1.2)  # No jump back
+        self.assertLess(self.shown(), 1.21)
+
+    def test_small_errors_ease_and_large_ones_snap(self):
+        self.ride(1.0, now=0.0)
+        self.state.step(now=0.0)
+        self.state.step(now=0.5)
+        self.ride(1.1, now=0.5)
+        self.state.step(now=0.6)
+        self.assertGreater(self.shown(), 1.0)
+        self.assertLess(self.shown(), 1.1)
+
+        self.ride(5.0, now=2.0)
+        self.state.step(now=2.1)
+        self.assertAlmostEqual(self.shown(), 5.0, places=2)
+
+        self.ride(0.2, now=3.0)  # Odometer reset
+        self.state.step(now=3.1)
+        self.assertAlmostEqual(self.shown(), 0.2)
+
+    def test_laps_follow_reported_distance(self):
+        self.ride(1.9, now=0.0)
+        self.state.step(now=0.0)
+        self.ride(2.0, now=5.0)
+        self.state.step(now=6.0)
+        self.assertEqual(self.state.lap_count("1"), 1)
+        self.assertAlmostEqual(self.state.race_distance_of("1"), 0.1)
@@ -0,0 +1,58 @@
+import unittest
+import pygame
+from race.race_state import RaceState
+from race.sprites import BikeSprites, SpriteCache
+from race.track import Track
+
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+
+
+def make_icon():
+    """A white 20x10 icon with a black bar along its top half."""
+    icon = pygame.Surface((20, 10))
+    icon.fill((255, 255, 255))
+    icon.fill((0, 0, 0), pygame.Rect(0, 0, 20, 5))
+    return icon
+
+
+class TestSpriteCache(unittest.TestCase):
+    def test_tints_ink_and_clears_background(self):
+        cache = SpriteCache(make_icon())
+        sprite = cache.sprite(RED)
+        self.assertEqual(tuple(sprite.get_at((3, 2))), (255, 0, 0, 255))
+        self.assertEqual(sprite.get_at((3, 8)).a, 0)
+        self.assertIs(cache.sprite(RED), sprite)
+
+    def test_rotation_and_mirroring(self):
+        cache = SpriteCache(make_icon(), angle_step=90)
+        self.assertEqual(cache.sprite(RED, 1).get_size(), (10, 20))  # Heading down
+        left = cache.sprite(RED, 2)
+        self.assertEqual(left.get_size(), (20, 10))
+        self.assertEqual(left.get_at((3, 2)).a, 255)  # Mirrored, not upside down
+
+        cache.set_icon(pygame.Surface((8, 8)))
+        self.assertEqual(len(cache), 0)
+
+
+class TestBikeSprites(unittest.TestCase):
+    def test_sprites_follow_colors_and_slots(self):
+        track = Track([(0, 0), (300, 0), (300, 100), (0, 100)], length_miles=2.0)
+        state = RaceState(track)
+        state.update({"1": {"trip_miles": 0.0}, "2": {"trip_miles": 0.5}})
+        state.step()
+        sprites = BikeSprites(SpriteCache(make_icon()))
+
+        items = sprites.items(state, {"1": RED, "2": BLUE})
+        self.assertEqual([position for _, position in items], [(0, 0), (200, 0)])
+        self.assertIs(items[0][0], sprites.cache.sprite(RED))
+
+        state.update({"2": {"trip_miles": 0.5}})
+        state.step()
+        items = sprites.items(state, {"2": RED})
+        self.assertEqual(len(items), 1)
+        self.assertIs(items[0][0], sprites.cache.sprite(RED))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import pygame
+from race.text_cache import PanelCache, TextCache
+
+
+class TestTextCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.font.init()
+        cls.font = pygame.font.SysFont(None, 18)
+
+    def test_reuses_and_evicts_least_recently_used(self):
+        cache = TextCache(max_entries=2)
+        first = cache.render(self.font, "Gear: 14", (255, 255, 255))
+        self.assertIs(cache.render(self.font, "Gear: 14", (255, 255, 255)), first)
+        self.assertIsNot(cache.render(self.font, "Gear: 14", (255, 0, 0)), first)
+
+        cache.render(self.font, "Gear: 14", (255, 255, 255))  # Most recent again
+        cache.render(self.font, "Laps: 2", (255, 255, 255))
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.render(self.font, "Gear: 14", (255, 255, 255)), first)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_panels_rerender_only_on_change(self):
+        panels = PanelCache(TextCache(), self.font)
+        lines = ["Bike ID: 12", "Gear: 14", "Laps: 1"]
+        panel = panels.panel("12", lines)
+        self.assertIs(panels.panel("12", list(lines)), panel)
+        self.assertEqual(panel.get_width(), 400)
+
+        self.assertIsNot(panels.panel("12", lines[:2] + ["Laps: 2"]), panel)
+        self.assertEqual(panels.renders, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from race.track import Track
+
+# A 300 x 100 rectangle: two long sides and two short ones
+RECTANGLE = [(0, 0), (300, 0), (300, 100), (0, 100)]
+
+
+class TestTrack(unittest.TestCase):
+    def setUp(self):
+        self.track = Track(RECTANGLE, length_miles=2.0, resolution=800)
+
+    def test_positions_follow_arc_length(self):
+        self.assertEqual(self.track.perimeter, 800)
+        # A quarter of a lap is 200 px: two thirds of the way along the top
+        x, y, heading = self.track.exact_position(0.5)
+        self.assertAlmostEqual(x, 200)
+        self.assertAlmostEqual(y, 0)
+        self.assertAlmostEqual(heading, 0)
+        # 350 px is halfway down the short right-hand side
+        x, y, heading = self.track.exact_position(350 / 800 * 2.0)
+        self.assertAlmostEqual((x, y, heading), (300, 50, 90))
+
+    def test_lookup_table_matches_exact_position(self):
+        for distance in (0.0, 0.37, 1.0, 1.99, 5.25):
+            x, y, _ = self.track.position(distance)
+            exact_x, exact_y, _ = self.track.exact_position(distance)
+            self.assertLessEqual(abs(x - exact_x) + abs(y - exact_y), 1.0)
+
+    def test_laps_come_from_distance(self):
+        self.assertEqual(self.track.laps(1.99), 0)
+        self.assertEqual(self.track.laps(2.0), 1)
+        self.assertEqual(self.track.laps(9.5), 4)
+        self.assertEqual(self.track.position(2.5), self.track.position(0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+import pygame
+from race.video import BOUNDARY, FrameBroadcaster
+
+
+class TestFrameBroadcaster(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.video = FrameBroadcaster(fps=1000)
+        self.surface = pygame.Surface((64, 32))
+
+    async def asyncTearDown(self):
+        self.video.stop()
+
+    async def test_nothing_is_encoded_without_viewers(self):
+        self.video.submit(self.surface)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.video.encoded, 0)
+
+    async def test_viewers_share_one_encode_and_slow_ones_skip(self):
+        fast, slow = self.video.stream(), self.video.stream()
+        fast_part = asyncio.ensure_future(anext(fast))
+        slow_part = asyncio.ensure_future(anext(slow))
+        await asyncio.sleep(0)
+        self.assertEqual(self.video.viewers, 2)
+
+        self.surface.fill((255, 0, 0))
+        self.video.submit(self.surface)
+        first_fast, first_slow = await asyncio.wait_for(
+            asyncio.gather(fast_part, slow_part), 2
+        )
+        self.assertEqual(first_fast, first_slow)
+        self.assertTrue(first_fast.startswith(f"--{BOUNDARY}\r\n".encode()))
+        self.assertIn(b"\xff\xd8", first_fast)  # JPEG start of image
+        self.assertEqual(self.video.encoded, 1)
+
+        # The fast viewer takes every frame; the slow one only the newest
+        for shade in (50, 100, 150):
+            self.surface.fill((shade, shade, shade))
+            await asyncio.sleep(0.002)
+            self.video.submit(self.surface)
+            await asyncio.wait_for(anext(fast), 2)
+        self.assertEqual(self.video.sequence, 4)
+        await asyncio.wait_for(anext(slow), 2)
+        self.assertEqual(self.video.sequence, 4)
+
+        await fast.aclose()
+        await slow.aclose()
+        self.assertEqual(self.video.viewers, 0)
+
+    async def test_frames_can_be_submitted_from_a_render_thread(self):
+        self.video.start()
+        self.video.watch()
+        await asyncio.to_thread(self.video.submit, self.surface)
+        sequence, jpeg = await asyncio.wait_for(self.video.next_frame(0), 2)
+        self.assertEqual(sequence, 1)
+        self.assertIn(b"\xff\xd8", jpeg)
+
+    async def test_unchanged_frames_are_not_reencoded(self):
+        self.video.watch()
+        self.video.submit(self.surface)
+        await asyncio.wait_for(self.video.next_frame(0), 2)
+        await asyncio.sleep(0.002)
+        self.video.submit(self.surface, changed=False)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.video.encoded, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
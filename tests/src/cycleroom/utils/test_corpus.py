@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from backend.routes.parse_raw_data import Parser
+from backend.utils.capture import (
+    read_capture,
+    record_payload,
+    to_advertisements,
+    write_capture,
+)
+from utils.corpus import VERSION_MINOR, generate_corpus
+from utils.simbledata import generate_m3_data
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.records, self.addresses, self.truth = generate_corpus(
+            2000, bikes=25, seed=3, start=1_700_000_000.0
+        )
+
+    def test_parser_decodes_ground_truth(self):
+        for record, expected in zip(self.records, self.truth):
+            parsed = Parser.parse("x", record_payload(record), -60)
+            self.assertTrue(parsed.is_valid)
+            for field in ("id", "cadence", "heart_rate", "power", "energy", "time"):
+                self.assertEqual(getattr(parsed, field), expected[field], field)
+            self.assertEqual(parsed.gear, expected["gear"])
+            self.assertAlmostEqual(parsed.trip, expected["trip"])
+
+    def test_payloads_match_scalar_generator(self):
+        record = self.records[123]
+        payload = record_payload(record)
+        expected = generate_m3_data(
+            equipment_id=payload[5],
+            version_minor=VERSION_MINOR,
+            cadence=int.from_bytes(payload[6:8], "little"),
+            heart_rate=int.from_bytes(payload[8:10], "little"),
+            power=int.from_bytes(payload[10:12], "little"),
+            caloric_burn=int.from_bytes(payload[12:14], "little"),
+            duration_minutes=payload[14],
+            duration_seconds=payload[15],
+            distance=int.from_bytes(payload[16:18], "little"),
+            gear=payload[18],
+        )
+        self.assertEqual(payload, bytes(expected))
+
+    def test_capture_round_trip(self):
+        self.assertTrue(np.all(np.diff(self.records["ts"]) > 0))
+        path = os.path.join(tempfile.mkdtemp(), "corpus.cap")
+
+        write_capture(path, self.records, self.addresses)
+        records, addresses = read_capture(path)
+
+        self.assertEqual(addresses, self.addresses)
+        np.testing.assert_array_equal(records, self.records)
+        first = to_advertisements(records[:1], addresses)[0]
+        self.assertEqual(first.address, "5E:00:00:00:00:01")
+        self.assertEqual(first.ts, 1_700_000_000.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+from backend.utils.capture import Capture
+from backend.utils.recordings import iter_json_file
+from utils.filterjson import filter_recording, load_m3_ids
+
+
+class TestFilterJson(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        metadata = os.path.join(self.directory, "BluetoothMetadata.csv")
+        with open(metadata, "w") as file:
+            file.write("id,name\nAA,M3\nBB,Watch\nCC,M3\n,M3\n")
+        self.m3_ids = load_m3_ids(metadata)
+        self.source = os.path.join(self.directory, "export.json")
+        entries = [
+            {
+                "sensor": "Bluetooth",
+                "id": "AA",
+                "time": "2000000000",
+                "manufacturerData": "0201",
+                "rssi": "-60",
+            },
+            {
+                "sensor": "Bluetooth",
+                "id": "BB",
+                "time": "3000000000",
+                "manufacturerData": "0202",
+                "rssi": "-60",
+            },
+            {"sensor": "Location", "time": "1000000000"},
+            {"sensor": "Bluetooth", "id": "CC", "time": "bad"},
+        ]
+        with open(self.source, "w") as file:
+            json.dump(entries, file, indent=4)
+
+    def test_metadata_ids(self):
+        self.assertEqual(self.m3_ids, {"AA", "CC"})
+
+    def test_filter_to_ndjson(self):
+        output = os.path.join(self.directory, "filtered.ndjson")
+        read, written, first, last = filter_recording(self.source, output, self.m3_ids)
+        self.assertEqual((read, written, first, last), (4, 2, 1000000000, 3000000000))
+        kept = [entry.get("id") for entry in iter_json_file(output)]
+        self.assertEqual(kept, ["AA", None])
+
+    def test_filter_to_capture(self):
+        output = os.path.join(self.directory, "filtered.cap")
+        _, written, _, _ = filter_recording(self.source, output, self.m3_ids)
+        self.assertEqual(written, 1)
+        with Capture(output) as capture:
+            self.assertEqual(capture.addresses, ["AA"])
+            self.assertEqual(capture.records[0]["ts"], 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import random
+import unittest
+import httpx
+from backend.packet_sources import VirtualBike
+from backend.routes.parse_raw_data import Parser, live_metrics
+from backend.utils.advertisement import Advertisement
+from utils.loadgen import BroadcastTracker, ride
+from utils.replay import ReplayReport
+
+
+class TestLoadGenerator(unittest.IsolatedAsyncioTestCase):
+    def test_tracker_matches_broadcast_metrics(self):
+        bike = VirtualBike(7, random.Random(1))
+        bike.step(1.0)
+        packet = Advertisement(bike.address, -60, 0.0, bike.payload())
+        tracker = BroadcastTracker()
+        tracker.sent(packet)
+
+        metrics = live_metrics(Parser.parse(packet.address, packet.payload, -60))
+        # Viewers see the metrics after a JSON round trip
+        tracker.received({"7": json.loads(json.dumps(metrics))})
+        tracker.received({"8": metrics})
+
+        self.assertEqual(len(tracker.latency), 1)
+        self.assertEqual(tracker.unmatched, 1)
+
+    async def test_ride_posts_every_bike_each_interval(self):
+        sources = set()
+
+        def handler(request):
+            body = json.loads(request.content)
+            sources.add(body["source"])
+            return httpx.Response(200, json={"accepted": len(body["packets"])})
+
+        rng = random.Random(2)
+        bikes = [VirtualBike(i, rng) for i in range(1, 11)]
+        report = ReplayReport()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await ride(
+                client,
+                "http://server/parse_raw_data/batch",
+                bikes,
+                2,
+                0.02,
+                0.1,
+                4,
+                report,
+                BroadcastTracker(),
+            )
+
+        self.assertEqual(report.packets, 10 * 5)
+        self.assertEqual(report.requests, 2 * 5)
+        self.assertEqual(report.accepted, report.packets)
+        self.assertEqual(sources, {"loadgen-1", "loadgen-2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
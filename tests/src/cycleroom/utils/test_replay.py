@@ -0,0 +1,83 @@
+import json
+import time
+import unittest
+import httpx
+from backend.utils.advertisement import Advertisement
+from utils.replay import replay, schedule_batches
+
+
+def make_packets(count, spacing):
+    return [
+        Advertisement("AA", -60, 1000.0 + i * spacing, bytes([2, 1, i % 256]), "a")
+        for i in range(count)
+    ]
+
+
+class TestReplay(unittest.IsolatedAsyncioTestCase):
+    def test_batches_close_on_size_and_delay(self):
+        batches = list(schedule_batches(make_packets(6, 0.03), 4, 1.0, 0.05))
+        self.assertEqual([len(batch) for _, batch in batches], [2, 2, 2])
+        self.assertAlmostEqual(batches[0][0], 0.03)
+
+        flat_out = list(schedule_batches(make_packets(10, 60), 4, 0, 0.05))
+        self.assertEqual([len(batch) for _, batch in flat_out], [4, 4, 2])
+        self.assertEqual({due for due, _ in flat_out}, {0.0})
+
+    async def test_replay_is_time_scaled_and_reports(self):
+        received = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            received.extend(body["packets"])
+            return httpx.Response(
+                200, json={"accepted": len(body["packets"]), "rejected": 0}
+            )
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        started = time.monotonic()
+        report = await replay(
+            make_packets(20, 0.1),
+            url="http://ingest/parse_raw_data/batch",
+            speed=10,
+            batch_size=5,
+            client=client,
+        )
+        elapsed = time.monotonic() - started
+        await client.aclose()
+
+        self.assertGreaterEqual(elapsed, 0.18)
+        self.assertEqual(report.packets, 20)
+        self.assertEqual(report.accepted, 20)
+        self.assertEqual(report.failed_requests, 0)
+        self.assertEqual(len(report.latency), report.requests)
+        self.assertEqual([p["data"][-2:] for p in received][:3], ["00", "01", "02"])
+        # Timestamps are shifted to the time of the replay
+        self.assertGreater(received[0]["ts"], time.time() - 60)
+        # The server did not report duplicates, so none are claimed
+        self.assertIsNone(report.duplicates)
+        self.assertIn("duplicates not reported", report.format())
+
+    async def test_duplicates_come_from_the_server(self):
+        def handler(request):
+            count = len(json.loads(request.content)["packets"])
+            return httpx.Response(
+                200, json={"accepted": count - 1, "rejected": 0, "duplicates": 1}
+            )
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        report = await replay(
+            make_packets(20, 0.1),
+            url="http://ingest/parse_raw_data/batch",
+            speed=0,
+            batch_size=5,
+            client=client,
+        )
+        await client.aclose()
+
+        self.assertEqual(report.duplicates, 4)
+        self.assertEqual(report.accepted, 16)
+        self.assertIn("4 duplicates", report.format())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from utils.simbledata import generate_m3_data
+from utils.testparse import bulk_import, process_files_in_directory
+
+OUTPUT_ENV = "TESTPARSE_WRITES"
+
+
+def record_batch(records):
+    """Stands in for the InfluxDB write; runs in the pool's worker processes."""
+    with open(os.environ[OUTPUT_ENV], "a") as file:
+        for parsed, timestamp in records:
+            file.write(json.dumps([parsed.uuid, timestamp]) + "\n")
+
+
+class TestBulkImport(unittest.TestCase):
+    def test_bulk_import_writes_each_file_in_order(self):
+        directory = tempfile.mkdtemp()
+        valid = bytes(generate_m3_data(equipment_id=3, version_minor=0x30)).hex()
+        for number in range(4):
+            with open(os.path.join(directory, f"bike{number}.csv"), "w") as file:
+                file.write("time,seconds_elapsed,rssi,id,manufacturerData\n")
+                for row in range(120):
+                    data = valid if row % 10 else "0201"  # Too short to parse
+                    time_ns = 1_700_000_000_000_000_000 + row * 250_000_000
+                    file.write(f"{time_ns},{row / 4},-60,AA:0{number},{data}\n")
+        output = os.path.join(directory, "writes.ndjson")
+
+        with patch.dict(os.environ, {OUTPUT_ENV: output}):
+            totals = bulk_import(
+                directory, workers=2, batch_size=25, write_batch=record_batch
+            )
+
+        self.assertEqual(totals["files"], 4)
+        self.assertEqual(totals["rows"], 480)
+        self.assertEqual(totals["rejected"], 48)
+        self.assertEqual(totals["accepted"], 432)
+        self.assertEqual(totals["failed"], 0)
+        written = {}
+        with open(output) as file:
+            for line in file:
+                address, timestamp = json.loads(line)
+                written.setdefault(address, []).append(timestamp)
+        self.assertEqual(len(written), 4)
+        for times in written.values():
+            self.assertEqual(len(times), 108)
+            self.assertEqual(times, sorted(times))
+
+
+class TestReplay(unittest.TestCase):
+    def test_replays_every_file_with_capped_workers(self):
+        received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                received.append(json.loads(body)["equipment_id"])
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        directory = tempfile.mkdtemp()
+        for number in range(3):
+            data = bytes(generate_m3_data(equipment_id=number)).hex()
+            with open(os.path.join(directory, f"bike{number}.csv"), "w") as file:
+                file.write("time,seconds_elapsed,rssi,id,manufacturerData\n")
+                for row in range(5):
+                    file.write(f"0,{row / 100},-60,AA:0{number},{data}\n")
+
+        url = f"http://127.0.0.1:{server.server_port}/sessions"
+        process_files_in_directory(directory, url, workers=2)
+
+        self.assertEqual(sorted(received), [0] * 5 + [1] * 5 + [2] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()